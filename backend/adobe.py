@@ -0,0 +1,343 @@
+"""Shared client for the Adobe PDF Services REST API.
+
+One :class:`AdobeClient` per process keeps the access token (refreshed
+shortly before it expires) and a pooled ``requests.Session``. Inputs are
+streamed to the upload URL and results streamed to disk. Submitted jobs
+are polled by a single background thread for all requests, so callers
+only wait on a future and give up when their latency budget runs out.
+
+At most ``ADOBE_CONCURRENCY`` conversions run at once; a request that
+cannot get a slot within ``ADOBE_QUEUE_WAIT`` seconds, or whose result
+takes longer than ``ADOBE_TIMEOUT``, raises :class:`AdobeError` and the
+caller falls back to its local converter. ``ADOBE_API_BASE`` points the
+client at another region or at ``benchmarks/adobe_stub.py``.
+
+:class:`AsyncAdobeClient` makes the same calls for the ASGI server
+(``asgi.py``), awaited on its shared ``httpx.AsyncClient``.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, TimeoutError
+
+import requests
+from requests.adapters import HTTPAdapter
+
+ADOBE_API_BASE = os.getenv('ADOBE_API_BASE', 'https://pdf-services.adobe.io').rstrip('/')
+ADOBE_CONCURRENCY = int(os.getenv('ADOBE_CONCURRENCY', '4'))
+ADOBE_QUEUE_WAIT = float(os.getenv('ADOBE_QUEUE_WAIT', '2'))
+ADOBE_TIMEOUT = float(os.getenv('ADOBE_TIMEOUT', '120'))
+# Run the local converter alongside Adobe and keep whichever finishes first
+ADOBE_RACE = os.getenv('ADOBE_RACE', '0') == '1'
+
+MEDIA_TYPES = {
+    'pdf': 'application/pdf',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+}
+
+# Refresh the token this many seconds before Adobe says it expires
+TOKEN_MARGIN = 300
+# Seconds between status polls of one job, doubling up to POLL_MAX
+POLL_MIN = 0.25
+POLL_MAX = 4.0
+HTTP_TIMEOUT = (5, 60)
+_CHUNK = 1024 * 1024
+
+
+class AdobeError(Exception):
+    pass
+
+
+class AdobeBusy(AdobeError):
+    """No conversion slot was free; says nothing about Adobe's health."""
+
+
+class AdobeClient:
+    def __init__(self, client_id, client_secret, base=ADOBE_API_BASE,
+                 concurrency=ADOBE_CONCURRENCY):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.base = base
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=concurrency * 2 + 1)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._token = None
+        self._token_expires = 0
+        self._token_lock = threading.Lock()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._poller = None
+
+    def _access_token(self, refresh=False):
+        with self._token_lock:
+            if refresh or not self._token or time.time() >= self._token_expires:
+                resp = self.session.post(f'{self.base}/token', timeout=HTTP_TIMEOUT, data={
+                    'client_id': self.client_id,
+                    'client_secret': self.client_secret,
+                })
+                if resp.status_code != 200:
+                    raise AdobeError(f'Authentication failed: HTTP {resp.status_code}')
+                body = resp.json()
+                self._token = body['access_token']
+                self._token_expires = time.time() + int(body.get('expires_in', 3600)) - TOKEN_MARGIN
+            return self._token
+
+    def _request(self, method, url, **kwargs):
+        for attempt in range(2):
+            headers = {
+                'Authorization': f'Bearer {self._access_token(refresh=attempt > 0)}',
+                'X-API-Key': self.client_id,
+            }
+            resp = self.session.request(method, url, headers=headers, timeout=HTTP_TIMEOUT, **kwargs)
+            if resp.status_code != 401:
+                break
+        if resp.status_code >= 400:
+            raise AdobeError(f'{method} {url}: HTTP {resp.status_code} {resp.text[:200]}')
+        return resp
+
+    def _upload(self, input_path, media_type):
+        asset = self._request('POST', f'{self.base}/assets', json={'mediaType': media_type}).json()
+        with open(input_path, 'rb') as f:
+            resp = self.session.put(asset['uploadUri'], data=f, timeout=HTTP_TIMEOUT,
+                                    headers={'Content-Type': media_type})
+        if resp.status_code >= 400:
+            raise AdobeError(f'Upload failed: HTTP {resp.status_code}')
+        return asset['assetID']
+
+    def submit(self, input_path, operation, media_type, **params):
+        """Upload ``input_path`` and start ``operation`` (``exportpdf``,
+        ``createpdf``, ...) on it. Returns a future of the result's
+        download URL, resolved by the poller thread."""
+        asset_id = self._upload(input_path, media_type)
+        resp = self._request('POST', f'{self.base}/operation/{operation}',
+                             json={'assetID': asset_id, **params})
+        location = resp.headers.get('location')
+        if not location:
+            raise AdobeError(f'{operation} returned no job location')
+        future = Future()
+        with self._pending_lock:
+            self._pending[location] = (future, time.monotonic() + POLL_MIN, POLL_MIN)
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll_loop, name='adobe-poller', daemon=True)
+                self._poller.start()
+        self._wakeup.set()
+        return future
+
+    def _poll_loop(self):
+        while True:
+            now = time.monotonic()
+            with self._pending_lock:
+                if not self._pending:
+                    self._poller = None
+                    return
+                due = [(loc, entry) for loc, entry in self._pending.items() if entry[1] <= now]
+            for location, (future, _, delay) in due:
+                done = future.cancelled() or self._poll(location, future)
+                with self._pending_lock:
+                    if done:
+                        del self._pending[location]
+                    else:
+                        # Back off per job: quick conversions are picked up
+                        # early, slow ones do not flood Adobe with polls
+                        delay = min(delay * 2, POLL_MAX)
+                        self._pending[location] = (future, time.monotonic() + delay, delay)
+            self._wakeup.clear()
+            with self._pending_lock:
+                wait = min((entry[1] for entry in self._pending.values()), default=now) - time.monotonic()
+            self._wakeup.wait(max(0, wait))
+
+    def _poll(self, location, future):
+        try:
+            status = self._request('GET', location).json()
+            if status.get('status') == 'done':
+                asset = status.get('asset') or status.get('resource') or {}
+                future.set_result(asset.get('downloadUri'))
+            elif status.get('status') == 'failed':
+                error = status.get('error') or {}
+                future.set_exception(AdobeError(error.get('message') or 'Job failed'))
+            else:
+                return False
+        except InvalidStateError:  # cancelled by its caller meanwhile
+            pass
+        except Exception as e:
+            if not future.done():
+                future.set_exception(AdobeError(f'Polling failed: {e}'))
+        return True
+
+    def convert(self, input_path, output_path, operation, source, timeout=ADOBE_TIMEOUT, **params):
+        """Run ``operation`` on ``input_path`` (of type ``source``, a key of
+        ``MEDIA_TYPES``) and stream the result to ``output_path``."""
+        deadline = time.monotonic() + timeout
+        if not self._slots.acquire(timeout=ADOBE_QUEUE_WAIT):
+            raise AdobeBusy('Too many Adobe conversions in flight')
+        try:
+            future = self.submit(input_path, operation, MEDIA_TYPES[source], **params)
+            try:
+                download_uri = future.result(timeout=max(0, deadline - time.monotonic()))
+            except TimeoutError:
+                future.cancel()
+                raise AdobeError(f'No result within {timeout:g}s')
+            if not download_uri:
+                raise AdobeError('Job finished without a result')
+            with self.session.get(download_uri, stream=True, timeout=HTTP_TIMEOUT) as resp:
+                if resp.status_code >= 400:
+                    raise AdobeError(f'Download failed: HTTP {resp.status_code}')
+                with open(output_path, 'wb') as out:
+                    for chunk in resp.iter_content(_CHUNK):
+                        out.write(chunk)
+            return output_path
+        finally:
+            self._slots.release()
+
+
+async def _file_chunks(path):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, _CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+class AsyncAdobeClient:
+    """:class:`AdobeClient` for the ASGI server (``asgi.py``): the same
+    calls awaited on a shared ``httpx.AsyncClient``. Each conversion polls
+    its own job from a coroutine, so waiting for Adobe costs no thread."""
+
+    def __init__(self, client_id, client_secret, http, base=ADOBE_API_BASE,
+                 concurrency=ADOBE_CONCURRENCY):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.base = base
+        self.http = http
+        self._slots = asyncio.Semaphore(concurrency)
+        self._token = None
+        self._token_expires = 0
+        self._token_lock = asyncio.Lock()
+
+    async def _access_token(self, refresh=False):
+        async with self._token_lock:
+            if refresh or not self._token or time.time() >= self._token_expires:
+                resp = await self.http.post(f'{self.base}/token', data={
+                    'client_id': self.client_id,
+                    'client_secret': self.client_secret,
+                })
+                if resp.status_code != 200:
+                    raise AdobeError(f'Authentication failed: HTTP {resp.status_code}')
+                body = resp.json()
+                self._token = body['access_token']
+                self._token_expires = time.time() + int(body.get('expires_in', 3600)) - TOKEN_MARGIN
+            return self._token
+
+    async def _request(self, method, url, **kwargs):
+        for attempt in range(2):
+            headers = {
+                'Authorization': f'Bearer {await self._access_token(refresh=attempt > 0)}',
+                'X-API-Key': self.client_id,
+            }
+            resp = await self.http.request(method, url, headers=headers, **kwargs)
+            if resp.status_code != 401:
+                break
+        if resp.status_code >= 400:
+            raise AdobeError(f'{method} {url}: HTTP {resp.status_code} {resp.text[:200]}')
+        return resp
+
+    async def _upload(self, input_path, media_type):
+        asset = (await self._request('POST', f'{self.base}/assets', json={'mediaType': media_type})).json()
+        # Upload URLs take no chunked bodies, hence the explicit length
+        resp = await self.http.put(asset['uploadUri'], content=_file_chunks(input_path), headers={
+            'Content-Type': media_type,
+            'Content-Length': str(os.path.getsize(input_path)),
+        })
+        if resp.status_code >= 400:
+            raise AdobeError(f'Upload failed: HTTP {resp.status_code}')
+        return asset['assetID']
+
+    async def _run(self, input_path, operation, media_type, params):
+        asset_id = await self._upload(input_path, media_type)
+        resp = await self._request('POST', f'{self.base}/operation/{operation}',
+                                   json={'assetID': asset_id, **params})
+        location = resp.headers.get('location')
+        if not location:
+            raise AdobeError(f'{operation} returned no job location')
+        delay = POLL_MIN
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                status = (await self._request('GET', location)).json()
+            except Exception as e:
+                raise AdobeError(f'Polling failed: {e}')
+            if status.get('status') == 'done':
+                asset = status.get('asset') or status.get('resource') or {}
+                return asset.get('downloadUri')
+            if status.get('status') == 'failed':
+                error = status.get('error') or {}
+                raise AdobeError(error.get('message') or 'Job failed')
+            delay = min(delay * 2, POLL_MAX)
+
+    async def convert(self, input_path, output_path, operation, source, timeout=ADOBE_TIMEOUT, **params):
+        """Run ``operation`` on ``input_path`` (of type ``source``, a key of
+        ``MEDIA_TYPES``) and stream the result to ``output_path``."""
+        deadline = time.monotonic() + timeout
+        try:
+            await asyncio.wait_for(self._slots.acquire(), ADOBE_QUEUE_WAIT)
+        except asyncio.TimeoutError:
+            raise AdobeBusy('Too many Adobe conversions in flight')
+        try:
+            try:
+                download_uri = await asyncio.wait_for(
+                    self._run(input_path, operation, MEDIA_TYPES[source], params),
+                    max(0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                raise AdobeError(f'No result within {timeout:g}s')
+            if not download_uri:
+                raise AdobeError('Job finished without a result')
+            async with self.http.stream('GET', download_uri) as resp:
+                if resp.status_code >= 400:
+                    raise AdobeError(f'Download failed: HTTP {resp.status_code}')
+                with open(output_path, 'wb') as out:
+                    async for chunk in resp.aiter_bytes(_CHUNK):
+                        await asyncio.to_thread(out.write, chunk)
+            return output_path
+        finally:
+            self._slots.release()
+
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The shared client for the configured credentials, or None when
+    Adobe is not configured."""
+    global _client
+    client_id = os.getenv('ADOBE_CLIENT_ID')
+    client_secret = os.getenv('ADOBE_CLIENT_SECRET')
+    if not client_id or not client_secret:
+        return None
+    with _client_lock:
+        if _client is None or (_client.client_id, _client.client_secret) != (client_id, client_secret):
+            _client = AdobeClient(client_id, client_secret)
+        return _client
+
+
+def get_async_client(http):
+    """The shared :class:`AsyncAdobeClient` on ``http`` for the configured
+    credentials, or None when Adobe is not configured."""
+    global _async_client
+    client_id = os.getenv('ADOBE_CLIENT_ID')
+    client_secret = os.getenv('ADOBE_CLIENT_SECRET')
+    if not client_id or not client_secret:
+        return None
+    with _client_lock:
+        if (_async_client is None or _async_client.http is not http
+                or (_async_client.client_id, _async_client.client_secret) != (client_id, client_secret)):
+            _async_client = AsyncAdobeClient(client_id, client_secret, http)
+        return _async_client
@@ -0,0 +1,259 @@
+"""ASGI entry point: ``uvicorn asgi:app --host 0.0.0.0 --port 5001``.
+
+Serves the Flask app of ``app.py`` (same routes, same responses) from an
+event loop:
+
+- Request bodies are received asynchronously and spooled before a thread
+  is involved, so slow uploads hold no thread. Bodies over the tool's
+  ``maxInputBytes`` are refused with 413 as soon as that is known.
+- The Flask app runs on a pool of ``ASGI_THREADS`` threads and its
+  response is streamed back chunk by chunk. CPU-bound work still goes to
+  the process pool of ``executor``.
+- Calls to outside services that tools defer (see ``upstream.py``): Adobe
+  conversions and OCR are awaited on one pooled ``httpx.AsyncClient``,
+  after which the request is dispatched again with their outcome. A worker
+  can thus keep hundreds of conversions waiting on Adobe in flight.
+"""
+import asyncio
+import contextvars
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from werkzeug.wsgi import FileWrapper
+
+import adobe
+import breaker
+import tools
+import upstream
+from app import app as flask_app
+from ingest import INGEST_SPOOL_BYTES
+
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', '16'))
+ASGI_HTTP_CONNECTIONS = int(os.getenv('ASGI_HTTP_CONNECTIONS', '100'))
+ASGI_HTTP_TIMEOUT = float(os.getenv('ASGI_HTTP_TIMEOUT', '120'))
+
+_CHUNK = 1024 * 1024
+_END = object()
+
+_pool = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix='asgi')
+_http = None
+
+
+def _client():
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(
+            timeout=httpx.Timeout(ASGI_HTTP_TIMEOUT, connect=5),
+            limits=httpx.Limits(max_connections=ASGI_HTTP_CONNECTIONS,
+                                max_keepalive_connections=ASGI_HTTP_CONNECTIONS // 4))
+    return _http
+
+
+async def _run(context, fn, *args):
+    # Every step of one request runs in the same context, as Flask's
+    # context variables are set and reset in different steps
+    return await asyncio.get_running_loop().run_in_executor(_pool, context.run, fn, *args)
+
+
+def _body_limit(path):
+    parts = path.strip('/').split('/')
+    if len(parts) == 3 and parts[:2] in (['api', 'process'], ['api', 'jobs']):
+        tool = tools.get(parts[2])
+        if tool:
+            return tool.max_input_bytes
+    return flask_app.config['MAX_CONTENT_LENGTH']
+
+
+async def _json_error(send, status, message):
+    body = json.dumps({'error': message}).encode()
+    await send({'type': 'http.response.start', 'status': status, 'headers': [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+        (b'access-control-allow-origin', b'*'),
+    ]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _receive_body(scope, receive, send):
+    """Spool the request body, or answer 413 and return None."""
+    limit = _body_limit(scope['path'])
+    too_large = f'Input larger than {limit // (1024 * 1024)} MB'
+    headers = dict(scope['headers'])
+    if int(headers.get(b'content-length') or 0) > limit:
+        await _json_error(send, 413, too_large)
+        return None
+    body = tempfile.SpooledTemporaryFile(max_size=INGEST_SPOOL_BYTES, dir=flask_app.config['SCRATCH_FOLDER'])
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            body.close()
+            return None
+        size += len(message.get('body', b''))
+        if size > limit:
+            body.close()
+            await _json_error(send, 413, too_large)
+            return None
+        body.write(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    body.seek(0)
+    return body
+
+
+def _environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    body.seek(0, os.SEEK_END)
+    length = body.tell()
+    body.seek(0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': client[0],
+        'CONTENT_LENGTH': str(length),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        # send_file() reads files through this, in larger blocks than its default
+        'wsgi.file_wrapper': lambda f, size=None: FileWrapper(f, _CHUNK),
+        upstream.ASYNC: True,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name in ('CONTENT_LENGTH', 'TRANSFER_ENCODING'):
+            continue
+        key = name if name == 'CONTENT_TYPE' else f'HTTP_{name}'
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def _start(environ):
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+    body = flask_app(environ, start_response)
+    return started['status'], started['headers'], iter(body), body
+
+
+def _close(body):
+    if hasattr(body, 'close'):
+        body.close()
+
+
+async def _dispatch(context, environ, send):
+    """Run the Flask app on ``environ`` and send its response, unless the
+    request was deferred: then return the deferred call."""
+    status, headers, chunks, body = await _run(context, _start, environ)
+    deferred = environ.get(upstream.DEFERRED)
+    try:
+        if deferred:
+            return deferred
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        while True:
+            chunk = await _run(context, next, chunks, _END)
+            if chunk is _END:
+                break
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        await _run(context, _close, body)
+
+
+async def _adobe(context, call):
+    client = adobe.get_async_client(_client())
+    if client is None:
+        return adobe.AdobeError('Adobe is not configured')
+    circuit = breaker.get('adobe')
+    output = os.path.join(call['folder'], 'output')
+    started = time.monotonic()
+    try:
+        await client.convert(call['input'], output, call['operation'], call['source'], **call['params'])
+    except adobe.AdobeBusy as e:
+        circuit.release()
+        return e
+    except Exception as e:
+        circuit.record_failure(e, time.monotonic() - started)
+        return e
+    circuit.record_success(time.monotonic() - started)
+    return output
+
+
+async def _ocr(context, call):
+    from tools.convert import OCR_URL, ocr_payload
+    try:
+        payload = await _run(context, ocr_payload, call['input'])
+        return (await _client().post(OCR_URL, data=payload)).json()
+    except Exception as e:
+        return e
+
+
+UPSTREAM_CALLS = {'adobe': _adobe, 'ocr': _ocr}
+
+
+async def _http_request(scope, receive, send):
+    body = await _receive_body(scope, receive, send)
+    if body is None:
+        return
+    context = contextvars.copy_context()
+    deferred = None
+    # Shared by both passes, so metrics time the request from its first pass
+    # and include the wait as a stage
+    timing = {'started': time.perf_counter(), 'stages': []}
+    try:
+        environ = _environ(scope, body)
+        environ[upstream.TIMING] = timing
+        deferred = await _dispatch(context, environ, send)
+        if deferred:
+            started = time.perf_counter()
+            outcome = await UPSTREAM_CALLS[deferred['name']](context, deferred)
+            timing['stages'].append((deferred['name'], time.perf_counter() - started))
+            environ = _environ(scope, body)
+            environ[upstream.TIMING] = timing
+            environ[upstream.RESULT] = (deferred['name'], outcome)
+            await _dispatch(context, environ, send)
+    finally:
+        body.close()
+        if deferred:
+            shutil.rmtree(deferred['folder'], ignore_errors=True)
+
+
+async def _lifespan(receive, send):
+    global _http
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if _http is not None:
+                await _http.aclose()
+                _http = None
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'http':
+        await _http_request(scope, receive, send)
+    elif scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
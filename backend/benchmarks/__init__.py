@@ -0,0 +1 @@
+"""Benchmark suite for the tool endpoints. See ``python -m benchmarks.run --help``."""
@@ -0,0 +1,150 @@
+"""Local stand-in for the Adobe PDF Services REST endpoints.
+
+    python -m benchmarks.adobe_stub --port 8765 --latency 2
+    ADOBE_API_BASE=http://127.0.0.1:8765 ADOBE_CLIENT_ID=stub ADOBE_CLIENT_SECRET=stub python app.py
+
+Implements the token, asset upload, ``exportpdf``/``createpdf`` job and
+download calls used by ``adobe.py``. Jobs report ``in progress`` until
+``--latency`` seconds have passed and then return the uploaded bytes
+unchanged, so the client's pooling, polling and fallbacks can be
+exercised and timed without credentials or quota.
+
+``POST /parse/image`` stands in for OCR.space (``OCR_URL``): it answers
+after ``--latency`` seconds with one page of fixed text.
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b'', headers=None, content_type='application/json'):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _authorized(self):
+        stub = self.server.stub
+        if self.headers.get('Authorization') not in stub.tokens:
+            self._send(401, {'error': {'code': 'Unauthorized', 'message': 'Invalid token'}})
+            return False
+        return True
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = self._body()
+        if self.path == '/parse/image':
+            stub.calls['ocr'] += 1
+            time.sleep(stub.latency)
+            return self._send(200, {'ParsedResults': [{'ParsedText': 'Stub OCR text'}],
+                                    'IsErroredOnProcessing': False})
+        if self.path == '/token':
+            token = f'stub-{next(stub.counter)}'
+            stub.tokens.add(f'Bearer {token}')
+            stub.calls['token'] += 1
+            return self._send(200, {'access_token': token, 'token_type': 'bearer',
+                                    'expires_in': stub.token_ttl})
+        if not self._authorized():
+            return
+        if self.path == '/assets':
+            asset_id = uuid.uuid4().hex
+            stub.calls['assets'] += 1
+            return self._send(200, {'uploadUri': f'{stub.base}/upload/{asset_id}', 'assetID': asset_id})
+        if self.path.startswith('/operation/'):
+            asset_id = json.loads(body)['assetID']
+            if asset_id not in stub.assets:
+                return self._send(404, {'error': {'code': 'NotFound', 'message': 'Unknown asset'}})
+            job_id = uuid.uuid4().hex
+            stub.jobs[job_id] = (asset_id, time.monotonic() + stub.latency)
+            stub.calls['jobs'] += 1
+            return self._send(201, headers={'location': f'{stub.base}{self.path}/{job_id}/status'})
+        self._send(404)
+
+    def do_PUT(self):
+        stub = self.server.stub
+        if self.path.startswith('/upload/'):
+            stub.assets[self.path.rsplit('/', 1)[1]] = self._body()
+            return self._send(200)
+        self._send(404)
+
+    def do_GET(self):
+        stub = self.server.stub
+        if self.path.startswith('/download/'):
+            data = stub.assets.get(self.path.rsplit('/', 1)[1])
+            if data is None:
+                return self._send(404)
+            return self._send(200, data, content_type='application/octet-stream')
+        if not self._authorized():
+            return
+        if self.path.startswith('/operation/') and self.path.endswith('/status'):
+            stub.calls['polls'] += 1
+            job = stub.jobs.get(self.path.split('/')[-2])
+            if job is None:
+                return self._send(404)
+            asset_id, ready_at = job
+            if time.monotonic() < ready_at:
+                return self._send(200, {'status': 'in progress'})
+            return self._send(200, {'status': 'done', 'asset': {
+                'assetID': asset_id, 'downloadUri': f'{stub.base}/download/{asset_id}'}})
+        self._send(404)
+
+
+class AdobeStub:
+    def __init__(self, host='127.0.0.1', port=0, latency=1.0, token_ttl=86400):
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self.tokens = set()
+        self.assets = {}
+        self.jobs = {}
+        self.calls = {'token': 0, 'assets': 0, 'jobs': 0, 'polls': 0, 'ocr': 0}
+        self.counter = itertools.count(1)
+        self.server = ThreadingHTTPServer((host, port), StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.base = f'http://{host}:{self.server.server_address[1]}'
+
+    def start(self):
+        """Serve on a daemon thread and return the base URL."""
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.base
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=1.0, help='seconds until a job is done')
+    parser.add_argument('--token-ttl', type=int, default=86400, help='token lifetime in seconds')
+    args = parser.parse_args(argv)
+    stub = AdobeStub(args.host, args.port, args.latency, args.token_ttl)
+    print(f'Adobe stub listening on {stub.base}')
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Deterministic synthetic inputs for the benchmark suite.
+
+Every generator takes a path and a size knob and produces the same
+content on every run (fixed seeds), so results can be compared across
+commits. Office files still carry the time they were written.
+"""
+import io
+import os
+
+import numpy as np
+
+SEED = 1234
+
+IMAGE_SIZES = {
+    'small': (640, 480),
+    'medium': (1920, 1080),
+    'large': (4000, 3000),
+}
+
+_WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor '
+          'incididunt ut labore et dolore magna aliqua invoice total quarterly report').split()
+
+
+def _sentences(rng, count, words=12):
+    return [' '.join(rng.choice(_WORDS, words)).capitalize() + '.' for _ in range(count)]
+
+
+def _photo(size, seed=SEED):
+    """RGB image with smooth gradients and noise, roughly photo-like to a JPEG encoder."""
+    from PIL import Image
+    width, height = size
+    rng = np.random.RandomState(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([
+        127 + 100 * np.sin(x / (37 + rng.randint(20))),
+        127 + 100 * np.cos(y / (53 + rng.randint(20))),
+        127 + 100 * np.sin((x + y) / (71 + rng.randint(20))),
+    ], axis=-1)
+    base += rng.normal(0, 12, base.shape)
+    return Image.fromarray(np.clip(base, 0, 255).astype(np.uint8), 'RGB')
+
+
+def make_image(path, fmt='jpg', size='medium'):
+    image = _photo(IMAGE_SIZES[size])
+    if fmt == 'jpg':
+        image.save(path, format='JPEG', quality=92)
+    elif fmt == 'png':
+        image.save(path, format='PNG')
+    else:
+        image.save(path, format='WEBP', quality=90)
+    return path
+
+
+def make_pdf(path, pages=10):
+    """Text-heavy PDF with a heading, paragraphs and a small table per page."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    rng = np.random.RandomState(SEED)
+    c = canvas.Canvas(path, pagesize=A4, invariant=1)
+    width, height = A4
+    for n in range(pages):
+        c.setFont('Helvetica-Bold', 18)
+        c.drawString(72, height - 72, f'Section {n + 1}')
+        c.setFont('Helvetica', 10)
+        y = height - 100
+        for line in _sentences(rng, 30):
+            c.drawString(72, y, line[:95])
+            y -= 14
+        for row in range(8):
+            for col in range(4):
+                c.rect(72 + col * 110, y - 20 - row * 18, 110, 18)
+                c.drawString(76 + col * 110, y - 15 - row * 18, f'{rng.randint(1000):>4}')
+        c.showPage()
+    c.save()
+    return path
+
+
+def make_scanned_pdf(path, pages=5, dpi=200):
+    """Image-only PDF, one full-page photo-like JPEG per page, like a scan."""
+    import fitz
+    doc = fitz.open()
+    size = (int(8.27 * dpi), int(11.69 * dpi))
+    for n in range(pages):
+        buffer = io.BytesIO()
+        _photo(size, SEED + n).save(buffer, format='JPEG', quality=85)
+        page = doc.new_page(width=595, height=842)
+        page.insert_image(page.rect, stream=buffer.getvalue())
+    doc.set_metadata({})
+    doc.save(path, garbage=1, deflate=True, no_new_id=True)
+    doc.close()
+    return path
+
+
+def make_docx(path, paragraphs=50):
+    from docx import Document
+    rng = np.random.RandomState(SEED)
+    document = Document()
+    document.add_heading('Benchmark document', 0)
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            document.add_heading(f'Part {i // 10 + 1}', level=1)
+        document.add_paragraph(' '.join(_sentences(rng, 4)))
+    table = document.add_table(rows=10, cols=4)
+    for row in table.rows:
+        for cell in row.cells:
+            cell.text = str(rng.randint(1000))
+    document.save(path)
+    return path
+
+
+def make_xlsx(path, rows=1000, cols=8):
+    from openpyxl import Workbook
+    rng = np.random.RandomState(SEED)
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append([f'Column {c + 1}' for c in range(cols)])
+    for _ in range(rows):
+        sheet.append([int(v) for v in rng.randint(0, 100000, cols)])
+    workbook.save(path)
+    return path
+
+
+def make_pptx(path, slides=10):
+    from pptx import Presentation
+    rng = np.random.RandomState(SEED)
+    presentation = Presentation()
+    for n in range(slides):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+        slide.shapes.title.text = f'Slide {n + 1}'
+        slide.placeholders[1].text = '\n'.join(_sentences(rng, 4, words=8))
+    presentation.save(path)
+    return path
+
+
+def build(folder):
+    """Generate the standard fixture set into ``folder`` and return
+    ``{name: path}``. Existing files are reused."""
+    os.makedirs(folder, exist_ok=True)
+    specs = {
+        'doc-10.pdf': lambda p: make_pdf(p, 10),
+        'doc-200.pdf': lambda p: make_pdf(p, 200),
+        'scan-5.pdf': lambda p: make_scanned_pdf(p, 5),
+        'photo-small.jpg': lambda p: make_image(p, 'jpg', 'small'),
+        'photo-large.jpg': lambda p: make_image(p, 'jpg', 'large'),
+        'photo-medium.png': lambda p: make_image(p, 'png', 'medium'),
+        'photo-medium.webp': lambda p: make_image(p, 'webp', 'medium'),
+        'doc.docx': make_docx,
+        'book.xlsx': make_xlsx,
+        'deck.pptx': make_pptx,
+    }
+    paths = {}
+    for name, make in specs.items():
+        path = os.path.join(folder, name)
+        if not os.path.exists(path):
+            make(path)
+        paths[name] = path
+    return paths
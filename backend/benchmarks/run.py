@@ -0,0 +1,258 @@
+"""Benchmark every tool endpoint through the Flask test client.
+
+    python -m benchmarks.run                       # all cases, JSON to stdout
+    python -m benchmarks.run -k pdf-to-jpg -n 10   # one tool, 10 timed runs
+    python -m benchmarks.run -o after.json --baseline before.json
+
+Run from ``backend/``. Each case is posted once to warm up and then
+``--repeat`` times with ``Cache-Control: no-cache`` so the result cache
+is bypassed. Adobe credentials are removed from the environment so the
+local fallbacks are measured and nothing is billed, unless
+``--adobe-stub SECONDS`` points the Adobe client and ``OCR_URL`` at a
+local stub whose jobs take that long. Tools without a local fallback
+(``pdf-ocr``) only run against the stub.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cases of these tools call an outside service and are skipped without --adobe-stub
+STUB_ONLY = {'pdf-ocr'}
+
+
+def _file(paths, name):
+    return lambda: (open(paths[name], 'rb'), name)
+
+
+def cases(paths):
+    """``[(tool, case, form_factory), ...]`` covering every tool. A tool
+    registered in ``tools`` needs at least one case here."""
+    f = lambda name: _file(paths, name)
+    return [
+        ('word-counter', 'text', lambda: {'text': 'lorem ipsum ' * 5000}),
+        ('json-formatter', 'text', lambda: {'text': json.dumps({'rows': list(range(5000))})}),
+        ('base64-encoder', 'text', lambda: {'text': 'x' * 100000}),
+        ('uuid-generator', 'default', lambda: {}),
+        ('password-generator', 'default', lambda: {'length': '32'}),
+        ('hash-generator', 'text', lambda: {'text': 'x' * 100000}),
+        ('case-converter', 'text', lambda: {'text': 'Lorem Ipsum ' * 5000, 'type': 'title'}),
+        ('pdf-merger', '3x10-pages', lambda: {'files': [f('doc-10.pdf')(), f('doc-10.pdf')(), f('doc-10.pdf')()]}),
+        ('pdf-merger', 'text+scan', lambda: {'files': [f('doc-200.pdf')(), f('scan-5.pdf')()]}),
+        ('image-compressor', 'small-jpg', lambda: {'file': f('photo-small.jpg')(), 'quality': '75'}),
+        ('image-compressor', 'large-jpg', lambda: {'file': f('photo-large.jpg')(), 'quality': '75'}),
+        ('image-compressor', 'png-to-webp', lambda: {'file': f('photo-medium.png')(), 'format': 'webp'}),
+        ('image-compressor', 'webp', lambda: {'file': f('photo-medium.webp')()}),
+        ('image-compressor', 'target-100k', lambda: {'file': f('photo-large.jpg')(), 'targetBytes': '100000'}),
+        ('image-compressor-batch', 'mixed-6', lambda: {'files': [f(name)() for name in (
+            'photo-small.jpg', 'photo-medium.png', 'photo-large.jpg', 'photo-medium.webp') + ('photo-small.jpg',) * 2]}),
+        ('pdf-splitter', 'count', lambda: {'file': f('doc-200.pdf')(), 'mode': 'count'}),
+        ('pdf-splitter', 'all-200', lambda: {'file': f('doc-200.pdf')(), 'mode': 'all'}),
+        ('pdf-splitter', 'range', lambda: {'file': f('doc-200.pdf')(), 'mode': 'range', 'start': '10', 'end': '60'}),
+        ('pdf-compress', 'text-200', lambda: {'file': f('doc-200.pdf')()}),
+        ('pdf-compress', 'scan-screen', lambda: {'file': f('scan-5.pdf')(), 'preset': 'screen'}),
+        ('pdf-compress', 'scan-print', lambda: {'file': f('scan-5.pdf')(), 'preset': 'print'}),
+        ('pdf-to-jpg', '10-pages', lambda: {'file': f('doc-10.pdf')()}),
+        ('pdf-to-jpg', '200-pages-72dpi', lambda: {'file': f('doc-200.pdf')(), 'dpi': '72'}),
+        ('jpg-to-pdf', 'mixed', lambda: {'files': [f('photo-small.jpg')(), f('photo-medium.png')(), f('photo-large.jpg')()]}),
+        ('pdf-rotate', '200-pages', lambda: {'file': f('doc-200.pdf')(), 'angle': '90'}),
+        ('pdf-watermark', '200-pages', lambda: {'file': f('doc-200.pdf')(), 'text': 'CONFIDENTIAL'}),
+        ('pdf-unlock', '200-pages', lambda: {'file': f('doc-200.pdf')()}),
+        ('pdf-protect', '200-pages', lambda: {'file': f('doc-200.pdf')(), 'password': 'secret'}),
+        ('pdf-organize', 'reverse-10', lambda: {'file': f('doc-10.pdf')(), 'order': '10,9,8,7,6,5,4,3,2,1'}),
+        ('pdf-page-numbers', '200-pages', lambda: {'file': f('doc-200.pdf')()}),
+        ('pdf-extract-pages', '200-pages', lambda: {'file': f('doc-200.pdf')(), 'pages': '1,50,100,150,200'}),
+        ('pdf-delete-pages', '200-pages', lambda: {'file': f('doc-200.pdf')(), 'pages': '1,50,100,150,200'}),
+        ('pdf-repair', '200-pages', lambda: {'file': f('doc-200.pdf')()}),
+        ('pdf-to-pdfa', '200-pages', lambda: {'file': f('doc-200.pdf')()}),
+        ('pdf-ocr', '5-page-scan', lambda: {'file': f('scan-5.pdf')()}),
+        ('html-to-pdf', 'simple', lambda: {'html': '<h1>Report</h1>' + '<p>Lorem ipsum dolor sit amet.</p>' * 200}),
+        ('pdf-sign', '200-pages', lambda: {'file': f('doc-200.pdf')()}),
+        ('pdf-validate', '200-pages', lambda: {'file': f('doc-200.pdf')()}),
+        ('pdf-to-word', '10-pages', lambda: {'file': f('doc-10.pdf')()}),
+        ('word-to-pdf', 'docx', lambda: {'file': f('doc.docx')()}),
+        ('pdf-to-excel', '10-pages', lambda: {'file': f('doc-10.pdf')()}),
+        ('excel-to-pdf', '1000-rows', lambda: {'file': f('book.xlsx')()}),
+        ('pdf-to-powerpoint', '10-pages', lambda: {'file': f('doc-10.pdf')()}),
+        ('powerpoint-to-pdf', '10-slides', lambda: {'file': f('deck.pptx')()}),
+    ]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = (len(ordered) - 1) * pct / 100
+    low = int(index)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+
+def _reset_peak_rss(pids):
+    # Linux only: writing 5 to clear_refs resets VmHWM (peak RSS)
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/clear_refs', 'w') as f:
+                f.write('5')
+        except OSError:
+            pass
+
+
+def _peak_rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid == os.getpid():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+
+def _worker_pids():
+    import executor
+    pool = executor._pool
+    processes = getattr(pool, '_processes', None) or {}
+    return list(processes)
+
+
+def _input_bytes(form):
+    total = 0
+    for value in form.values():
+        for item in value if isinstance(value, list) else [value]:
+            if isinstance(item, tuple):
+                item[0].seek(0, os.SEEK_END)
+                total += item[0].tell()
+                item[0].seek(0)
+            else:
+                total += len(str(item))
+    return total
+
+
+def run_case(client, tool, make_form, repeat):
+    headers = {'Cache-Control': 'no-cache'}
+    resp = client.post(f'/api/process/{tool}', data=make_form(), headers=headers)
+    resp.get_data()
+    if resp.status_code != 200:
+        return {'error': f'HTTP {resp.status_code}: {resp.get_data(as_text=True)[:200]}'}
+    pids = [os.getpid()] + _worker_pids()
+    _reset_peak_rss(pids)
+    timings = []
+    input_size = output_size = 0
+    for _ in range(repeat):
+        form = make_form()
+        input_size = _input_bytes(form)
+        started = time.perf_counter()
+        resp = client.post(f'/api/process/{tool}', data=form, headers=headers)
+        output_size = len(resp.get_data())
+        timings.append(time.perf_counter() - started)
+    total = sum(timings)
+    worker_rss = [rss for rss in map(_peak_rss_mb, pids[1:]) if rss is not None]
+    return {
+        'runs': repeat,
+        'p50_ms': round(percentile(timings, 50) * 1000, 2),
+        'p90_ms': round(percentile(timings, 90) * 1000, 2),
+        'p99_ms': round(percentile(timings, 99) * 1000, 2),
+        'mean_ms': round(total / repeat * 1000, 2),
+        'throughput_rps': round(repeat / total, 3),
+        'throughput_mbps': round(input_size * repeat / total / 1e6, 3),
+        'input_bytes': input_size,
+        'output_bytes': output_size,
+        'peak_rss_mb': round(_peak_rss_mb(os.getpid()), 1),
+        'worker_peak_rss_mb': round(max(worker_rss), 1) if worker_rss else None,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Print the p50 change of every case also present in ``baseline``."""
+    for key, result in results['results'].items():
+        before = baseline['results'].get(key)
+        if not before or 'p50_ms' not in before or 'p50_ms' not in result:
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+        print(f'{key:40} {before["p50_ms"]:10.1f} -> {result["p50_ms"]:10.1f} ms  {change:+6.1f}%',
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-k', '--tools', help='comma separated tool names to run')
+    parser.add_argument('-n', '--repeat', type=int, default=5, help='timed runs per case (default 5)')
+    parser.add_argument('-o', '--output', help='write JSON results to this file instead of stdout')
+    parser.add_argument('--baseline', help='earlier JSON results to compare p50 latencies against')
+    parser.add_argument('--fixtures', default=os.path.join(tempfile.gettempdir(), 'toolify-bench-fixtures'),
+                        help='folder for generated inputs, reused between runs')
+    parser.add_argument('--adobe-stub', type=float, metavar='SECONDS',
+                        help='serve Adobe conversions from a local stub with this job latency')
+    args = parser.parse_args(argv)
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    if args.adobe_stub is not None:
+        from benchmarks.adobe_stub import AdobeStub
+        os.environ['ADOBE_API_BASE'] = AdobeStub(latency=args.adobe_stub).start()
+        os.environ['ADOBE_CLIENT_ID'] = os.environ['ADOBE_CLIENT_SECRET'] = 'stub'
+        os.environ['OCR_URL'] = os.environ['ADOBE_API_BASE'] + '/parse/image'
+    else:
+        os.environ.pop('ADOBE_CLIENT_ID', None)
+        os.environ.pop('ADOBE_CLIENT_SECRET', None)
+    from benchmarks import fixtures
+    from app import app
+    import executor
+
+    paths = fixtures.build(args.fixtures)
+    executor.warm()
+    client = app.test_client()
+    selected = set(args.tools.split(',')) if args.tools else None
+
+    results = {}
+    for tool, case, make_form in cases(paths):
+        if selected and tool not in selected:
+            continue
+        if tool in STUB_ONLY and args.adobe_stub is None:
+            print(f'{tool + "/" + case:40} skipped (needs --adobe-stub)', file=sys.stderr)
+            continue
+        result = run_case(client, tool, make_form, args.repeat)
+        results[f'{tool}/{case}'] = result
+        summary = result.get('error') or f'p50 {result["p50_ms"]:.1f} ms, p90 {result["p90_ms"]:.1f} ms'
+        print(f'{tool + "/" + case:40} {summary}', file=sys.stderr)
+
+    report = {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'executor_backend': executor.EXECUTOR_BACKEND,
+        'cpu_workers': executor.CPU_WORKERS,
+        'repeat': args.repeat,
+        'adobe_stub_latency': args.adobe_stub,
+        'results': results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
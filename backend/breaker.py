@@ -0,0 +1,132 @@
+"""Health tracking and circuit breakers for conversion backends.
+
+Every backend (``adobe`` and the local converters) gets a
+:class:`CircuitBreaker` that records the outcome and latency of its
+calls. Callers ask :meth:`~CircuitBreaker.allow` before using a remote
+backend. The circuit opens after ``BREAKER_FAILURES`` consecutive
+failures, or when the p95 latency of the last ``BREAKER_WINDOW`` calls
+exceeds ``BREAKER_P95``. While open, requests go straight to the
+fallback. After ``BREAKER_RESET`` seconds a single probe is let through
+(half-open): success closes the circuit, failure opens it again.
+
+State is per process, so each gunicorn worker trips on its own.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+BREAKER_FAILURES = int(os.getenv('BREAKER_FAILURES', '5'))
+BREAKER_P95 = float(os.getenv('BREAKER_P95', '60'))
+BREAKER_WINDOW = int(os.getenv('BREAKER_WINDOW', '20'))
+BREAKER_RESET = float(os.getenv('BREAKER_RESET', '30'))
+
+# Calls needed in the window before the p95 can open the circuit
+MIN_SAMPLES = 5
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+def _p95(values):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class CircuitBreaker:
+    def __init__(self, name, failures=BREAKER_FAILURES, p95=BREAKER_P95, window=BREAKER_WINDOW,
+                 reset=BREAKER_RESET):
+        self.name = name
+        self.max_failures = failures
+        self.max_p95 = p95
+        self.reset = reset
+        self.state = CLOSED
+        self.failures = 0
+        self.latencies = deque(maxlen=window)
+        self.successes = 0
+        self.errors = 0
+        self.opened_at = None
+        self.last_error = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go to this backend now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release(self):
+        """Give back a probe that never reached the backend."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self, seconds):
+        with self._lock:
+            self.successes += 1
+            self.failures = 0
+            self.latencies.append(seconds)
+            self._probing = False
+            if self.state == HALF_OPEN:
+                # One healthy probe is not a p95; start the window afresh
+                self.latencies.clear()
+                self.latencies.append(seconds)
+                self.state = CLOSED
+            elif len(self.latencies) >= MIN_SAMPLES and _p95(self.latencies) > self.max_p95:
+                self._open(f'p95 latency above {self.max_p95:g}s')
+
+    def record_failure(self, error, seconds=None):
+        with self._lock:
+            self.errors += 1
+            self.failures += 1
+            self.last_error = str(error)[:200]
+            if seconds is not None:
+                self.latencies.append(seconds)
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.max_failures:
+                self._open(self.last_error)
+
+    def _open(self, reason):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        print(f'Circuit for {self.name} opened: {reason}')
+
+    def to_dict(self):
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(0, self.reset - (time.monotonic() - self.opened_at)), 1)
+            return {
+                'state': self.state,
+                'consecutiveFailures': self.failures,
+                'successes': self.successes,
+                'errors': self.errors,
+                'p95Seconds': round(_p95(self.latencies), 3) if self.latencies else None,
+                'calls': len(self.latencies),
+                'lastError': self.last_error,
+                'retryInSeconds': retry_in,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get(name):
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def states():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.to_dict() for b in breakers}
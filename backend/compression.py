@@ -0,0 +1,157 @@
+"""PDF compression engine for the ``pdf-compress`` tool.
+
+Embedded images drawn at more than the preset's resolution are
+downsampled and re-encoded as JPEG in parallel on the CPU executor; an
+image is only replaced when the new stream is smaller. The document is
+then saved with identical objects and streams merged, unused objects
+dropped and content streams cleaned and deflated.
+"""
+import inspect
+import io
+import math
+
+import fitz
+
+import executor
+from jobs import report_progress
+from metrics import stage
+
+PRESETS = {
+    'screen': {'dpi': 72, 'quality': 50},
+    'ebook': {'dpi': 150, 'quality': 70},
+    'print': {'dpi': 300, 'quality': 85},
+}
+
+MAX_CHUNK_IMAGES = 16
+
+# Filters for bilevel scans that are already smaller than any JPEG would be
+_SKIP_FILTERS = ('/JBIG2Decode', '/CCITTFaxDecode')
+
+_SAVE_OPTIONS = {'garbage': 4, 'deflate': True, 'clean': True}
+if 'use_objstms' in inspect.signature(fitz.Document.save).parameters:
+    # Object streams need PyMuPDF 1.24+
+    _SAVE_OPTIONS['use_objstms'] = True
+
+
+def find_images(input_path, dpi):
+    """Return ``[(xref, (width, height)), ...]`` for images worth
+    re-encoding, with the pixel size that gives ``dpi`` at the largest size
+    the image is drawn at (never more than its current size)."""
+    doc = fitz.open(input_path)
+    try:
+        drawn = {}
+        for page in doc:
+            # get_image_info(xrefs=True) and get_image_rects() hash every
+            # decoded image, which costs more than the re-encode itself, so
+            # drawn images are matched to xrefs by their pixel size instead.
+            # Same-sized images on a page all get the largest drawn size.
+            by_size = {}
+            for item in page.get_images(full=True):
+                by_size.setdefault((item[2], item[3]), []).append(item[0])
+            for info in page.get_image_info():
+                a, b, c, d = info['transform'][:4]
+                for xref in by_size.get((info['width'], info['height']), ()):
+                    w, h = drawn.get(xref, (0, 0))
+                    drawn[xref] = (max(w, math.hypot(a, b)), max(h, math.hypot(c, d)))
+        images = []
+        for xref, (w, h) in drawn.items():
+            if doc.xref_get_key(xref, 'ImageMask')[1] == 'true':
+                continue
+            if doc.xref_get_key(xref, 'BitsPerComponent')[1] == '1':
+                continue
+            if any(f in doc.xref_get_key(xref, 'Filter')[1] for f in _SKIP_FILTERS):
+                continue
+            try:
+                width = int(doc.xref_get_key(xref, 'Width')[1])
+                height = int(doc.xref_get_key(xref, 'Height')[1])
+            except ValueError:  # indirect or malformed size
+                continue
+            scale = min(1, max(w / 72 * dpi / width, h / 72 * dpi / height))
+            images.append((xref, (max(1, round(width * scale)), max(1, round(height * scale)))))
+        return images
+    finally:
+        doc.close()
+
+
+def _load_image(doc, xref, size):
+    """Decode image ``xref`` into an RGB or L Pillow image, no smaller than ``size``."""
+    from PIL import Image
+    colorspace = doc.xref_get_key(xref, 'ColorSpace')[1]
+    if (doc.xref_get_key(xref, 'Filter')[1] == '/DCTDecode' and colorspace in ('/DeviceRGB', '/DeviceGray')
+            and doc.xref_get_key(xref, 'Decode')[0] == 'null'):
+        # Plain JPEGs: let libjpeg scale while decoding (1/2, 1/4, 1/8)
+        img = Image.open(io.BytesIO(doc.xref_stream_raw(xref)))
+        img.draft(img.mode, size)
+        return img.convert('L' if colorspace == '/DeviceGray' else 'RGB')
+    try:
+        pix = fitz.Pixmap(doc, xref)
+    except RuntimeError:
+        return None
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    mode = 'L' if pix.n == 1 else 'RGB'
+    return Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, 'raw', mode, pix.stride, 1)
+
+
+def recompress_images(input_path, images, quality):
+    """Re-encode ``images`` from :func:`find_images` and return
+    ``[(xref, jpeg_bytes, width, height, grayscale), ...]`` for the ones
+    that got smaller."""
+    from PIL import Image
+    doc = fitz.open(input_path)
+    try:
+        results = []
+        for xref, size in images:
+            img = _load_image(doc, xref, size)
+            if img is None:
+                continue
+            if img.size != size:
+                img = img.resize(size, Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            img.save(buffer, format='JPEG', quality=quality, optimize=True)
+            data = buffer.getvalue()
+            if len(data) < len(doc.xref_stream_raw(xref)):
+                results.append((xref, data, img.width, img.height, img.mode == 'L'))
+        return results
+    finally:
+        doc.close()
+
+
+def save_compressed(input_path, output_path, replacements):
+    doc = fitz.open(input_path)
+    try:
+        for xref, data, width, height, grayscale in replacements:
+            # update_stream() drops /Filter and /DecodeParms
+            doc.update_stream(xref, data, compress=False)
+            doc.xref_set_key(xref, 'Filter', '/DCTDecode')
+            doc.xref_set_key(xref, 'Width', str(width))
+            doc.xref_set_key(xref, 'Height', str(height))
+            doc.xref_set_key(xref, 'BitsPerComponent', '8')
+            doc.xref_set_key(xref, 'ColorSpace', '/DeviceGray' if grayscale else '/DeviceRGB')
+            doc.xref_set_key(xref, 'Decode', 'null')
+        doc.save(output_path, **_SAVE_OPTIONS)
+    finally:
+        doc.close()
+
+
+def compress_pdf(tool, input_path, output_path, preset='ebook'):
+    """Compress ``input_path`` into ``output_path`` and return the number
+    of images that were re-encoded."""
+    settings = PRESETS[preset]
+    with stage('parse'):
+        images = executor.run(tool, find_images, input_path, settings['dpi'])
+    per_chunk = max(1, min(MAX_CHUNK_IMAGES, math.ceil(len(images) / (executor.CPU_WORKERS * 2))))
+    chunks = [(input_path, images[i:i + per_chunk], settings['quality'])
+              for i in range(0, len(images), per_chunk)]
+    replacements = []
+    done = 0
+    with stage('encode'):
+        for results in executor.map_unordered(tool, recompress_images, chunks):
+            replacements.extend(results)
+            done += 1
+            report_progress(done, len(chunks) + 1)
+    with stage('write'):
+        executor.run(tool, save_compressed, input_path, output_path, replacements)
+    return len(replacements)
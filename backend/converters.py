@@ -0,0 +1,333 @@
+"""Local (non-Adobe) document converters that run in the CPU executor."""
+import copy
+import io
+import re
+
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+# Fewer pages per pdf2docx call do not pay for the extra parse and merge
+MIN_CHUNK_PAGES = 10
+MAX_TABLE_CHUNK_PAGES = 25
+
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+
+def pdf_to_docx(input_path, output_path, start=0, end=None):
+    """Convert pages ``start`` to ``end`` (0-based, exclusive, default all)."""
+    from pdf2docx import Converter
+    cv = Converter(input_path)
+    try:
+        cv.convert(output_path, start=start, end=end, layout_mode='layout',
+                   table_settings={'min_rows_count': 2, 'min_cols_count': 2, 'explicit_borders': True, 'implicit_borders': True},
+                   image_settings={'min_width': 10, 'min_height': 10, 'extract_stream': True})
+    finally:
+        cv.close()
+
+
+def select_pages(input_path, output_path, pages):
+    """Write the 0-based ``pages`` of ``input_path``, in that order, to ``output_path``."""
+    import fitz
+    with fitz.open(input_path) as doc:
+        doc.select(pages)
+        doc.save(output_path, garbage=3, deflate=True)
+
+
+def _copy_relationships(element, source, target):
+    # Point r:id/r:embed/r:link attributes at copies of the source's
+    # images and links in the target document
+    for node in element.iter():
+        for name, rid in node.attrib.items():
+            if not name.startswith(_REL_NS) or rid not in source.part.rels:
+                continue
+            rel = source.part.rels[rid]
+            if rel.is_external:
+                node.set(name, target.part.relate_to(rel.target_ref, rel.reltype, is_external=True))
+            elif rel.reltype.endswith('/image'):
+                node.set(name, target.part.get_or_add_image(io.BytesIO(rel.target_part.blob))[0])
+
+
+def merge_docx(paths, output_path):
+    """Concatenate the DOCX files in ``paths`` (pdf2docx outputs of
+    consecutive page ranges) into ``output_path``, keeping the page setup
+    of every section and their images."""
+    from docx import Document
+    from docx.oxml import OxmlElement
+    merged = Document(paths[0])
+    body = merged.element.body
+    for path in paths[1:]:
+        source = Document(path)
+        # The body's sectPr describes the last section; pin it to a
+        # paragraph so it keeps applying to the pages before the join
+        last_section = body.sectPr
+        paragraph = OxmlElement('w:p')
+        properties = OxmlElement('w:pPr')
+        properties.append(copy.deepcopy(last_section))
+        paragraph.append(properties)
+        last_section.addprevious(paragraph)
+        for element in source.element.body:
+            if element.tag == last_section.tag:
+                last_section.getparent().replace(last_section, copy.deepcopy(element))
+                continue
+            element = copy.deepcopy(element)
+            _copy_relationships(element, source, merged)
+            body.sectPr.addprevious(element)
+    merged.save(output_path)
+
+
+_NUMBER = re.compile(r'^\(?[-+]?(\d{1,3}(,\d{3})+|\d+)?(\.\d+)?\)?%?$')
+
+
+def _cell(text):
+    """Cell value for extracted ``text``: numbers such as ``1,234.50``,
+    ``(12)`` or ``7%`` become numbers, everything else stays text. So do
+    codes with a leading zero (``007``) and numbers with more digits than
+    a spreadsheet keeps (15), which would otherwise change."""
+    if text is None:
+        return None
+    text = ILLEGAL_CHARACTERS_RE.sub('', text.strip())
+    if not text or not _NUMBER.match(text) or not any(c.isdigit() for c in text):
+        return text or None
+    number = text.strip('()%+-').replace(',', '')
+    digits = number.replace('.', '').lstrip('0')
+    if re.match(r'0\d', number) or len(digits) > 15:
+        return text
+    negative = text.startswith('(') and text.endswith(')') or text.startswith('-')
+    if '.' not in number and '%' not in text:
+        value = int(number)
+    else:
+        value = float(number)
+        if text.endswith('%'):
+            value /= 100
+    return -value if negative else value
+
+
+def _word_rows(words):
+    """``[(top, cells), ...]`` from ``page.get_text('words')`` tuples.
+    Words whose vertical centres line up form a row, across text blocks,
+    so columns PyMuPDF sees as separate blocks still share rows. A row is
+    split into cells wherever the gap between two words is wider than
+    the words are tall."""
+    rows = []
+    for word in sorted(words, key=lambda w: (w[1] + w[3]) / 2):
+        middle = (word[1] + word[3]) / 2
+        if rows and middle - rows[-1][0] <= (word[3] - word[1]) / 2:
+            rows[-1][1].append(word)
+        else:
+            rows.append((middle, [word]))
+    result = []
+    for _, row in rows:
+        row.sort()
+        cells = [[row[0][4]]]
+        for prev, word in zip(row, row[1:]):
+            if word[0] - prev[2] > word[3] - word[1]:
+                cells.append([word[4]])
+            else:
+                cells[-1].append(word[4])
+        result.append((min(w[1] for w in row), [_cell(' '.join(c)) for c in cells]))
+    return result
+
+
+def _find_tables(page):
+    # find_tables() only detects ruled tables, and its text extraction
+    # over the whole page costs far more than the detection, so look only
+    # where something is drawn. Rules are zero-width rects, which a Rect
+    # union drops as empty, so take the bounds by hand
+    import fitz
+    rects = [path['rect'] for path in page.get_drawings()]
+    if not rects:
+        return []
+    clip = fitz.Rect(min(r.x0 for r in rects), min(r.y0 for r in rects),
+                     max(r.x1 for r in rects), max(r.y1 for r in rects))
+    return page.find_tables(clip=clip + (-5, -5, 5, 5)).tables
+
+
+def _inside(word, box):
+    x = (word[0] + word[2]) / 2
+    y = (word[1] + word[3]) / 2
+    return box[0] <= x <= box[2] and box[1] <= y <= box[3]
+
+
+def _table_rows(table, words):
+    # Fill the detected cells from the page's words; Table.extract() runs a
+    # text extraction per cell, which dominates on large tables
+    rows = []
+    for row in table.rows:
+        cells = [[] for _ in row.cells]
+        box = tuple(row.bbox)
+        for word in words:
+            if _inside(word, box):
+                for cell, cell_box in zip(cells, row.cells):
+                    if cell_box and _inside(word, cell_box):
+                        cell.append(word[4])
+                        break
+        rows.append([_cell(' '.join(cell)) if cell else None for cell in cells])
+    return rows
+
+
+def extract_tables(input_path, start, end):
+    """Return ``[(page_index, [(kind, rows), ...]), ...]`` for pages
+    ``start`` to ``end`` (exclusive). ``kind`` is ``'table'`` for tables
+    found by PyMuPDF and ``'text'`` for the lines around them, in
+    reading order."""
+    import fitz
+    results = []
+    with fitz.open(input_path) as doc:
+        for index in range(start, end):
+            page = doc[index]
+            words = page.get_text('words', sort=True)
+            items = []
+            boxes = []
+            for table in _find_tables(page):
+                box = tuple(table.bbox)  # a property recomputed on each access
+                rows = _table_rows(table, [w for w in words if _inside(w, box)])
+                if any(any(c is not None for c in row) for row in rows):
+                    items.append((box[1], 'table', rows))
+                    boxes.append(box)
+            if boxes:
+                words = [w for w in words if not any(_inside(w, box) for box in boxes)]
+            # Lines not separated by a table form one text item
+            last_y = None
+            for y, row in _word_rows(words):
+                if last_y is not None and not any(last_y < box[1] < y for box in boxes):
+                    items[-1][2].append(row)
+                else:
+                    items.append((y, 'text', [row]))
+                last_y = y
+            items.sort(key=lambda item: item[0])
+            results.append((index, [(kind, rows) for _, kind, rows in items]))
+    return results
+
+
+def write_workbook(pages, output_path, sheets='page'):
+    """Write ``pages`` from :func:`extract_tables` to an XLSX file: one
+    sheet per page, or with ``sheets='table'`` one sheet per table (pages
+    without tables get a sheet of their text)."""
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    for index, items in pages:
+        tables = [rows for kind, rows in items if kind == 'table']
+        if sheets == 'table' and tables:
+            for n, rows in enumerate(tables, 1):
+                sheet = workbook.create_sheet(f'Page {index + 1} Table {n}')
+                for row in rows:
+                    sheet.append(row)
+            continue
+        sheet = workbook.create_sheet(f'Page {index + 1}')
+        for n, (kind, rows) in enumerate(items):
+            if n:
+                sheet.append([])
+            for row in rows:
+                sheet.append(row)
+    if not workbook.worksheets:
+        workbook.create_sheet('Page 1')
+    workbook.save(output_path)
+
+
+# Longest cell text, in characters, a column is sized for
+MAX_CELL_CHARS = 40
+# Rows sampled per sheet to size the columns
+WIDTH_SAMPLE_ROWS = 500
+FONT_SIZE = 8
+MIN_FONT_SIZE = 5
+# Average Helvetica glyph width as a fraction of the font size
+_CHAR_WIDTH = 0.55
+_PDF_ESCAPE = re.compile(rb'[\\()\r\x80-\xff]')
+_MARGIN = 36
+
+
+def _sheet_text(rows, columns):
+    """``rows`` as a ``len(rows)`` x ``columns`` array of single-line strings."""
+    import numpy as np
+    if any(len(row) != columns for row in rows):
+        rows = [tuple(row[:columns]) + (None,) * (columns - len(row)) for row in rows]
+    values = np.array(rows, dtype=object)
+    values[np.equal(values, None)] = ''
+    return np.char.replace(values.astype(str), '\n', ' ')
+
+
+def _layout(chars):
+    """Page size, font size and column widths (points) for columns of
+    ``chars`` characters: portrait when they fit, else landscape, shrinking
+    the font and then the columns until the table fits the page width."""
+    from reportlab.lib.pagesizes import landscape, letter
+    wanted = (chars + 2) * _CHAR_WIDTH
+    for pagesize in (letter, landscape(letter)):
+        available = pagesize[0] - 2 * _MARGIN
+        if wanted.sum() * FONT_SIZE <= available:
+            return pagesize, FONT_SIZE, wanted * FONT_SIZE
+    size = max(MIN_FONT_SIZE, available / wanted.sum())
+    widths = wanted * size
+    return pagesize, size, widths * min(1, available / widths.sum())
+
+
+def _column_code(c, x, y, size, lines):
+    """PDF text operators drawing ``lines`` (an array of strings) one
+    below the other from ``(x, y)``. Built with one join per column;
+    drawing line by line through reportlab costs more than reading."""
+    text = c.beginText(x, y)
+    text.setFont('Helvetica', size, size * 1.25)
+    data = '\n'.join(lines.tolist()).encode('cp1252', 'replace')
+    data = _PDF_ESCAPE.sub(lambda m: b'\\%03o' % m.group()[0], data)
+    body = b') Tj T* ('.join(data.split(b'\n')).decode('ascii')
+    return f'{text.getCode()[:-2]}({body}) Tj ET'
+
+
+def _draw_page(c, pagesize, size, widths, limits, header, body, title):
+    top = pagesize[1] - _MARGIN
+    c.setPageSize(pagesize)
+    c.setFont('Helvetica', size)
+    c.drawString(_MARGIN, _MARGIN / 2, title)
+    if header is not None:
+        c.line(_MARGIN, top - size * 0.4, _MARGIN + widths.sum(), top - size * 0.4)
+        c.setFont('Helvetica-Bold', size)
+    x = _MARGIN
+    for column, (column_width, limit) in enumerate(zip(widths, limits)):
+        y = top
+        if header is not None:
+            c.drawString(x, y, str(header[column])[:limit])
+            y -= size * 1.25
+        c.addLiteral(_column_code(c, x, y, size, body[:, column].astype(f'<U{limit}')))
+        x += column_width
+    c.showPage()
+
+
+def render_workbook(input_path, output_path):
+    """Render every sheet of the XLSX ``input_path`` to a PDF table, page
+    by page, with the sheet's first row repeated as the header of each
+    page. Sheets are streamed with openpyxl's read-only mode, so memory
+    stays bounded by one page of rows."""
+    import itertools
+    import numpy as np
+    from openpyxl import load_workbook
+    from reportlab.pdfgen import canvas
+    workbook = load_workbook(input_path, read_only=True, data_only=True)
+    c = canvas.Canvas(output_path, pageCompression=1)
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(max_col=sheet.max_column, values_only=True)
+            sample = list(itertools.islice(rows, WIDTH_SAMPLE_ROWS))
+            # Files without a dimension record give rows of any length;
+            # size the table from the sample rather than read it twice
+            columns = sheet.max_column or max(map(len, sample), default=0)
+            if not sample or not columns:
+                continue
+            text = _sheet_text(sample, columns)
+            chars = np.minimum(np.char.str_len(text).max(axis=0), MAX_CELL_CHARS)
+            pagesize, size, widths = _layout(np.maximum(chars, 1))
+            limits = np.maximum(1, (widths / (size * _CHAR_WIDTH)).astype(int) - 1)
+            header, text = (text[0], text[1:]) if len(text) > 1 else (None, text)
+            per_page = int((pagesize[1] - 2 * _MARGIN) / (size * 1.25)) - 1
+            page = 0
+            while len(text):
+                while len(text) < per_page:
+                    more = list(itertools.islice(rows, per_page * 4))
+                    if not more:
+                        break
+                    text = np.concatenate([text, _sheet_text(more, columns)])
+                page += 1
+                _draw_page(c, pagesize, size, widths, limits, header, text[:per_page],
+                           f'{sheet.title} - page {page}')
+                text = text[per_page:]
+    finally:
+        workbook.close()
+    c.save()
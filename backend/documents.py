@@ -0,0 +1,206 @@
+"""Upload-once document store.
+
+Clients upload a file once (``POST /api/documents``, the ``X-Temp-Upload``
+flow or a resumable upload, see :mod:`uploads`) and pass the returned
+``fileId`` to any tool instead of re-uploading it. Parsed ``PdfReader``
+and ``fitz`` handles for stored documents are kept in an LRU cache so
+multi-step workflows also skip re-parsing.
+
+Cached handles are shared, so callers must treat them as read-only and
+use them only inside the ``with`` block, which holds the handle's lock
+(neither pypdf nor PyMuPDF objects are safe to use from two threads).
+"""
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from ingest import save_upload
+
+DOCUMENT_CACHE_ITEMS = int(os.getenv('DOCUMENT_CACHE_ITEMS', '32'))
+DOCUMENT_CACHE_BYTES = int(os.getenv('DOCUMENT_CACHE_BYTES', str(256 * 1024 * 1024)))
+DOCUMENT_CACHE_TTL = int(os.getenv('DOCUMENT_CACHE_TTL', '600'))
+# Stored documents unused for this long are swept away (see storage.py)
+DOCUMENT_TTL = int(os.getenv('DOCUMENT_TTL', str(24 * 3600)))
+
+_FILE_ID = re.compile(r'[0-9a-f]{32}(\.[A-Za-z0-9]{1,10})?')
+
+
+class DocumentNotFound(Exception):
+    def __init__(self, file_id):
+        super().__init__(f'File not found: {file_id}')
+        self.file_id = file_id
+
+
+class _Entry:
+    def __init__(self, size):
+        self.size = size
+        self.handle = None
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+
+
+class HandleCache:
+    """LRU cache of parsed document handles bounded by count, size and idle time.
+
+    ``size`` is the size of the source file, used as a proxy for the memory
+    held by the parsed handle.
+    """
+
+    def __init__(self, max_items=DOCUMENT_CACHE_ITEMS, max_bytes=DOCUMENT_CACHE_BYTES, ttl=DOCUMENT_CACHE_TTL):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def use(self, key, size, opener):
+        with self._lock:
+            self._evict_idle()
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(size)
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._entries.move_to_end(key)
+            entry.last_used = time.time()
+            self._evict_over_budget()
+        with entry.lock:
+            if entry.handle is None:
+                entry.handle = opener()
+            yield entry.handle
+
+    def discard(self, file_id):
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == file_id]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'items': len(self._entries),
+                'bytes': sum(e.size for e in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _evict_idle(self):
+        cutoff = time.time() - self.ttl
+        for key in [k for k, e in self._entries.items() if e.last_used < cutoff]:
+            del self._entries[key]
+
+    def _evict_over_budget(self):
+        # Evicted handles still in use stay alive until their holder is done
+        total = sum(e.size for e in self._entries.values())
+        while self._entries and (len(self._entries) > self.max_items or total > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            total -= entry.size
+
+
+class DocumentStore:
+    def __init__(self, folder):
+        self.folder = os.path.abspath(folder)
+        self.handles = HandleCache()
+        os.makedirs(self.folder, exist_ok=True)
+
+    def _new_id(self, filename):
+        ext = os.path.splitext(filename or '')[1].lower()
+        if not re.fullmatch(r'\.[a-z0-9]{1,10}', ext):
+            ext = ''
+        return f'{uuid.uuid4().hex}{ext}'
+
+    def _marker(self, file_id):
+        # Not a valid fileId, and swept with its document (same name up to the dot)
+        return os.path.join(self.folder, file_id.split('.')[0] + '.temporary-upload')
+
+    def save(self, file, temporary=False):
+        """Store an uploaded ``FileStorage`` and return its ``fileId``.
+        ``temporary`` uploads are only meant for the request that
+        consumes them (see :meth:`delete_temporary`)."""
+        file_id = self._new_id(file.filename)
+        save_upload(file, os.path.join(self.folder, file_id))
+        if temporary:
+            open(self._marker(file_id), 'w').close()
+        return file_id
+
+    def adopt(self, path, filename):
+        """Move the file at ``path`` (on the same filesystem) into the store
+        and return its ``fileId``."""
+        file_id = self._new_id(filename)
+        os.replace(path, os.path.join(self.folder, file_id))
+        return file_id
+
+    def path(self, file_id):
+        """Path of a stored document. Raises ``DocumentNotFound``."""
+        if not file_id or not _FILE_ID.fullmatch(file_id):
+            raise DocumentNotFound(file_id)
+        path = os.path.join(self.folder, file_id)
+        try:
+            # The mtime records the last use for the storage sweeper
+            os.utime(path)
+        except FileNotFoundError:
+            raise DocumentNotFound(file_id)
+        return path
+
+    def delete(self, file_id):
+        path = self.path(file_id)
+        self.handles.discard(file_id)
+        os.remove(path)
+        try:
+            os.remove(self._marker(file_id))
+        except FileNotFoundError:
+            pass
+
+    def is_temporary(self, file_id):
+        return bool(file_id and _FILE_ID.fullmatch(file_id)) and os.path.exists(self._marker(file_id))
+
+    def delete_temporary(self, file_ids):
+        """Delete those of ``file_ids`` saved as temporary; documents
+        stored on purpose are kept."""
+        for file_id in dict.fromkeys(file_ids):
+            if self.is_temporary(file_id):
+                try:
+                    self.delete(file_id)
+                except DocumentNotFound:
+                    pass
+
+    def info(self, file_id):
+        path = self.path(file_id)
+        info = {'fileId': file_id, 'size': os.path.getsize(path)}
+        if file_id.endswith('.pdf'):
+            pages = self.page_count(file_id)
+            if pages is not None:
+                info['pages'] = pages
+        return info
+
+    def page_count(self, file_id):
+        """Pages of a stored PDF from its cached handle, or None if it
+        cannot be read (encrypted or broken)."""
+        try:
+            with self.fitz_doc(file_id) as doc:
+                return None if doc.needs_pass else len(doc)
+        except DocumentNotFound:
+            raise
+        except Exception:
+            return None
+
+    @contextmanager
+    def pdf_reader(self, file_id):
+        from pypdf import PdfReader
+        path = self.path(file_id)
+        with self.handles.use(('pypdf', file_id), os.path.getsize(path), lambda: PdfReader(path)) as reader:
+            yield reader
+
+    @contextmanager
+    def fitz_doc(self, file_id):
+        import fitz
+        path = self.path(file_id)
+        with self.handles.use(('fitz', file_id), os.path.getsize(path), lambda: fitz.open(path)) as doc:
+            yield doc
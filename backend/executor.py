@@ -0,0 +1,215 @@
+"""Execution engine for CPU-bound tool bodies.
+
+Tool bodies that hold the GIL (PyMuPDF rendering, Pillow encoding,
+pdf2docx, ...) are submitted here instead of running on the request
+thread. With the default ``process`` backend they run in a
+``ProcessPoolExecutor``, warmed on each process's first request, so
+throughput scales with cores rather than with the number of gunicorn
+workers. A pool whose worker dies is replaced; only the calls it was
+running fail, with :class:`WorkerCrashed`.
+
+Configuration (environment):
+
+- ``EXECUTOR_BACKEND`` -- ``process`` (default), ``thread`` or ``inline``.
+- ``CPU_WORKERS`` -- pool size, defaults to the number of CPUs.
+- ``CPU_TOOL_LIMITS`` -- per-tool concurrency, e.g. ``pdf-to-word=1,pdf-to-jpg=2``.
+- ``CPU_JOB_TIMEOUT`` -- CPU seconds a single call may use (default 300).
+
+Functions passed to :func:`run` and :func:`map_unordered` must be
+importable module-level functions with picklable arguments.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+try:
+    import resource
+    import signal
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+def _parse_limits(spec):
+    limits = {}
+    for item in spec.split(','):
+        if '=' in item:
+            tool, value = item.split('=', 1)
+            limits[tool.strip()] = int(value)
+    return limits
+
+
+EXECUTOR_BACKEND = os.getenv('EXECUTOR_BACKEND', 'process')
+CPU_WORKERS = int(os.getenv('CPU_WORKERS', str(os.cpu_count() or 2)))
+CPU_TOOL_LIMITS = _parse_limits(os.getenv('CPU_TOOL_LIMITS', ''))
+CPU_JOB_TIMEOUT = float(os.getenv('CPU_JOB_TIMEOUT', '300'))
+
+# Modules imported once in the fork server so new workers start warm
+PRELOAD_MODULES = ['imaging', 'rendering', 'stamping', 'merging', 'compression', 'converters', 'splitting']
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = {}
+_warmed_pid = None
+
+
+class ToolTimeout(Exception):
+    pass
+
+
+class WorkerCrashed(Exception):
+    pass
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if EXECUTOR_BACKEND == 'process':
+                methods = multiprocessing.get_all_start_methods()
+                # Forking a threaded gunicorn worker can inherit held locks
+                ctx = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                if 'forkserver' in methods:
+                    ctx.set_forkserver_preload(PRELOAD_MODULES)
+                _pool = ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=ctx,
+                                            initializer=_init_worker)
+            else:
+                _pool = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix='cpu')
+        return _pool
+
+
+def _discard(pool):
+    """Drop ``pool`` after one of its workers died, so the next call
+    builds a fresh one (unless another call already did)."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(fn, args):
+    pool = get_pool()
+    try:
+        return pool, pool.submit(_call, fn, args)
+    except BrokenProcessPool:
+        # Broken by another call's crash; this call did nothing wrong
+        _discard(pool)
+        pool = get_pool()
+        return pool, pool.submit(_call, fn, args)
+
+
+def warm():
+    """Start every pool worker now instead of on the first request."""
+    if EXECUTOR_BACKEND == 'inline':
+        return
+    pool = get_pool()
+    for future in [pool.submit(os.getpid) for _ in range(CPU_WORKERS)]:
+        future.result()
+
+
+def warm_once():
+    """Warm the pool in the background, once per process. Called on each
+    request, as the pool of a forked gunicorn worker has to be its own."""
+    global _warmed_pid
+    with _pool_lock:
+        if _warmed_pid == os.getpid():
+            return
+        _warmed_pid = os.getpid()
+    threading.Thread(target=_warm_quietly, name='executor-warm', daemon=True).start()
+
+
+def _warm_quietly():
+    try:
+        warm()
+    except Exception as e:
+        print(f'Executor warm-up failed: {e}')
+
+
+@contextmanager
+def tool_slot(tool):
+    """Hold one of the concurrency slots configured for ``tool``."""
+    limit = CPU_TOOL_LIMITS.get(tool)
+    if not limit:
+        yield
+        return
+    with _pool_lock:
+        slot = _slots.setdefault(tool, threading.BoundedSemaphore(limit))
+    with slot:
+        yield
+
+
+def run(tool, fn, *args):
+    """Run ``fn(*args)`` on the executor and return its result."""
+    with tool_slot(tool):
+        if EXECUTOR_BACKEND == 'inline':
+            return fn(*args)
+        pool, future = _submit(fn, args)
+        return _result(tool, pool, future)
+
+
+def map_unordered(tool, fn, arg_list):
+    """Run ``fn(*args)`` for every tuple in ``arg_list`` and yield the
+    results in completion order. The whole fan-out holds a single slot."""
+    with tool_slot(tool):
+        if EXECUTOR_BACKEND == 'inline':
+            for args in arg_list:
+                yield fn(*args)
+            return
+        pools = {}
+        for args in arg_list:
+            pool, future = _submit(fn, args)
+            pools[future] = pool
+        pending = set(pools)
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield _result(tool, pools[future], future)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _result(tool, pool, future):
+    try:
+        return future.result()
+    except _CpuTimeExceeded:
+        raise ToolTimeout(f'{tool} exceeded the {CPU_JOB_TIMEOUT:g}s CPU time limit')
+    except BrokenProcessPool:
+        # A worker was killed (out of memory, a crash in native code or the
+        # hard CPU limit); the pool cannot be used again
+        _discard(pool)
+        raise WorkerCrashed(f'{tool} worker process terminated abruptly')
+
+
+class _CpuTimeExceeded(Exception):
+    pass
+
+
+def _init_worker():
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_sigxcpu)
+
+
+def _on_sigxcpu(signum, frame):
+    raise _CpuTimeExceeded()
+
+
+def _call(fn, args):
+    # Runs in the worker. RLIMIT_CPU counts the whole process lifetime, so
+    # the soft limit is moved to "CPU used so far + budget" for each call.
+    if resource is None or EXECUTOR_BACKEND != 'process':
+        return fn(*args)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    budget = int(usage.ru_utime + usage.ru_stime + CPU_JOB_TIMEOUT) + 1
+    if hard != resource.RLIM_INFINITY:
+        budget = min(budget, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (budget, hard))
+    try:
+        return fn(*args)
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
@@ -0,0 +1,190 @@
+"""Streaming images-to-PDF writer behind the ``jpg-to-pdf`` tool.
+
+Pages are written to the output as each image is read, so memory holds at
+most one decoded image whatever the number of pages. JPEGs are embedded
+as they are (``DCTDecode``): no decoding, no quality loss, and their EXIF
+orientation is applied by the page's transformation matrix rather than
+by rotating pixels. Other formats are decoded one at a time and stored
+losslessly with ``FlateDecode``.
+"""
+import math
+import os
+import shutil
+import zlib
+
+from PIL import Image, ImageOps
+
+PAGE_SIZES = {
+    'a4': (595.28, 841.89),
+    'letter': (612.0, 792.0),
+}
+FIT_MODES = ('contain', 'cover', 'stretch')
+# Largest margin in points (20 inches); pages grow by it with page_size='auto'
+MAX_MARGIN = 1440
+
+_CHUNK = 1024 * 1024
+_EXIF_ORIENTATION = 0x0112
+# (a, b, c, d, e, f) placing the unit square of the stored image in the
+# unit square of the displayed one, per EXIF orientation
+_ORIENTATION_MATRIX = {
+    1: (1, 0, 0, 1, 0, 0),
+    2: (-1, 0, 0, 1, 1, 0),
+    3: (-1, 0, 0, -1, 1, 1),
+    4: (1, 0, 0, -1, 0, 1),
+    5: (0, -1, -1, 0, 1, 1),
+    6: (0, -1, 1, 0, 0, 1),
+    7: (0, 1, 1, 0, 0, 0),
+    8: (0, 1, -1, 0, 1, 0),
+}
+_COLOR_SPACES = {'L': '/DeviceGray', 'RGB': '/DeviceRGB', 'CMYK': '/DeviceCMYK'}
+
+
+def _number(value):
+    return f'{value:.4f}'.rstrip('0').rstrip('.')
+
+
+def check_margin(page_size, margin):
+    """Raise ``ValueError`` unless ``margin`` leaves room for the image
+    on ``page_size`` pages."""
+    if not math.isfinite(margin) or margin > MAX_MARGIN:
+        raise ValueError(f'margin must be at most {MAX_MARGIN} points')
+    if page_size in PAGE_SIZES and 2 * margin >= min(PAGE_SIZES[page_size]):
+        raise ValueError(f'margin must be less than {min(PAGE_SIZES[page_size]) / 2:g} points for {page_size} pages')
+
+
+def _placement(page, size, fit, margin):
+    """``(x, y, width, height)`` of an image of displayed ``size`` on
+    ``page``, inside ``margin``."""
+    box_width = page[0] - 2 * margin
+    box_height = page[1] - 2 * margin
+    if fit == 'stretch':
+        return margin, margin, box_width, box_height
+    scales = (box_width / size[0], box_height / size[1])
+    scale = max(scales) if fit == 'cover' else min(scales)
+    width, height = size[0] * scale, size[1] * scale
+    return margin + (box_width - width) / 2, margin + (box_height - height) / 2, width, height
+
+
+class ImagePdfWriter:
+    """Write one page per :meth:`add` call to the binary file ``output``.
+
+    ``page_size`` is ``'auto'`` (the image's size at 72 dpi, as PIL's PDF
+    writer does) or a key of ``PAGE_SIZES``, turned to landscape for wide
+    images. ``fit`` is one of ``FIT_MODES``; ``cover`` crops to the page.
+    """
+
+    def __init__(self, output, page_size='auto', fit='contain', margin=0):
+        check_margin(page_size, margin)
+        self.output = output
+        self.page_size = page_size
+        self.fit = fit
+        self.margin = margin
+        self._offsets = {}
+        self._pages = []
+        self._next_id = 3  # 1 and 2 are the catalog and page tree, written last
+        self.output.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _begin(self, obj_id=None):
+        if obj_id is None:
+            obj_id = self._next_id
+            self._next_id += 1
+        self._offsets[obj_id] = self.output.tell()
+        self.output.write(f'{obj_id} 0 obj\n'.encode())
+        return obj_id
+
+    def _object(self, body, obj_id=None):
+        obj_id = self._begin(obj_id)
+        self.output.write(body.encode() + b'\nendobj\n')
+        return obj_id
+
+    def _stream(self, dictionary, data=None, source=None, length=None):
+        obj_id = self._begin()
+        self.output.write(f'<< {dictionary} /Length {length if data is None else len(data)} >>\nstream\n'.encode())
+        if data is None:
+            shutil.copyfileobj(source, self.output, _CHUNK)
+        else:
+            self.output.write(data)
+        self.output.write(b'\nendstream\nendobj\n')
+        return obj_id
+
+    def add(self, source):
+        """Add a page with the image at path or binary file ``source``."""
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                return self.add(f)
+        source.seek(0)
+        img = Image.open(source)
+        if img.format in ('JPEG', 'MPO') and img.mode in _COLOR_SPACES:
+            orientation = img.getexif().get(_EXIF_ORIENTATION, 1)
+            if orientation not in _ORIENTATION_MATRIX:
+                orientation = 1
+            dictionary = self._image_dict(img, '/DCTDecode')
+            if img.mode == 'CMYK' and 'adobe' in img.info:
+                # Adobe writes CMYK JPEGs inverted
+                dictionary += ' /Decode [1 0 1 0 1 0 1 0]'
+            size = img.size
+            source.seek(0, os.SEEK_END)
+            length = source.tell()
+            source.seek(0)
+            image_id = self._stream(dictionary, source=source, length=length)
+        else:
+            img = ImageOps.exif_transpose(img)
+            if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info:
+                img = img.convert('RGBA')
+                background = Image.new('RGB', img.size, 'white')
+                background.paste(img, mask=img.getchannel('A'))
+                img = background
+            elif img.mode not in _COLOR_SPACES:
+                img = img.convert('L' if img.mode in ('1', 'I', 'I;16', 'F') else 'RGB')
+            orientation = 1
+            size = img.size
+            image_id = self._stream(self._image_dict(img, '/FlateDecode'), data=zlib.compress(img.tobytes(), 6))
+        img.close()
+        self._add_page(image_id, size, orientation)
+
+    def _image_dict(self, img, codec):
+        return (f'/Type /XObject /Subtype /Image /Width {img.width} /Height {img.height} '
+                f'/ColorSpace {_COLOR_SPACES[img.mode]} /BitsPerComponent 8 /Filter {codec}')
+
+    def _add_page(self, image_id, size, orientation):
+        if orientation in (5, 6, 7, 8):
+            size = (size[1], size[0])
+        if self.page_size == 'auto':
+            page = (size[0] + 2 * self.margin, size[1] + 2 * self.margin)
+        else:
+            page = PAGE_SIZES[self.page_size]
+            if size[0] > size[1]:
+                page = (page[1], page[0])
+        x, y, width, height = _placement(page, size, self.fit, self.margin)
+        a, b, c, d, e, f = _ORIENTATION_MATRIX[orientation]
+        matrix = ' '.join(map(_number, (a * width, b * height, c * width, d * height,
+                                        x + e * width, y + f * height)))
+        clip = ''
+        if self.fit == 'cover':
+            clip = ' '.join(map(_number, (self.margin, self.margin, page[0] - 2 * self.margin,
+                                          page[1] - 2 * self.margin))) + ' re W n '
+        content_id = self._stream('', data=f'q {clip}{matrix} cm /Im0 Do Q'.encode())
+        self._pages.append(self._object(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_number(page[0])} {_number(page[1])}] '
+            f'/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>'))
+
+    def close(self):
+        """Write the page tree, cross-reference table and trailer."""
+        kids = ' '.join(f'{page} 0 R' for page in self._pages)
+        self._object(f'<< /Type /Pages /Kids [{kids}] /Count {len(self._pages)} >>', 2)
+        self._object('<< /Type /Catalog /Pages 2 0 R >>', 1)
+        xref = self.output.tell()
+        count = self._next_id
+        lines = [f'xref\n0 {count}\n0000000000 65535 f \n']
+        lines.extend(f'{self._offsets[i]:010d} 00000 n \n' for i in range(1, count))
+        lines.append(f'trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n')
+        self.output.write(''.join(lines).encode())
+
+
+def images_to_pdf(sources, output, page_size='auto', fit='contain', margin=0):
+    """Write a PDF with one page per image of ``sources`` to ``output``."""
+    writer = ImagePdfWriter(output, page_size, fit, margin)
+    for source in sources:
+        writer.add(source)
+    writer.close()
+    return output
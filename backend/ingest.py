@@ -0,0 +1,208 @@
+"""Streaming ingestion of uploaded files.
+
+Flask's request class is replaced by :class:`IngestRequest`, so uploads
+are checked while the multipart body streams in rather than after it
+has been buffered:
+
+- The body limit is the tool's ``max_input_bytes`` (``MAX_CONTENT_LENGTH``
+  for other routes), enforced while reading, chunked uploads included.
+- Every file part is written to an :class:`IngestFile`, which keeps small
+  files in memory, spills larger ones to a named file in scratch space
+  and hashes the bytes on the way for the result cache.
+- The first bytes are matched against the formats the tool accepts, so a
+  wrong file is refused (415) before the rest of it is read. PDFs with
+  more pages than the tool allows are refused (413) as soon as they are
+  complete.
+
+Tools get spilled uploads without another copy: :func:`save_upload`
+hard-links them to their destination and :func:`mapped` memory-maps them.
+"""
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+import tools
+
+INGEST_SPOOL_BYTES = int(os.getenv('INGEST_SPOOL_BYTES', str(1024 * 1024)))
+
+# PDF allows a few bytes of junk before the header
+SNIFF_BYTES = 1024
+
+_IMAGE_MAGIC = (b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n', b'GIF87a', b'GIF89a', b'BM', b'II*\x00', b'MM\x00*')
+
+FORMATS = {
+    'pdf': lambda head: b'%PDF-' in head,
+    'image': lambda head: head.startswith(_IMAGE_MAGIC) or (head[:4] == b'RIFF' and head[8:12] == b'WEBP'),
+    # DOCX, XLSX and PPTX are ZIP packages
+    'office': lambda head: head.startswith(b'PK\x03\x04'),
+    'text': lambda head: b'\0' not in head,
+}
+_FORMAT_NAMES = {'pdf': 'a PDF file', 'image': 'an image file',
+                 'office': 'an Office document (DOCX, XLSX or PPTX)', 'text': 'text'}
+
+
+def _page_count(source):
+    import fitz
+    try:
+        with (fitz.open(source) if isinstance(source, str) else fitz.open(stream=source, filetype='pdf')) as doc:
+            return None if doc.needs_pass else doc.page_count
+    except Exception:
+        # Leave broken files to the tool (pdf-repair exists for them)
+        return None
+
+
+def check_format(head, accepts):
+    """Raise 415 unless the first bytes ``head`` match one of ``accepts``."""
+    if accepts and not any(FORMATS[kind](head) for kind in accepts):
+        raise UnsupportedMediaType('Expected ' + ' or '.join(_FORMAT_NAMES[kind] for kind in accepts))
+
+
+def check_pages(pages, max_pages):
+    if pages is not None and max_pages and pages > max_pages:
+        raise RequestEntityTooLarge(f'PDF has {pages} pages; the limit is {max_pages}')
+
+
+def check_stored(path, tool, page_count=_page_count):
+    """Apply the checks uploads for ``tool`` get while streaming to a file
+    already on disk (a stored document). ``page_count(path)`` counts the
+    pages of PDFs."""
+    if os.path.getsize(path) > tool.max_input_bytes:
+        raise RequestEntityTooLarge(f'Input larger than {tool.max_input_bytes // tools.MiB} MB')
+    with open(path, 'rb') as f:
+        head = f.read(SNIFF_BYTES)
+    check_format(head, tool.accepts)
+    if tool.max_pages and FORMATS['pdf'](head):
+        check_pages(page_count(path), tool.max_pages)
+
+
+class IngestFile:
+    """Upload container handed to werkzeug's multipart parser.
+
+    ``accepts`` lists keys of ``FORMATS`` the file must match (None for
+    any) and ``max_pages`` caps the pages of PDFs.
+    """
+
+    def __init__(self, accepts=None, max_pages=None, folder=None):
+        self.accepts = accepts
+        self.max_pages = max_pages
+        self.folder = folder
+        self.size = 0
+        self.path = None
+        self._file = io.BytesIO()
+        self._digest = hashlib.sha256()
+        self._head = b''
+        self._complete = False
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+    def write(self, data):
+        if not self._complete and len(self._head) < SNIFF_BYTES:
+            self._head += data[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) == SNIFF_BYTES:
+                self._check_format()
+        self.size += len(data)
+        self._digest.update(data)
+        if self.path is None and self.size > INGEST_SPOOL_BYTES:
+            self._spill()
+        return self._file.write(data)
+
+    def _spill(self):
+        spilled = tempfile.NamedTemporaryFile(prefix='upload-', dir=self.folder)
+        spilled.write(self._file.getbuffer())
+        self._file = spilled
+        self.path = spilled.name
+
+    def seek(self, offset, whence=0):
+        # The parser rewinds the file once its last chunk is written
+        if not self._complete:
+            self._complete = True
+            if len(self._head) < SNIFF_BYTES:
+                self._check_format()
+            self._check_pages()
+        return self._file.seek(offset, whence)
+
+    def _check_format(self):
+        check_format(self._head, self.accepts)
+
+    def _check_pages(self):
+        if not self.max_pages or not FORMATS['pdf'](self._head):
+            return
+        self._file.flush()
+        check_pages(_page_count(self.path or self._file.getvalue()), self.max_pages)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class IngestRequest(Request):
+    @property
+    def tool(self):
+        return tools.get((self.view_args or {}).get('tool', ''))
+
+    @property
+    def max_content_length(self):
+        tool = self.tool
+        return tool.max_input_bytes if tool else super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        tool = self.tool
+        folder = current_app.config['SCRATCH_FOLDER']
+        if tool is None:
+            return IngestFile(folder=folder)
+        return IngestFile(tool.accepts, tool.max_pages, folder)
+
+
+def save_upload(file, path):
+    """Save the uploaded ``FileStorage`` at ``path``, hard-linking spilled
+    uploads instead of copying them."""
+    stream = file.stream
+    if isinstance(stream, IngestFile) and stream.path:
+        stream.flush()
+        try:
+            os.link(stream.path, path)
+            return path
+        except OSError:
+            pass
+    stream.seek(0)
+    with open(path, 'wb') as out:
+        shutil.copyfileobj(stream, out, 1024 * 1024)
+    stream.seek(0)
+    return path
+
+
+@contextmanager
+def mapped(source):
+    """Read-only buffer over ``source`` (a path or an uploaded
+    ``FileStorage``): a memory map of files on disk, the in-memory buffer
+    of small uploads."""
+    if not isinstance(source, str):
+        stream = source.stream
+        if not isinstance(stream, IngestFile) or not stream.path:
+            stream.seek(0)
+            data = stream.getbuffer() if hasattr(stream, 'getbuffer') else stream.read()
+            try:
+                yield data
+            finally:
+                if isinstance(data, memoryview):
+                    data.release()
+            return
+        stream.flush()
+        source = stream.path
+    with open(source, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            yield view
@@ -0,0 +1,52 @@
+"""Access to the input of the tool handling the current request.
+
+A tool reads either an uploaded ``file`` or a stored document named by
+``fileId``. The document store is the one registered by the app as
+``app.extensions['documents']``.
+"""
+from contextlib import ExitStack, contextmanager
+
+from flask import current_app, request
+from werkzeug.local import LocalProxy
+
+from ingest import save_upload
+from metrics import stage
+from scratch import scratch_path
+
+documents = LocalProxy(lambda: current_app.extensions['documents'])
+
+
+def has_input():
+    return bool(request.files.get('file') or request.form.get('fileId'))
+
+
+def input_name():
+    """Name of the tool's input, used to pick its file extension."""
+    return request.form.get('fileId') or request.files['file'].filename
+
+
+def input_path(name):
+    """Path of the tool's input: the stored ``fileId`` document as is, or
+    the uploaded ``file`` saved to scratch space as ``name``."""
+    file_id = request.form.get('fileId')
+    if file_id:
+        return documents.path(file_id)
+    path = scratch_path(name)
+    with stage('upload'):
+        save_upload(request.files['file'], path)
+    return path
+
+
+@contextmanager
+def pdf_reader():
+    """``PdfReader`` for the tool's input. Readers of stored documents
+    come from the shared handle cache and must not be modified."""
+    from pypdf import PdfReader
+    file_id = request.form.get('fileId')
+    with ExitStack() as stack:
+        with stage('parse'):
+            if file_id:
+                reader = stack.enter_context(documents.pdf_reader(file_id))
+            else:
+                reader = PdfReader(request.files['file'])
+        yield reader
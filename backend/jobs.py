@@ -0,0 +1,188 @@
+"""Background job queue for heavy tools.
+
+Jobs run on a bounded local thread pool. Job state is mirrored to a
+``job.json`` file inside each job directory so that any gunicorn worker
+sharing the same ``UPLOAD_FOLDER`` can answer status and result requests,
+not only the worker that accepted the upload.
+"""
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_QUEUE_LIMIT = int(os.getenv('JOB_QUEUE_LIMIT', '32'))
+JOB_TTL = int(os.getenv('JOB_TTL', '3600'))
+
+_current = threading.local()
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, tool, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.tool = tool
+        self.status = 'queued'
+        self.progress = 0
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.status_code = None
+        self.mimetype = None
+        self.headers = {}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tool': self.tool,
+            'status': self.status,
+            'progress': self.progress,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'statusCode': self.status_code,
+            'mimetype': self.mimetype,
+            'headers': self.headers,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(data['tool'], data['id'])
+        job.status = data['status']
+        job.progress = data['progress']
+        job.error = data['error']
+        job.created = data['created']
+        job.started = data['started']
+        job.finished = data['finished']
+        job.status_code = data['statusCode']
+        job.mimetype = data['mimetype']
+        job.headers = data['headers']
+        return job
+
+
+class JobQueue:
+    def __init__(self, folder, workers=JOB_WORKERS, limit=JOB_QUEUE_LIMIT, ttl=JOB_TTL):
+        self.folder = os.path.abspath(folder)
+        self.limit = limit
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    def job_dir(self, job_id):
+        return os.path.join(self.folder, job_id)
+
+    def result_path(self, job_id):
+        return os.path.join(self.job_dir(job_id), 'result')
+
+    def create(self, tool):
+        """Reserve a queue slot and a job directory for the caller to fill
+        with inputs before calling :meth:`submit`."""
+        self._expire()
+        with self._lock:
+            if self._pending >= self.limit:
+                raise QueueFull(f'Job queue is full ({self.limit} pending)')
+            self._pending += 1
+        job = Job(tool)
+        os.makedirs(self.job_dir(job.id), exist_ok=True)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._save(job)
+        return job
+
+    def submit(self, job, fn, *args):
+        """Run ``fn(result_path, *args)`` in the pool.
+
+        ``fn`` writes the output body to ``result_path`` and returns a
+        ``(status_code, mimetype, headers)`` tuple.
+        """
+        self._pool.submit(self._run, job, fn, args)
+        return job
+
+    def fail(self, job, error):
+        """Give back the slot of a job that could not be submitted and
+        record it as failed, so storage no longer protects it as active."""
+        job.status = 'failed'
+        job.error = error
+        job.finished = time.time()
+        with self._lock:
+            self._pending -= 1
+        for name in os.listdir(self.job_dir(job.id)):
+            if name != 'job.json':
+                os.remove(os.path.join(self.job_dir(job.id), name))
+        self._save(job)
+
+    def get(self, job_id):
+        if not re.fullmatch(r'[0-9a-f]{32}', job_id):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job:
+            return job
+        # The job may have been accepted by another worker process
+        try:
+            with open(os.path.join(self.job_dir(job_id), 'job.json')) as f:
+                return Job.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _run(self, job, fn, args):
+        _current.job = job
+        _current.queue = self
+        job.status = 'running'
+        job.started = time.time()
+        self._save(job)
+        try:
+            job.status_code, job.mimetype, job.headers = fn(self.result_path(job.id), *args)
+            job.status = 'done' if job.status_code < 400 else 'failed'
+            job.progress = 100
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished = time.time()
+            _current.job = None
+            with self._lock:
+                self._pending -= 1
+            self._save(job)
+
+    def _save(self, job):
+        path = os.path.join(self.job_dir(job.id), 'job.json')
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(job.to_dict(), f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [j for j in self._jobs.values() if j.finished and j.finished < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            shutil.rmtree(self.job_dir(job.id), ignore_errors=True)
+
+
+def report_progress(done, total):
+    """Report progress of the job running on this thread, if any."""
+    job = getattr(_current, 'job', None)
+    if job is None or not total:
+        return
+    progress = min(99, int(done * 100 / total))
+    if progress != job.progress:
+        job.progress = progress
+        _current.queue._save(job)
@@ -0,0 +1,63 @@
+"""Merge engine for ``pdf-merger``.
+
+Inputs are opened one at a time from disk and grafted into the output
+with PyMuPDF, and each source is closed before the next is opened, so
+peak memory is the output plus a single input rather than every input's
+parsed object graph at once. Saving with ``garbage=4`` collapses objects
+with identical content, so a font or logo shared by several inputs is
+stored once.
+"""
+import fitz
+
+
+def _runs(pages):
+    """Split a list of page indices into ascending or descending runs of
+    consecutive pages, as ``(from_page, to_page)`` pairs."""
+    runs = []
+    for page in pages:
+        if runs:
+            start, end = runs[-1]
+            step = page - end
+            if abs(step) == 1 and (start == end or (end > start) == (step > 0)):
+                runs[-1] = (start, page)
+                continue
+        runs.append((page, page))
+    return runs
+
+
+def _add_outline(toc, src_toc, page_map):
+    for level, title, page in src_toc:
+        if page - 1 not in page_map:
+            continue
+        # Entries whose parent was dropped move up so the tree stays valid
+        level = min(level, toc[-1][0] + 1 if toc else 1)
+        toc.append([level, title, page_map[page - 1] + 1])
+
+
+def merge_pdfs(inputs, output_path):
+    """Merge ``inputs``, a list of ``(path, page_indices)``, into ``output_path``.
+
+    ``page_indices`` are 0-based and may be in any order. Outlines of the
+    inputs are kept for the pages that make it into the output.
+    """
+    out = fitz.open()
+    toc = []
+    try:
+        for path, pages in inputs:
+            src = fitz.open(path)
+            try:
+                offset = len(out)
+                runs = _runs(pages)
+                for i, (start, end) in enumerate(runs):
+                    # Keep the graft map between runs of the same source so
+                    # its shared objects are copied once
+                    out.insert_pdf(src, from_page=start, to_page=end, final=i == len(runs) - 1)
+                _add_outline(toc, src.get_toc(simple=True),
+                             {page: offset + i for i, page in enumerate(pages)})
+            finally:
+                src.close()
+        if toc:
+            out.set_toc(toc)
+        out.save(output_path, garbage=4, deflate=True)
+    finally:
+        out.close()
@@ -0,0 +1,216 @@
+"""Request metrics in the Prometheus text format and ``Server-Timing`` headers.
+
+``init_app`` instruments every request: counts, latency, input/output
+sizes, conversion methods and result cache outcomes per tool. Code on the
+request path times its stages with ``with stage('render'):`` (or
+:func:`record_stage` for durations measured elsewhere, e.g. in a pool
+worker). Stages known when the response starts go into its
+``Server-Timing`` header; all of them, plus ``send`` for the time spent
+streaming the body, go into the ``toolify_stage_seconds`` histogram.
+
+Metrics live in the process that served the request, so with several
+gunicorn workers each worker exposes its own counters.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+import upstream
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(11))  # 1 KiB .. 1 GiB
+
+# Cap on distinct tool label values, so arbitrary URLs cannot blow up the registry
+MAX_TOOLS = 100
+
+_lock = threading.Lock()
+_metrics = []
+_tools = set()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values = {}
+        _metrics.append(self)
+
+    def _key(self, labels):
+        return tuple(labels[name] for name in self.labels)
+
+    def _format_labels(self, key, extra=()):
+        pairs = list(zip(self.labels, key)) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"') for _, v in pairs)
+        return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield f'{self.name}{self._format_labels(key)} {value:g}'
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels, buckets):
+        super().__init__(name, help_text, labels)
+        self.buckets = buckets
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[0][i] += 1
+            counts[1] += 1
+            counts[2] += value
+
+    def samples(self):
+        for key, (buckets, count, total) in sorted(self.values.items()):
+            for bound, bucket_count in zip(self.buckets, buckets):
+                yield f'{self.name}_bucket{self._format_labels(key, [("le", f"{bound:g}")])} {bucket_count}'
+            yield f'{self.name}_bucket{self._format_labels(key, [("le", "+Inf")])} {count}'
+            yield f'{self.name}_sum{self._format_labels(key)} {total:g}'
+            yield f'{self.name}_count{self._format_labels(key)} {count}'
+
+
+REQUESTS = Counter('toolify_requests_total', 'Requests by tool and status code.', ('tool', 'status'))
+ERRORS = Counter('toolify_request_errors_total', 'Requests that ended with a 4xx/5xx status.', ('tool',))
+LATENCY = Histogram('toolify_request_seconds', 'Time until the response started.', ('tool',), LATENCY_BUCKETS)
+INPUT_BYTES = Histogram('toolify_input_bytes', 'Request body size.', ('tool',), SIZE_BUCKETS)
+OUTPUT_BYTES = Histogram('toolify_output_bytes', 'Response body size.', ('tool',), SIZE_BUCKETS)
+STAGES = Histogram('toolify_stage_seconds', 'Time spent per processing stage.', ('tool', 'stage'), LATENCY_BUCKETS)
+CONVERSIONS = Counter('toolify_conversions_total', 'Conversions by the method that produced them.',
+                      ('tool', 'method'))
+CACHE = Counter('toolify_result_cache_total', 'Result cache lookups by outcome.', ('tool', 'result'))
+
+
+def render():
+    lines = []
+    with _lock:
+        for metric in _metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+def record_stage(name, seconds):
+    if has_request_context() and 'metrics_stages' in g:
+        g.metrics_stages.append((name, seconds))
+
+
+@contextmanager
+def stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def _totals(stages):
+    totals = {}
+    for name, seconds in stages:
+        totals[name] = totals.get(name, 0) + seconds
+    return totals
+
+
+def _tool_label():
+    tool = (request.view_args or {}).get('tool') or request.endpoint or 'unknown'
+    with _lock:
+        if tool not in _tools:
+            if len(_tools) >= MAX_TOOLS:
+                return 'other'
+            _tools.add(tool)
+    return tool
+
+
+def _before_request():
+    # The ASGI server dispatches deferred requests twice; both passes add to one timing
+    timing = request.environ.get(upstream.TIMING)
+    g.metrics_started = timing['started'] if timing else time.perf_counter()
+    g.metrics_stages = timing['stages'] if timing else []
+    too_large = (request.content_length or 0) > (request.max_content_length or float('inf'))
+    if request.method == 'POST' and (request.view_args or {}).get('tool') and not too_large:
+        # Parse the multipart body up front so its cost shows as its own stage
+        with stage('upload'):
+            request.form
+            request.files
+
+
+def _after_request(response):
+    # A request deferred by the ASGI server is counted once, on its second pass
+    if 'metrics_started' not in g or upstream.DEFERRED in request.environ:
+        return response
+    tool = _tool_label()
+    elapsed = time.perf_counter() - g.metrics_started
+    stages = g.metrics_stages
+    timings = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in _totals(stages).items()]
+    timings.append(f'total;dur={elapsed * 1000:.1f}')
+    response.headers['Server-Timing'] = ', '.join(timings)
+    response.headers['Timing-Allow-Origin'] = '*'
+
+    REQUESTS.inc(tool=tool, status=str(response.status_code))
+    if response.status_code >= 400:
+        ERRORS.inc(tool=tool)
+    LATENCY.observe(elapsed, tool=tool)
+    if request.content_length:
+        INPUT_BYTES.observe(request.content_length, tool=tool)
+    method = response.headers.get('X-Conversion-Method')
+    if method:
+        CONVERSIONS.inc(tool=tool, method=method)
+    cache = response.headers.get('X-Cache')
+    if cache:
+        CACHE.inc(tool=tool, result=cache)
+
+    sent = [0]
+    if response.content_length is None and response.is_streamed:
+        body = response.response
+
+        def counting():
+            try:
+                for chunk in body:
+                    sent[0] += len(chunk)
+                    yield chunk
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+
+        response.response = counting()
+    else:
+        sent[0] = response.content_length or 0
+    send_started = time.perf_counter()
+
+    def finish():
+        # Stages recorded while streaming are only known now
+        stages.append(('send', time.perf_counter() - send_started))
+        for name, seconds in _totals(stages).items():
+            STAGES.observe(seconds, tool=tool, stage=name)
+        OUTPUT_BYTES.observe(sent[0], tool=tool)
+
+    response.call_on_close(finish)
+    return response
+
+
+def init_app(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
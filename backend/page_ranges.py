@@ -0,0 +1,43 @@
+"""Parsing of user supplied page range specs such as ``1-3,7,10-``."""
+
+
+def parse_page_ranges(spec, page_count):
+    """Return the 0-based page indices selected by ``spec``.
+
+    ``spec`` is a comma separated list of 1-based pages and ranges. Open
+    ranges (``10-`` or ``-3``) run to the last or from the first page, and
+    an empty spec or ``all`` selects every page. Pages keep the order in
+    which they are listed; duplicates are dropped. Raises ``ValueError``
+    for malformed or out-of-range specs.
+    """
+    spec = (spec or '').strip()
+    if not spec or spec.lower() == 'all':
+        return list(range(page_count))
+    pages = []
+    seen = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                start, end = part.split('-', 1)
+                start = int(start) if start.strip() else 1
+                end = int(end) if end.strip() else page_count
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f'Invalid page range: {part}')
+        if start < 1:
+            raise ValueError(f'Invalid page range: {part}')
+        if start > page_count:
+            raise ValueError(f'Page {start} is out of range (document has {page_count} pages)')
+        if start > end:
+            raise ValueError(f'Invalid page range: {part}')
+        for i in range(start - 1, min(end, page_count)):
+            if i not in seen:
+                seen.add(i)
+                pages.append(i)
+    if not pages:
+        raise ValueError('No pages selected')
+    return pages
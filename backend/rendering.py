@@ -0,0 +1,73 @@
+"""Page rendering engine for the ``pdf-to-jpg`` tool.
+
+Page lists are split into chunks that run on the CPU executor. Every
+worker opens its own ``fitz`` document and encodes the pixmaps in memory,
+and the caller receives the encoded pages as chunks finish.
+"""
+import io
+import math
+import time
+
+import fitz
+
+import executor
+from jobs import report_progress
+from metrics import record_stage
+
+IMAGE_FORMATS = ('jpg', 'png', 'webp')
+
+# Upper bound on pages per task: small chunks balance uneven pages and let
+# the first ZIP entries go out sooner.
+MAX_CHUNK_PAGES = 8
+
+
+def render_pages(input_path, page_numbers, dpi, fmt, quality):
+    """Render 0-based ``page_numbers`` and return ``([(name, data), ...],
+    render_seconds, encode_seconds)``."""
+    doc = fitz.open(input_path)
+    try:
+        rendered = []
+        render_time = encode_time = 0
+        for page_num in page_numbers:
+            started = time.perf_counter()
+            pix = doc[page_num].get_pixmap(dpi=dpi)
+            rendered_at = time.perf_counter()
+            rendered.append((f'page_{page_num+1}.{fmt}', _encode(pix, fmt, quality)))
+            render_time += rendered_at - started
+            encode_time += time.perf_counter() - rendered_at
+        return rendered, render_time, encode_time
+    finally:
+        doc.close()
+
+
+def _encode(pix, fmt, quality):
+    if fmt == 'png':
+        return pix.tobytes('png')
+    # Pillow's libjpeg-turbo encoder is several times faster than MuPDF's
+    from PIL import Image
+    img = Image.frombuffer('RGB', (pix.width, pix.height), pix.samples_mv, 'raw', 'RGB', pix.stride, 1)
+    buffer = io.BytesIO()
+    if fmt == 'jpg':
+        img.save(buffer, format='JPEG', quality=quality)
+    else:
+        img.save(buffer, format='WEBP', quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def iter_rendered_pages(tool, input_path, page_numbers, dpi=200, fmt='jpg', quality=95):
+    """Yield ``(name, data)`` for every page, in completion order."""
+    per_chunk = max(1, min(MAX_CHUNK_PAGES, math.ceil(len(page_numbers) / (executor.CPU_WORKERS * 2))))
+    chunks = [(input_path, page_numbers[i:i + per_chunk], dpi, fmt, quality)
+              for i in range(0, len(page_numbers), per_chunk)]
+    done = 0
+    render_time = encode_time = 0
+    for rendered, render_seconds, encode_seconds in executor.map_unordered(tool, render_pages, chunks):
+        for entry in rendered:
+            yield entry
+        done += len(rendered)
+        render_time += render_seconds
+        encode_time += encode_seconds
+        report_progress(done, len(page_numbers))
+    # Summed over workers, so these can exceed the wall-clock time
+    record_stage('render', render_time)
+    record_stage('encode', encode_time)
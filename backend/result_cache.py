@@ -0,0 +1,135 @@
+"""Content-addressed cache of tool results.
+
+Results are keyed on a SHA-256 of the tool name, its normalized form
+parameters and the bytes of every input file, and stored on disk so all
+gunicorn workers share them. The store is capped at ``RESULT_CACHE_BYTES``
+and evicts least recently used entries (by file mtime, bumped on every
+hit). Setting the cap to 0 disables the cache.
+"""
+import hashlib
+import json
+import os
+import uuid
+
+from flask import send_file
+
+RESULT_CACHE_BYTES = int(os.getenv('RESULT_CACHE_BYTES', str(512 * 1024 * 1024)))
+
+# Response headers stored with a cached result
+CACHED_HEADERS = (
+    'Content-Disposition', 'X-Conversion-Method',
+    'X-Original-Size', 'X-Compressed-Size', 'X-Images-Recompressed', 'X-Compression-Time',
+)
+
+_CHUNK = 1024 * 1024
+
+
+def _hash_file(digest, source):
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            _hash_file(digest, f)
+        return
+    pos = source.tell()
+    for chunk in iter(lambda: source.read(_CHUNK), b''):
+        digest.update(chunk)
+    source.seek(pos)
+
+
+class ResultCache:
+    def __init__(self, folder, max_bytes=RESULT_CACHE_BYTES):
+        self.folder = os.path.abspath(folder)
+        self.max_bytes = max_bytes
+        os.makedirs(self.folder, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def key(self, tool, params, inputs):
+        """Key for ``tool`` run with ``params`` (a list of form items) on
+        ``inputs``, a list of ``(field, file object or path)``."""
+        digest = hashlib.sha256(tool.encode())
+        digest.update(json.dumps(sorted(params)).encode())
+        for field, source in inputs:
+            # Uploads are hashed by ingest.IngestFile while they stream in
+            file_hash = getattr(source, 'sha256', None)
+            if file_hash is None:
+                file_digest = hashlib.sha256()
+                _hash_file(file_digest, source)
+                file_hash = file_digest.hexdigest()
+            digest.update(f'\0{field}\0{file_hash}'.encode())
+        return digest.hexdigest()
+
+    def response(self, key):
+        """Response for a cached result, or None on a miss."""
+        path = os.path.join(self.folder, key)
+        try:
+            with open(path + '.json') as f:
+                meta = json.load(f)
+            os.utime(path)
+            resp = send_file(path, mimetype=meta['mimetype'])
+        except (OSError, ValueError):
+            return None
+        resp.headers.update(meta['headers'])
+        return resp
+
+    def store(self, key, resp):
+        """Wrap ``resp`` so its body is written to the cache as it is sent.
+
+        The entry is committed only once the whole body has gone out, so a
+        dropped client never leaves a truncated result behind.
+        """
+        path = os.path.join(self.folder, key)
+        tmp = os.path.join(self.folder, f'.{key}.{uuid.uuid4().hex}')
+        meta = {
+            'mimetype': resp.mimetype,
+            'headers': {k: resp.headers[k] for k in CACHED_HEADERS if k in resp.headers},
+        }
+        source = resp.response
+        body = resp.iter_encoded()
+
+        def tee():
+            complete = False
+            try:
+                with open(tmp, 'wb') as f:
+                    for chunk in body:
+                        f.write(chunk)
+                        yield chunk
+                complete = True
+            finally:
+                if hasattr(source, 'close'):
+                    source.close()
+                if complete:
+                    with open(tmp + '.json', 'w') as f:
+                        json.dump(meta, f)
+                    os.replace(tmp + '.json', path + '.json')
+                    os.replace(tmp, path)
+                    self._evict()
+                elif os.path.exists(tmp):
+                    os.remove(tmp)
+
+        resp.response = tee()
+        resp.direct_passthrough = False
+        return resp
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.folder):
+            if entry.name.startswith('.') or entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        entries.sort()
+        while entries and total > self.max_bytes:
+            _, size, path = entries.pop(0)
+            for victim in (path, path + '.json'):
+                try:
+                    os.remove(victim)
+                except FileNotFoundError:
+                    pass
+            total -= size
@@ -0,0 +1,88 @@
+"""Per-request scratch space and spooled output buffers.
+
+Every request gets its own directory under the scratch folder, created on
+first use and removed when the request context is torn down. Outputs are
+written to a ``SpooledTemporaryFile`` that stays in memory until it grows
+past ``OUTPUT_SPOOL_BYTES`` and is then streamed straight into the response.
+"""
+import io
+import os
+import shutil
+import tempfile
+import unicodedata
+from urllib.parse import quote
+
+from flask import Response, current_app, g, send_file, stream_with_context
+
+OUTPUT_SPOOL_BYTES = int(os.getenv('OUTPUT_SPOOL_BYTES', str(16 * 1024 * 1024)))
+# Scratch left behind by requests that never tore down (killed workers) is
+# swept away after this long (see storage.py)
+SCRATCH_TTL = int(os.getenv('SCRATCH_TTL', '3600'))
+
+
+def init_app(app, folder):
+    folder = os.path.abspath(folder)
+    os.makedirs(folder, exist_ok=True)
+    app.config['SCRATCH_FOLDER'] = folder
+    app.teardown_request(_cleanup)
+
+
+def scratch_dir():
+    if 'scratch_dir' not in g:
+        g.scratch_dir = tempfile.mkdtemp(prefix='req-', dir=current_app.config['SCRATCH_FOLDER'])
+    return g.scratch_dir
+
+
+def scratch_path(name):
+    return os.path.join(scratch_dir(), name)
+
+
+def output_buffer():
+    return tempfile.SpooledTemporaryFile(max_size=OUTPUT_SPOOL_BYTES, dir=scratch_dir())
+
+
+def send_output(output, download_name, mimetype=None):
+    """Send ``output`` (bytes, a buffer or a scratch file path) as an attachment."""
+    if isinstance(output, str):
+        return send_file(output, as_attachment=True, download_name=download_name, mimetype=mimetype)
+    if isinstance(output, (bytes, bytearray)):
+        output = io.BytesIO(output)
+    elif isinstance(output, tempfile.SpooledTemporaryFile):
+        # Serve small outputs from memory; handing the spool itself to the
+        # server's sendfile() support would roll it over to disk first.
+        output.seek(0, os.SEEK_END)
+        if output.tell() <= OUTPUT_SPOOL_BYTES:
+            output.seek(0)
+            output = io.BytesIO(output.read())
+    output.seek(0)
+    return send_file(output, as_attachment=True, download_name=download_name, mimetype=mimetype)
+
+
+def send_stream(chunks, download_name, mimetype):
+    """Stream an iterable of byte chunks as an attachment.
+
+    The request context (and with it the scratch directory) stays alive
+    until the last chunk has been sent.
+    """
+    resp = Response(stream_with_context(chunks), mimetype=mimetype)
+    resp.headers.set('Content-Disposition', 'attachment', **_filenames(download_name))
+    return resp
+
+
+def _filenames(download_name):
+    """``Content-Disposition`` filename parameters, as ``send_file`` sets
+    them: non-ASCII names get an ASCII ``filename`` and a UTF-8
+    ``filename*``. Values are quoted where needed when the header is set."""
+    try:
+        download_name.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        return {'filename': simple, 'filename*': f"UTF-8''{quote(download_name, safe='!#$&+^`|~')}"}
+    return {'filename': download_name}
+
+
+def _cleanup(exc=None):
+    # Files already opened by send_file stay readable after the unlink
+    path = g.pop('scratch_dir', None)
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
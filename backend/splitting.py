@@ -0,0 +1,97 @@
+"""Split engine for the ``pdf-splitter`` tool.
+
+A split is planned as a list of parts, ``(entry_name, page_indices)``.
+Parts are written by workers of the CPU executor, each opening its own
+``fitz`` document, and reach the caller as chunks finish so the ZIP can
+be streamed while later parts are still being written.
+"""
+import math
+
+import executor
+from jobs import report_progress
+from page_ranges import parse_page_ranges
+
+# Upper bound on pages per task: small chunks let the first ZIP entries
+# go out sooner and balance uneven pages
+MAX_CHUNK_PAGES = 50
+
+
+def _part_name(pages):
+    first, last = pages[0] + 1, pages[-1] + 1
+    if len(pages) == 1:
+        return f'page_{first}.pdf'
+    if last - first + 1 == len(pages):
+        return f'pages_{first}-{last}.pdf'
+    return f'pages_{first}-{last}_{len(pages)}.pdf'
+
+
+def plan_parts(mode, page_count, every=1, ranges=''):
+    """Parts of a split: one per page (``all``), one per ``every``
+    consecutive pages (``every-n``) or one per comma separated item of
+    ``ranges`` such as ``1-3,7,10-`` (``ranges``). Raises ``ValueError``
+    for invalid options."""
+    if mode == 'all':
+        groups = [[i] for i in range(page_count)]
+    elif mode == 'every-n':
+        if every < 1:
+            raise ValueError('n must be at least 1')
+        groups = [list(range(i, min(i + every, page_count))) for i in range(0, page_count, every)]
+    elif mode == 'ranges':
+        items = [item for item in (ranges or '').split(',') if item.strip()]
+        if not items:
+            raise ValueError('No page ranges given')
+        groups = [parse_page_ranges(item, page_count) for item in items]
+    else:
+        raise ValueError(f'Unsupported mode: {mode}')
+    names = set()
+    parts = []
+    for pages in groups:
+        name = _part_name(pages)
+        n = 1
+        while name in names:
+            n += 1
+            name = f'{_part_name(pages)[:-4]}-{n}.pdf'
+        names.add(name)
+        parts.append((name, pages))
+    return parts
+
+
+def write_parts(input_path, parts):
+    """Return ``[(entry_name, pdf_bytes), ...]`` for ``parts``."""
+    import fitz
+    written = []
+    with fitz.open(input_path) as doc:
+        for name, pages in parts:
+            # Consecutive pages are copied in one call, sharing their resources
+            runs = []
+            for page in pages:
+                if runs and page == runs[-1][1] + 1:
+                    runs[-1][1] = page
+                else:
+                    runs.append([page, page])
+            part = fitz.open()
+            for start, end in runs:
+                part.insert_pdf(doc, from_page=start, to_page=end)
+            written.append((name, part.tobytes(garbage=1, deflate=True)))
+            part.close()
+    return written
+
+
+def iter_split(tool, input_path, parts):
+    """Yield ``(entry_name, pdf_bytes)`` for every part, in completion order."""
+    total = sum(len(pages) for _, pages in parts)
+    per_chunk = max(1, min(MAX_CHUNK_PAGES, math.ceil(total / (executor.CPU_WORKERS * 2))))
+    chunks = []
+    size = 0
+    for name, pages in parts:
+        if not chunks or size + len(pages) > per_chunk:
+            chunks.append([])
+            size = 0
+        chunks[-1].append((name, pages))
+        size += len(pages)
+    done = 0
+    for written in executor.map_unordered(tool, write_parts, [(input_path, chunk) for chunk in chunks]):
+        for entry in written:
+            yield entry
+        done += len(written)
+        report_progress(done, len(parts))
@@ -0,0 +1,115 @@
+"""Text stamping for the ``pdf-watermark`` and ``pdf-page-numbers`` tools.
+
+Text is drawn straight into each page's content stream with PyMuPDF in a
+single pass over the document. The base-14 font object is created once
+and shared by every page, instead of building, serializing and
+re-parsing a ReportLab overlay PDF per page.
+"""
+import math
+
+import fitz
+
+# Base-14 fonts, so nothing has to be embedded
+FONTS = {
+    'helvetica': 'helv',
+    'helvetica-bold': 'hebo',
+    'times': 'tiro',
+    'times-bold': 'tibo',
+    'courier': 'cour',
+    'courier-bold': 'cobo',
+}
+
+POSITIONS = (
+    'center', 'top-left', 'top-center', 'top-right',
+    'middle-left', 'middle-right', 'bottom-left', 'bottom-center', 'bottom-right',
+)
+
+WATERMARK_DEFAULTS = {
+    'position': 'center',
+    'opacity': 0.3,
+    'rotation': 45,
+    'font': 'helvetica',
+    'fontSize': 50,
+    'color': '#808080',
+}
+
+
+def hex_to_rgb(color_hex):
+    value = color_hex.lstrip('#')
+    if len(value) == 3:
+        value = ''.join(c * 2 for c in value)
+    if len(value) != 6:
+        raise ValueError(f'Invalid color: {color_hex}')
+    return tuple(int(value[i:i + 2], 16) / 255 for i in (0, 2, 4))
+
+
+def _stamp(page, text, width, anchor, fontname, font_size, color, opacity=1, rotation=0):
+    """Draw ``text`` centred on ``anchor``, a point in the visible (rotated) page."""
+    pivot = anchor * page.derotation_matrix
+    angle = (rotation + page.rotation) % 360
+    origin = fitz.Point(pivot.x - width / 2, pivot.y + font_size * 0.35)
+    page.insert_text(origin, text, fontsize=font_size, fontname=fontname, color=color,
+                     fill_opacity=opacity, morph=(pivot, fitz.Matrix(angle)) if angle else None)
+
+
+def _anchor(rect, position, width, font_size, margin, rotation=0):
+    """Centre point of a ``width`` wide line of text placed at ``position``.
+    The bounding box of the text turned by ``rotation`` degrees is what is
+    kept inside the margins."""
+    angle = math.radians(rotation)
+    cos, sin = abs(math.cos(angle)), abs(math.sin(angle))
+    half_w = (width * cos + font_size * sin) / 2
+    half_h = (width * sin + font_size * cos) / 2
+    if 'top' in position:
+        y = rect.y0 + margin + half_h
+    elif 'bottom' in position:
+        y = rect.y1 - margin - half_h
+    else:
+        y = rect.y0 + rect.height / 2
+    if 'left' in position:
+        x = rect.x0 + margin + half_w
+    elif 'right' in position:
+        x = rect.x1 - margin - half_w
+    else:
+        x = rect.x0 + rect.width / 2
+    return fitz.Point(x, y)
+
+
+def watermark_pdf(input_path, output_path, text, options=None):
+    opts = dict(WATERMARK_DEFAULTS, **(options or {}))
+    fontname = FONTS[opts['font']]
+    font_size = float(opts['fontSize'])
+    color = hex_to_rgb(opts['color'])
+    rotation = float(opts['rotation'])
+    width = fitz.get_text_length(text, fontname=fontname, fontsize=font_size)
+    doc = fitz.open(input_path)
+    try:
+        for page in doc:
+            anchor = _anchor(page.rect, opts['position'], width, font_size, 36, rotation)
+            _stamp(page, text, width, anchor, fontname, font_size, color,
+                   opacity=float(opts['opacity']), rotation=rotation)
+        doc.save(output_path, garbage=1, deflate=True)
+    finally:
+        doc.close()
+
+
+def number_pages(input_path, output_path, position, start_num, font_size, format_str, color_hex, font='helvetica'):
+    fontname = FONTS[font]
+    color = hex_to_rgb(color_hex)
+    doc = fitz.open(input_path)
+    try:
+        for i, page in enumerate(doc):
+            text = format_str.replace('{n}', str(i + start_num))
+            width = fitz.get_text_length(text, fontname=fontname, fontsize=font_size)
+            rect = page.rect
+            anchor = _anchor(rect, position, width, font_size, 30)
+            # Baselines as with the old ReportLab overlay: 20pt above the
+            # bottom edge or 30pt below the top edge
+            if 'bottom' in position:
+                anchor.y = rect.y1 - 20 - font_size * 0.35
+            elif 'top' in position:
+                anchor.y = rect.y0 + 30 - font_size * 0.35
+            _stamp(page, text, width, anchor, fontname, font_size, color)
+        doc.save(output_path, garbage=1, deflate=True)
+    finally:
+        doc.close()
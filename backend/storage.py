@@ -0,0 +1,213 @@
+"""Lifecycle of the files kept under ``UPLOAD_FOLDER``.
+
+Each store (scratch space, documents, resumable uploads, jobs, the result
+cache) owns a folder, registered here as an area. The entries of an area
+are its top-level files and directories, grouped by name up to the first
+dot so that a cached result and its ``.json`` sidecar are one entry. The
+last use of an entry is the newest mtime of the files in it. The
+filesystem is the index, so all gunicorn workers see the same state and
+nothing is lost on restart.
+
+A background sweeper removes entries idle for longer than their area's
+TTL and then, while the total is over ``STORAGE_QUOTA_BYTES``, the least
+recently used entries of evictable areas. A lock file keeps workers from
+sweeping at the same time.
+"""
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+
+# Total bytes kept under the root; 0 for no quota
+STORAGE_QUOTA_BYTES = int(os.getenv('STORAGE_QUOTA_BYTES', str(10 * 1024 * 1024 * 1024)))
+STORAGE_SWEEP_INTERVAL = int(os.getenv('STORAGE_SWEEP_INTERVAL', '60'))
+# Entries used more recently than this are never evicted to make room
+STORAGE_MIN_AGE = int(os.getenv('STORAGE_MIN_AGE', '60'))
+
+
+class Area:
+    """A folder owned by one store. ``ttl`` is the idle time after which
+    entries are removed (None to keep them); ``keep(path)`` protects
+    entries still in use from eviction, but not from the TTL."""
+
+    def __init__(self, name, folder, ttl=None, evictable=True, keep=None):
+        self.name = name
+        self.folder = os.path.abspath(folder)
+        self.ttl = ttl
+        self.evictable = evictable
+        self.keep = keep
+
+
+class _Entry:
+    def __init__(self, area):
+        self.area = area
+        self.paths = []
+        self.size = 0
+        self.last_used = 0
+
+    def add(self, size, mtime):
+        self.size += size
+        self.last_used = max(self.last_used, mtime)
+
+
+def _scan(area):
+    entries = {}
+    try:
+        items = list(os.scandir(area.folder))
+    except FileNotFoundError:
+        return []
+    for item in items:
+        entry = entries.setdefault(item.name.lstrip('.').split('.')[0], _Entry(area))
+        entry.paths.append(item.path)
+        try:
+            if not item.is_dir(follow_symlinks=False):
+                stat = item.stat(follow_symlinks=False)
+                entry.add(stat.st_size, stat.st_mtime)
+                continue
+            entry.add(0, item.stat(follow_symlinks=False).st_mtime)
+            for folder, _, files in os.walk(item.path):
+                for name in files:
+                    stat = os.lstat(os.path.join(folder, name))
+                    entry.add(stat.st_size, stat.st_mtime)
+        except FileNotFoundError:
+            # Removed while scanning
+            continue
+    return list(entries.values())
+
+
+def _remove(entry):
+    for path in entry.paths:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class StorageManager:
+    def __init__(self, root, quota=STORAGE_QUOTA_BYTES, interval=STORAGE_SWEEP_INTERVAL,
+                 min_age=STORAGE_MIN_AGE):
+        self.root = os.path.abspath(root)
+        self.quota = quota
+        self.interval = interval
+        self.min_age = min_age
+        self.areas = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        os.makedirs(self.root, exist_ok=True)
+
+    def add_area(self, name, folder, **options):
+        self.areas[name] = Area(name, folder, **options)
+
+    def start(self):
+        """Start the sweeper thread of this process (once per forked worker)."""
+        with self._lock:
+            if self._pid == os.getpid() or self.interval <= 0:
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._run, name='storage-sweeper', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f'Storage sweep failed: {e}')
+
+    def _locked(self, blocking):
+        """Open and lock the sweep lock file, or return None if another
+        process holds it and ``blocking`` is false."""
+        f = open(os.path.join(self.root, '.storage.lock'), 'w')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            f.close()
+            return None
+        return f
+
+    def sweep(self):
+        """Remove expired entries, then evict down to the quota. Returns
+        the stats of the sweep, or None if another worker is sweeping."""
+        lock = self._locked(blocking=False)
+        if lock is None:
+            return None
+        with lock:
+            started = time.time()
+            entries = [e for area in self.areas.values() for e in _scan(area)]
+            expired, live = [], []
+            for entry in entries:
+                ttl = entry.area.ttl
+                (expired if ttl is not None and entry.last_used < started - ttl else live).append(entry)
+            for entry in expired:
+                _remove(entry)
+            evicted = self._evict(live, 0)
+            stats = {
+                'time': started,
+                'seconds': round(time.time() - started, 3),
+                'expired': len(expired),
+                'evicted': len(evicted),
+                'freedBytes': sum(e.size for e in expired + evicted),
+            }
+            with open(os.path.join(self.root, '.storage.json'), 'w') as f:
+                json.dump(stats, f)
+        return stats
+
+    def make_room(self, nbytes):
+        """Evict least recently used entries until ``nbytes`` more fit in
+        the quota. Returns False if they cannot."""
+        if not self.quota:
+            return True
+        if nbytes > self.quota:
+            return False
+        with self._locked(blocking=True):
+            live = [e for area in self.areas.values() for e in _scan(area)]
+            evicted = self._evict(live, nbytes)
+            return sum(e.size for e in live) - sum(e.size for e in evicted) + nbytes <= self.quota
+
+    def _evict(self, live, nbytes):
+        total = sum(e.size for e in live)
+        if not self.quota or total + nbytes <= self.quota:
+            return []
+        cutoff = time.time() - self.min_age
+        candidates = sorted((e for e in live if e.area.evictable and e.last_used < cutoff),
+                            key=lambda e: e.last_used)
+        evicted = []
+        for entry in candidates:
+            if total + nbytes <= self.quota:
+                break
+            if entry.area.keep and entry.area.keep(entry.paths[0]):
+                continue
+            _remove(entry)
+            evicted.append(entry)
+            total -= entry.size
+        return evicted
+
+    def usage(self):
+        """Bytes and entries per area, the quota and the last sweep."""
+        now = time.time()
+        areas = {}
+        for area in self.areas.values():
+            entries = _scan(area)
+            areas[area.name] = {
+                'entries': len(entries),
+                'bytes': sum(e.size for e in entries),
+                'oldestIdle': round(now - min(e.last_used for e in entries)) if entries else 0,
+                'ttl': area.ttl,
+                'evictable': area.evictable,
+            }
+        try:
+            with open(os.path.join(self.root, '.storage.json')) as f:
+                last_sweep = json.load(f)
+        except (OSError, ValueError):
+            last_sweep = None
+        return {
+            'bytes': sum(a['bytes'] for a in areas.values()),
+            'quota': self.quota,
+            'areas': areas,
+            'lastSweep': last_sweep,
+        }
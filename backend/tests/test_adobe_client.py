@@ -0,0 +1,78 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import adobe
+from benchmarks.adobe_stub import AdobeStub
+
+
+@pytest.fixture
+def stub():
+    stub = AdobeStub(latency=0.1)
+    stub.start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'input.pdf'
+    path.write_bytes(b'%PDF-1.7 input')
+    return str(path)
+
+
+def test_convert(stub, source, tmp_path):
+    client = adobe.AdobeClient('id', 'secret', base=stub.base)
+    output = str(tmp_path / 'out.docx')
+    assert client.convert(source, output, 'exportpdf', 'pdf', targetFormat='docx') == output
+    with open(output, 'rb') as f:
+        assert f.read() == b'%PDF-1.7 input'
+
+
+def test_shared_token_and_concurrent_jobs(stub, source, tmp_path):
+    client = adobe.AdobeClient('id', 'secret', base=stub.base, concurrency=4)
+    outputs = [str(tmp_path / f'out-{n}') for n in range(8)]
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda out: client.convert(source, out, 'exportpdf', 'pdf'), outputs))
+    assert stub.calls['token'] == 1
+    assert stub.calls['jobs'] == 8
+
+
+def test_expired_token_is_refreshed(stub, source, tmp_path):
+    client = adobe.AdobeClient('id', 'secret', base=stub.base)
+    client.convert(source, str(tmp_path / 'a'), 'exportpdf', 'pdf')
+    stub.tokens.clear()
+    client.convert(source, str(tmp_path / 'b'), 'exportpdf', 'pdf')
+    assert stub.calls['token'] == 2
+
+
+def test_busy_when_slots_are_taken(stub, source, tmp_path, monkeypatch):
+    monkeypatch.setattr(adobe, 'ADOBE_QUEUE_WAIT', 0.01)
+    client = adobe.AdobeClient('id', 'secret', base=stub.base, concurrency=1)
+    stub.latency = 1
+    thread = threading.Thread(target=client.convert, args=(source, str(tmp_path / 'a'), 'exportpdf', 'pdf'))
+    thread.start()
+    try:
+        while stub.calls['jobs'] == 0:
+            time.sleep(0.01)
+        with pytest.raises(adobe.AdobeBusy):
+            client.convert(source, str(tmp_path / 'b'), 'exportpdf', 'pdf')
+    finally:
+        thread.join()
+
+
+def test_timeout(stub, source, tmp_path):
+    stub.latency = 1
+    client = adobe.AdobeClient('id', 'secret', base=stub.base)
+    with pytest.raises(adobe.AdobeError, match='No result within'):
+        client.convert(source, str(tmp_path / 'a'), 'exportpdf', 'pdf', timeout=0.3)
+
+
+def test_get_client_needs_credentials(monkeypatch):
+    monkeypatch.delenv('ADOBE_CLIENT_ID', raising=False)
+    assert adobe.get_client() is None
+    monkeypatch.setenv('ADOBE_CLIENT_ID', 'id')
+    monkeypatch.setenv('ADOBE_CLIENT_SECRET', 'secret')
+    assert adobe.get_client() is adobe.get_client()
@@ -0,0 +1,66 @@
+import asyncio
+import io
+
+import fitz
+import pytest
+
+pytest.importorskip('httpx')
+
+
+def _multipart(fields):
+    boundary = 'toolifyboundary'
+    body = io.BytesIO()
+    for name, (filename, data) in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                   f'filename="{filename}"\r\nContent-Type: application/pdf\r\n\r\n'.encode())
+        body.write(data + b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return f'multipart/form-data; boundary={boundary}', body.getvalue()
+
+
+def _call(app, path, content_type, body):
+    scope = {
+        'type': 'http', 'method': 'POST', 'path': path, 'query_string': b'', 'root_path': '',
+        'headers': [(b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode())],
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    return start['status'], dict(start['headers']), b''.join(m.get('body', b'') for m in sent[1:])
+
+
+def _timings(header):
+    timings = {}
+    for item in header.decode().split(', '):
+        name, dur = item.split(';dur=')
+        timings[name] = float(dur)
+    return timings
+
+
+def test_deferred_wait_is_timed(app, monkeypatch):
+    import asgi
+    import tools.convert
+    from benchmarks.adobe_stub import AdobeStub
+    stub = AdobeStub(latency=0.3)
+    monkeypatch.setattr(tools.convert, 'OCR_URL', stub.start() + '/parse/image')
+    monkeypatch.setattr(asgi, '_http', None)
+    doc = fitz.open()
+    doc.new_page()
+    try:
+        content_type, body = _multipart({'file': ('scan.pdf', doc.tobytes())})
+        status, headers, data = _call(asgi.app, '/api/process/pdf-ocr', content_type, body)
+    finally:
+        stub.stop()
+    assert status == 200, data
+    assert stub.calls['ocr'] == 1
+    timings = _timings(headers[b'server-timing'])
+    assert timings['ocr'] >= 300
+    assert timings['total'] >= timings['ocr'] + timings['upload']
@@ -0,0 +1,39 @@
+import tools
+from benchmarks.run import cases, percentile
+
+
+def test_every_tool_has_a_case():
+    assert {tool for tool, _, _ in cases({})} == set(tools.TOOLS)
+
+
+def test_percentile():
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile([1, 2], 90) == 1.9
+
+
+def test_fixtures_are_deterministic(tmp_path):
+    from benchmarks import fixtures
+    for name in ('a', 'b'):
+        fixtures.make_pdf(str(tmp_path / f'{name}.pdf'), pages=2)
+        fixtures.make_image(str(tmp_path / f'{name}.png'), 'png', 'small')
+    assert (tmp_path / 'a.pdf').read_bytes() == (tmp_path / 'b.pdf').read_bytes()
+    assert (tmp_path / 'a.png').read_bytes() == (tmp_path / 'b.png').read_bytes()
+
+
+def test_adobe_stub_round_trip():
+    import requests
+    from benchmarks.adobe_stub import AdobeStub
+    stub = AdobeStub(latency=0)
+    base = stub.start()
+    try:
+        token = requests.post(f'{base}/token').json()['access_token']
+        auth = {'Authorization': f'Bearer {token}'}
+        asset = requests.post(f'{base}/assets', headers=auth, json={}).json()
+        requests.put(asset['uploadUri'], data=b'%PDF-1.7')
+        job = requests.post(f'{base}/operation/exportpdf', headers=auth, json={'assetID': asset['assetID']})
+        status = requests.get(job.headers['location'], headers=auth).json()
+        assert status['status'] == 'done'
+        assert requests.get(status['asset']['downloadUri']).content == b'%PDF-1.7'
+        assert requests.post(f'{base}/parse/image').json()['ParsedResults'][0]['ParsedText']
+    finally:
+        stub.stop()
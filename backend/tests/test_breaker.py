@@ -0,0 +1,115 @@
+import io
+import time
+
+import fitz
+import pytest
+
+import breaker
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_opens_after_consecutive_failures():
+    circuit = CircuitBreaker('test', failures=3, reset=60)
+    for _ in range(2):
+        circuit.record_failure(RuntimeError('down'))
+    circuit.record_success(0.1)
+    for _ in range(2):
+        circuit.record_failure(RuntimeError('down'))
+    assert circuit.state == CLOSED
+    circuit.record_failure(RuntimeError('down'))
+    assert circuit.state == OPEN and not circuit.allow()
+    assert circuit.to_dict()['lastError'] == 'down'
+
+
+def test_opens_on_slow_p95():
+    circuit = CircuitBreaker('test', p95=1, window=10)
+    for _ in range(breaker.MIN_SAMPLES - 1):
+        circuit.record_success(5)
+    assert circuit.state == CLOSED
+    circuit.record_success(5)
+    assert circuit.state == OPEN
+
+
+def test_half_open_lets_one_probe_through():
+    circuit = CircuitBreaker('test', failures=1, reset=0.05)
+    circuit.record_failure(RuntimeError('down'))
+    assert not circuit.allow()
+    time.sleep(0.06)
+    assert circuit.allow()
+    assert circuit.state == HALF_OPEN and not circuit.allow()
+    circuit.record_failure(RuntimeError('still down'))
+    assert circuit.state == OPEN
+    time.sleep(0.06)
+    assert circuit.allow()
+    circuit.record_success(0.1)
+    assert circuit.state == CLOSED and circuit.allow()
+    assert list(circuit.latencies) == [0.1]
+
+
+def test_released_probe_can_be_retried():
+    circuit = CircuitBreaker('test', failures=1, reset=0)
+    circuit.record_failure(RuntimeError('down'))
+    assert circuit.allow()
+    circuit.release()
+    assert circuit.allow()
+
+
+def test_states_endpoint(client):
+    breaker.get('adobe')
+    states = client.get('/api/backends').get_json()
+    assert states['adobe']['state'] in (CLOSED, OPEN, HALF_OPEN)
+
+
+def test_open_adobe_circuit_goes_local(client, monkeypatch):
+    pytest.importorskip('pdf2docx')
+    monkeypatch.setenv('ADOBE_CLIENT_ID', 'id')
+    monkeypatch.setenv('ADOBE_CLIENT_SECRET', 'secret')
+    monkeypatch.setattr(breaker.get('adobe'), 'allow', lambda: False)
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), 'Hello')
+    resp = client.post('/api/process/pdf-to-word', data={'file': (io.BytesIO(doc.tobytes()), 'a.pdf')},
+                       headers={'Cache-Control': 'no-cache'})
+    assert resp.status_code == 200
+    assert resp.headers['X-Conversion-Method'] == 'pdf2docx'
+
+
+def test_race_loser_keeps_its_input(client, monkeypatch):
+    pytest.importorskip('pptx')
+    import adobe
+    from benchmarks.adobe_stub import AdobeStub
+    from tools import convert
+    stub = AdobeStub(latency=0)
+    stub.start()
+    try:
+        monkeypatch.setattr(adobe, 'ADOBE_RACE', True)
+        monkeypatch.setattr(adobe, 'get_client', lambda: adobe.AdobeClient('id', 'secret', base=stub.base))
+        finished = []
+        local = convert._pdf_to_powerpoint
+
+        def slow_local(tool, temp_input, output):
+            # Starts reading only after Adobe won and the request's scratch space is gone
+            time.sleep(0.5)
+            try:
+                local(tool, temp_input, output)
+            finally:
+                finished.append(output)
+
+        monkeypatch.setattr(convert, '_pdf_to_powerpoint', slow_local)
+        circuit = breaker.get('fitz+pptx')
+        failures = circuit.errors
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), 'Hello')
+        resp = client.post('/api/process/pdf-to-powerpoint', data={'file': (io.BytesIO(doc.tobytes()), 'a.pdf')},
+                           headers={'Cache-Control': 'no-cache'})
+        assert resp.status_code == 200
+        assert resp.headers['X-Conversion-Method'] == 'adobe'
+        resp.close()
+        deadline = time.monotonic() + 10
+        while not finished and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.1)
+        assert finished
+        assert circuit.errors == failures
+        assert breaker.get('adobe').failures == 0
+    finally:
+        stub.stop()
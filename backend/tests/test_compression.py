@@ -0,0 +1,58 @@
+import os
+
+import fitz
+import pytest
+
+from benchmarks.fixtures import make_pdf, make_scanned_pdf
+from compression import compress_pdf, find_images
+
+
+@pytest.fixture(scope='module')
+def scan(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('scan') / 'scan.pdf')
+    make_scanned_pdf(path, pages=2, dpi=200)
+    return path
+
+
+def test_find_images_targets_preset_dpi(scan):
+    images = find_images(scan, 72)
+    assert len(images) == 2
+    with fitz.open(scan) as doc:
+        page = doc[0].rect
+    for _, (width, height) in images:
+        # Drawn over the full page at 72 dpi: one pixel per point
+        assert width == pytest.approx(page.width, abs=2)
+        assert height == pytest.approx(page.height, abs=2)
+    # Never upsampled
+    xref, size = find_images(scan, 1200)[0]
+    with fitz.open(scan) as doc:
+        assert size == (int(doc.xref_get_key(xref, 'Width')[1]), int(doc.xref_get_key(xref, 'Height')[1]))
+
+
+@pytest.mark.parametrize('preset', ['screen', 'ebook'])
+def test_compress_pdf_shrinks_scans(scan, tmp_path, preset):
+    output = str(tmp_path / 'out.pdf')
+    assert compress_pdf('pdf-compress', scan, output, preset) == 2
+    assert os.path.getsize(output) < os.path.getsize(scan) / 2
+    with fitz.open(output) as doc:
+        assert len(doc) == 2
+        assert len(doc[0].get_images()) == 1
+
+
+def test_text_pdf_without_images(tmp_path):
+    path = str(tmp_path / 'doc.pdf')
+    make_pdf(path, pages=3)
+    output = str(tmp_path / 'out.pdf')
+    assert compress_pdf('pdf-compress', path, output) == 0
+    with fitz.open(output) as out, fitz.open(path) as src:
+        assert [p.get_text() for p in out] == [p.get_text() for p in src]
+
+
+def test_compress_api(client, scan):
+    with open(scan, 'rb') as f:
+        resp = client.post('/api/process/pdf-compress', data={'file': (f, 'scan.pdf'), 'preset': 'screen'})
+    assert resp.status_code == 200
+    assert int(resp.headers['X-Compressed-Size']) < int(resp.headers['X-Original-Size'])
+    assert resp.headers['X-Images-Recompressed'] == '2'
+    with open(scan, 'rb') as f:
+        assert client.post('/api/process/pdf-compress', data={'file': (f, 'scan.pdf'), 'preset': 'max'}).status_code == 400
@@ -0,0 +1,77 @@
+import pytest
+
+from converters import _cell
+
+
+@pytest.mark.parametrize('text, value', [
+    ('1,234.50', 1234.5),
+    ('(12)', -12),
+    ('-3', -3),
+    ('+4', 4),
+    ('7%', 0.07),
+    ('0.5', 0.5),
+    ('0', 0),
+    ('1,000', 1000),
+    ('123456789012345', 123456789012345),
+])
+def test_cell_numbers(text, value):
+    result = _cell(text)
+    assert result == value
+    assert type(result) is type(value)
+
+
+@pytest.mark.parametrize('text', ['007', '0012.5', '12345678901234567890', '1234567890123456', 'abc', '12.', '-'])
+def test_cell_keeps_text(text):
+    assert _cell(text) == text
+
+
+def test_cell_empty():
+    assert _cell(None) is None
+    assert _cell('  ') is None
+
+
+def _ruled_table_pdf(path):
+    import fitz
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 60), 'Quarterly report')
+    xs, ys = [72, 172, 272], [100, 120, 140, 160]
+    # Drawn as single lines, the way most generators rule tables
+    for x in xs:
+        page.draw_line((x, ys[0]), (x, ys[-1]))
+    for y in ys:
+        page.draw_line((xs[0], y), (xs[-1], y))
+    for r, row in enumerate([['Item', 'Qty'], ['Apples', '1,200'], ['Code', '007']]):
+        for c, text in enumerate(row):
+            page.insert_text((xs[c] + 5, ys[r] + 14), text)
+    page.insert_text((72, 200), 'Total 1,200')
+    doc.new_page().insert_text((72, 72), 'Notes')
+    doc.save(path)
+    return path
+
+
+def test_extract_tables_finds_ruled_tables(tmp_path):
+    from converters import extract_tables
+    pages = extract_tables(_ruled_table_pdf(str(tmp_path / 'in.pdf')), 0, 2)
+    assert pages == [
+        (0, [('text', [['Quarterly report']]),
+             ('table', [['Item', 'Qty'], ['Apples', 1200], ['Code', '007']]),
+             ('text', [['Total 1,200']])]),
+        (1, [('text', [['Notes']])]),
+    ]
+
+
+@pytest.mark.parametrize('sheets, names', [
+    ('page', ['Page 1', 'Page 2']),
+    ('table', ['Page 1 Table 1', 'Page 2']),
+])
+def test_write_workbook(tmp_path, sheets, names):
+    from openpyxl import load_workbook
+    from converters import extract_tables, write_workbook
+    pages = extract_tables(_ruled_table_pdf(str(tmp_path / 'in.pdf')), 0, 2)
+    write_workbook(pages, str(tmp_path / 'out.xlsx'), sheets)
+    workbook = load_workbook(str(tmp_path / 'out.xlsx'))
+    assert workbook.sheetnames == names
+    rows = list(workbook[names[0]].values)
+    assert ('Apples', 1200) in rows
+    assert ('Code', '007') in rows
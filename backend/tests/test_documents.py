@@ -0,0 +1,89 @@
+import os
+import time
+
+import pytest
+
+from benchmarks.fixtures import make_pdf
+from documents import DocumentNotFound, DocumentStore, HandleCache
+
+
+def test_handle_cache_reuses_and_evicts():
+    cache = HandleCache(max_items=2, max_bytes=100, ttl=60)
+    opened = []
+
+    def opener(key):
+        return lambda: opened.append(key) or key
+
+    for key in ('a', 'a', 'b', 'c', 'a'):
+        with cache.use(key, 10, opener(key)) as handle:
+            assert handle == key
+    # a is reopened after b and c pushed it out
+    assert opened == ['a', 'b', 'c', 'a']
+    assert cache.stats()['items'] == 2 and cache.stats()['hits'] == 1
+
+
+def test_handle_cache_byte_budget_and_ttl():
+    cache = HandleCache(max_items=10, max_bytes=15, ttl=0)
+    with cache.use('a', 10, lambda: 'a'):
+        pass
+    time.sleep(0.01)
+    with cache.use('b', 10, lambda: 'b'):
+        pass
+    assert cache.stats()['items'] == 1
+
+
+def test_store(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    source = tmp_path / 'source.pdf'
+    make_pdf(str(source), pages=3)
+    file_id = store.adopt(str(source), 'report.PDF')
+    assert file_id.endswith('.pdf') and not source.exists()
+    assert store.info(file_id) == {'fileId': file_id, 'size': os.path.getsize(store.path(file_id)), 'pages': 3}
+    assert store.page_count(file_id) == 3
+    with store.pdf_reader(file_id) as first:
+        pass
+    with store.pdf_reader(file_id) as second:
+        assert second is first
+    store.delete(file_id)
+    with pytest.raises(DocumentNotFound):
+        store.path(file_id)
+
+
+@pytest.mark.parametrize('file_id', ['', '../app.py', 'a' * 32 + '/x', '0' * 32])
+def test_bad_file_ids(tmp_path, file_id):
+    with pytest.raises(DocumentNotFound):
+        DocumentStore(str(tmp_path)).path(file_id)
+
+
+def test_document_api(client, tmp_path):
+    path = str(tmp_path / 'doc.pdf')
+    make_pdf(path, pages=4)
+    with open(path, 'rb') as f:
+        resp = client.post('/api/documents', data={'file': (f, 'doc.pdf')})
+    assert resp.status_code == 201
+    info = resp.get_json()
+    assert info['pages'] == 4
+    resp = client.post('/api/process/pdf-splitter', data={'fileId': info['fileId'], 'mode': 'count'})
+    assert resp.status_code == 200 and resp.get_json()['pages'] == 4
+    assert client.delete(f'/api/documents/{info["fileId"]}').status_code == 204
+    assert client.get(f'/api/documents/{info["fileId"]}').status_code == 404
+    resp = client.post('/api/process/pdf-rotate', data={'fileId': info['fileId']})
+    assert resp.status_code == 404
+
+
+def test_info_of_unreadable_pdf(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    (tmp_path / 'broken').write_bytes(b'not a pdf')
+    file_id = store.adopt(str(tmp_path / 'broken'), 'broken.pdf')
+    assert store.info(file_id) == {'fileId': file_id, 'size': 9}
+
+
+def test_delete_temporary_keeps_stored_documents(tmp_path):
+    from werkzeug.datastructures import FileStorage
+    import io
+    store = DocumentStore(str(tmp_path))
+    kept = store.save(FileStorage(io.BytesIO(b'kept'), 'kept.jpg'))
+    temp = store.save(FileStorage(io.BytesIO(b'temp'), 'temp.jpg'), temporary=True)
+    assert not store.is_temporary(kept) and store.is_temporary(temp)
+    store.delete_temporary([kept, temp, temp, 'f' * 32])
+    assert sorted(os.listdir(str(tmp_path))) == [kept]
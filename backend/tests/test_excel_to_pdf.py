@@ -0,0 +1,64 @@
+import fitz
+import pytest
+
+pytest.importorskip('reportlab')
+from openpyxl import Workbook  # noqa: E402
+
+import converters  # noqa: E402
+
+
+def _workbook(path, sheets):
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for title, rows in sheets:
+        sheet = workbook.create_sheet(title)
+        for row in rows:
+            sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def _pages(path):
+    with fitz.open(path) as doc:
+        return [(page.rect.width > page.rect.height, page.get_text()) for page in doc]
+
+
+def test_render_workbook_pages_every_sheet(tmp_path):
+    rows = [('Name', 'Count')] + [(f'row{n}', n) for n in range(150)]
+    source = _workbook(str(tmp_path / 'in.xlsx'), [('Data', rows), ('Empty', []), ('Notes', [('only',)])])
+    converters.render_workbook(source, str(tmp_path / 'out.pdf'))
+    pages = _pages(str(tmp_path / 'out.pdf'))
+    data = [text for _, text in pages if 'Data - page' in text]
+    assert len(data) > 1
+    # The header is repeated on every page and every row is drawn once
+    assert all({'Name', 'Count'} <= set(text.split('\n')) for text in data)
+    drawn = '\n'.join(data).split('\n')
+    assert all(drawn.count(f'row{n}') == 1 for n in range(150))
+    assert drawn.count('149') == 1
+    assert 'Empty - page' not in ''.join(text for _, text in pages)
+    # A single row is a body without a header
+    assert pages[-1][1].split('\n') == ['Notes - page 1', 'only', '']
+
+
+def test_render_workbook_fits_wide_sheets(tmp_path):
+    long_text = 'x' * 100
+    rows = [tuple(f'col{n}' for n in range(12)), tuple(long_text for _ in range(12))]
+    source = _workbook(str(tmp_path / 'in.xlsx'), [('Wide', rows)])
+    converters.render_workbook(source, str(tmp_path / 'out.pdf'))
+    [(landscape, text)] = _pages(str(tmp_path / 'out.pdf'))
+    assert landscape
+    cells = text.split('\n')
+    assert 'col11' in cells
+    # Cells are cut to the width of their column
+    assert all(0 < len(cell) < converters.MAX_CELL_CHARS for cell in cells if cell.startswith('x'))
+
+
+def test_excel_to_pdf_api(client, tmp_path, monkeypatch):
+    import io
+    monkeypatch.delenv('ADOBE_CLIENT_ID', raising=False)
+    source = _workbook(str(tmp_path / 'in.xlsx'), [('Sheet', [('a', 'b'), (1, 2)])])
+    with open(source, 'rb') as f:
+        resp = client.post('/api/process/excel-to-pdf', data={'file': (io.BytesIO(f.read()), 'in.xlsx')})
+    assert resp.status_code == 200
+    assert resp.headers['X-Conversion-Method'] == 'openpyxl+reportlab'
+    assert resp.data.startswith(b'%PDF')
@@ -0,0 +1,79 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import executor
+
+
+def test_parse_limits():
+    assert executor._parse_limits('pdf-to-word=1, pdf-to-jpg=2,') == {'pdf-to-word': 1, 'pdf-to-jpg': 2}
+    assert executor._parse_limits('') == {}
+
+
+def test_run_in_pool_worker():
+    assert executor.run('test', math.factorial, 20) == math.factorial(20)
+    if executor.EXECUTOR_BACKEND == 'process':
+        assert executor.run('test', os.getpid) != os.getpid()
+
+
+def test_map_unordered_returns_every_result():
+    results = executor.map_unordered('test', pow, [(2, n) for n in range(10)])
+    assert sorted(results) == [2 ** n for n in range(10)]
+
+
+@pytest.mark.parametrize('backend', ['inline', 'thread'])
+def test_backends(monkeypatch, backend):
+    monkeypatch.setattr(executor, 'EXECUTOR_BACKEND', backend)
+    monkeypatch.setattr(executor, '_pool', None)
+    try:
+        assert executor.run('test', pow, 3, 3) == 27
+        assert sorted(executor.map_unordered('test', pow, [(2, 1), (2, 2)])) == [2, 4]
+    finally:
+        if executor._pool is not None:
+            executor._pool.shutdown()
+
+
+def test_tool_slot_limits_concurrency(monkeypatch):
+    monkeypatch.setitem(executor.CPU_TOOL_LIMITS, 'limited', 1)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def hold():
+        with executor.tool_slot('limited'):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=hold) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(peak) == 1
+
+
+def test_cpu_limit_becomes_tool_timeout():
+    future = Future()
+    future.set_exception(executor._CpuTimeExceeded())
+    with pytest.raises(executor.ToolTimeout, match='pdf-to-word exceeded'):
+        executor._result('pdf-to-word', None, future)
+
+
+@pytest.mark.skipif(executor.EXECUTOR_BACKEND != 'process', reason='needs the process pool')
+def test_dead_worker_fails_only_its_call():
+    with pytest.raises(executor.WorkerCrashed, match='test worker process terminated'):
+        executor.run('test', os._exit, 1)
+    assert executor.run('test', pow, 2, 3) == 8
+    # A pool broken behind the executor's back is replaced on submit
+    pool = executor.get_pool()
+    pool.submit(os._exit, 1).exception()
+    assert executor.run('test', pow, 2, 4) == 16
+    assert executor.get_pool() is not pool
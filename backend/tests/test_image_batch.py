@@ -0,0 +1,55 @@
+import io
+import json
+import zipfile
+
+from PIL import Image
+
+
+def _image(fmt, size=(64, 48)):
+    buf = io.BytesIO()
+    Image.new('RGB', size, (200, 40, 40)).save(buf, fmt)
+    return buf.getvalue()
+
+
+def _post(client, files, **fields):
+    data = dict(fields, files=[(io.BytesIO(body), name) for name, body in files])
+    return client.post('/api/process/image-compressor-batch', data=data)
+
+
+def test_batch_zip_and_manifest(client):
+    files = [('a.png', _image('PNG')), ('a.jpg', _image('JPEG')), ('b.gif', b'GIF89a broken'),
+             ('c.webp', _image('WEBP'))]
+    resp = _post(client, files, settings=json.dumps({'format': 'jpg', 'quality': 60}))
+    assert resp.status_code == 200
+    assert resp.mimetype == 'application/zip'
+    with zipfile.ZipFile(io.BytesIO(resp.data)) as archive:
+        names = archive.namelist()
+        manifest = json.loads(archive.read('manifest.json'))
+        assert names[-1] == 'manifest.json'
+        # a.png and a.jpg both compress to a.jpg; the second is renamed
+        assert sorted(names[:-1]) == ['a-2.jpg', 'a.jpg', 'c.jpg']
+        for row in manifest:
+            if 'output' in row:
+                assert archive.getinfo(row['output']).file_size == row['compressedSize']
+                assert Image.open(io.BytesIO(archive.read(row['output']))).format == 'JPEG'
+    rows = {row['name']: row for row in manifest}
+    assert set(rows) == {'a.png', 'a.jpg', 'b.gif', 'c.webp'}
+    assert rows['a.png']['originalSize'] == len(files[0][1])
+    assert 'error' in rows['b.gif'] and 'output' not in rows['b.gif']
+    assert all(row['seconds'] >= 0 for row in manifest)
+
+
+def test_batch_target_with_png_fails_per_file(client):
+    resp = _post(client, [('a.png', _image('PNG')), ('b.jpg', _image('JPEG'))], targetBytes='500')
+    assert resp.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(resp.data)) as archive:
+        rows = {row['name']: row for row in json.loads(archive.read('manifest.json'))}
+    assert 'error' in rows['a.png']
+    assert rows['b.jpg']['output'] == 'b.jpg'
+
+
+def test_batch_errors(client):
+    assert _post(client, [('a.png', _image('PNG'))], settings='[1]').status_code == 400
+    assert _post(client, []).status_code == 400
+    resp = client.post('/api/process/image-compressor-batch', data={'fileIds': 'missing'})
+    assert resp.status_code == 400
@@ -0,0 +1,132 @@
+import io
+
+import fitz
+import pytest
+from PIL import Image, ImageOps
+
+from imagepdf import PAGE_SIZES, images_to_pdf
+
+# Quadrant colours far enough apart to survive JPEG compression
+COLOURS = [(255, 0, 0), (0, 0, 255), (0, 255, 0), (255, 255, 0)]
+
+
+def _quadrants(width=80, height=40):
+    img = Image.new('RGB', (width, height))
+    for n, colour in enumerate(COLOURS):
+        x, y = (n % 2) * width // 2, (n // 2) * height // 2
+        img.paste(colour, (x, y, x + width // 2, y + height // 2))
+    return img
+
+
+def _jpeg(img, orientation=1):
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    buf = io.BytesIO()
+    img.save(buf, 'JPEG', quality=95, exif=exif.tobytes())
+    return buf.getvalue()
+
+
+def _pdf(sources, **options):
+    output = io.BytesIO()
+    images_to_pdf([io.BytesIO(s) for s in sources], output, **options)
+    return fitz.open('pdf', output.getvalue())
+
+
+def _rendered(page):
+    pix = page.get_pixmap()
+    return Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+
+
+def _close(a, b):
+    return all(abs(x - y) < 60 for x, y in zip(a, b))
+
+
+@pytest.mark.parametrize('orientation', range(1, 9))
+def test_jpeg_orientation(orientation):
+    data = _jpeg(_quadrants(), orientation)
+    expected = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    with _pdf([data]) as doc:
+        page = doc[0]
+        assert (page.rect.width, page.rect.height) == expected.size
+        rendered = _rendered(page)
+        for x in (0.25, 0.75):
+            for y in (0.25, 0.75):
+                point = (int(expected.width * x), int(expected.height * y))
+                assert _close(rendered.getpixel(point), expected.getpixel(point))
+
+
+def test_jpeg_is_embedded_unchanged():
+    data = _jpeg(_quadrants(), 6)
+    with _pdf([data]) as doc:
+        [image] = doc[0].get_images()
+        extracted = doc.extract_image(image[0])
+    assert extracted['ext'] == 'jpeg'
+    assert extracted['image'] == data
+
+
+def test_transparent_png_on_white():
+    img = Image.new('RGBA', (20, 20), (0, 0, 0, 0))
+    img.paste((0, 0, 255, 255), (0, 0, 10, 20))
+    buf = io.BytesIO()
+    img.save(buf, 'PNG')
+    with _pdf([buf.getvalue()]) as doc:
+        rendered = _rendered(doc[0])
+    assert rendered.getpixel((5, 10)) == (0, 0, 255)
+    assert rendered.getpixel((15, 10)) == (255, 255, 255)
+
+
+def test_page_size_and_fit():
+    wide = _jpeg(_quadrants(80, 40))
+    with _pdf([wide, _jpeg(_quadrants(40, 80))], page_size='a4', margin=20) as doc:
+        # Wide images get a landscape page
+        assert (doc[0].rect.width, doc[0].rect.height) == pytest.approx(PAGE_SIZES['a4'][::-1], abs=0.01)
+        assert (doc[1].rect.width, doc[1].rect.height) == pytest.approx(PAGE_SIZES['a4'], abs=0.01)
+        [box] = [doc[0].get_image_rects(xref)[0] for xref, *_ in doc[0].get_images()]
+        # contain keeps the aspect ratio inside the margins
+        assert box.width / box.height == pytest.approx(2, rel=0.01)
+        assert box.x0 >= 19.9 and box.x1 <= PAGE_SIZES['a4'][1] - 19.9
+    with _pdf([wide], page_size='a4', fit='stretch') as doc:
+        [box] = [doc[0].get_image_rects(xref)[0] for xref, *_ in doc[0].get_images()]
+        assert tuple(box) == pytest.approx(tuple(doc[0].rect), abs=0.01)
+
+
+def test_jpg_to_pdf_api(client):
+    data = {'files': [(io.BytesIO(_jpeg(_quadrants(), 6)), 'a.jpg'), (io.BytesIO(_jpeg(_quadrants())), 'b.jpg')],
+            'pageSize': 'letter'}
+    resp = client.post('/api/process/jpg-to-pdf', data=data)
+    assert resp.status_code == 200
+    with fitz.open('pdf', resp.data) as doc:
+        assert len(doc) == 2
+        assert doc[0].rect.width < doc[0].rect.height
+    resp = client.post('/api/process/jpg-to-pdf', data={'files': (io.BytesIO(_jpeg(_quadrants())), 'a.jpg'),
+                                                            'fit': 'tile'})
+    assert resp.status_code == 400
+
+
+def test_jpg_to_pdf_deletes_only_temporary_uploads(client):
+    def temp_upload():
+        resp = client.post('/api/process/jpg-to-pdf', data={'file': (io.BytesIO(_jpeg(_quadrants())), 'a.jpg')},
+                           headers={'X-Temp-Upload': '1'})
+        return resp.get_json()['fileId']
+
+    stored = client.post('/api/documents', data={'file': (io.BytesIO(_jpeg(_quadrants())), 'b.jpg')}).get_json()
+    # The same images twice: the second request must not skip the deletion on a cache hit
+    for _ in range(2):
+        temp = temp_upload()
+        resp = client.post('/api/process/jpg-to-pdf', data={'fileIds': [temp, stored['fileId']]})
+        assert resp.status_code == 200
+        assert resp.headers['X-Cache'] == 'BYPASS'
+        assert client.get(f'/api/documents/{temp}').status_code == 404
+        assert client.get(f'/api/documents/{stored["fileId"]}').status_code == 200
+    temp = temp_upload()
+    resp = client.post('/api/process/jpg-to-pdf', data={'fileIds': temp, 'keepFiles': 'true'})
+    assert resp.status_code == 200
+    assert client.get(f'/api/documents/{temp}').status_code == 200
+
+
+@pytest.mark.parametrize('page_size, margin', [('auto', 'inf'), ('auto', '5000'), ('a4', '298'), ('letter', '400')])
+def test_jpg_to_pdf_rejects_oversized_margins(client, page_size, margin):
+    resp = client.post('/api/process/jpg-to-pdf', data={'files': (io.BytesIO(_jpeg(_quadrants())), 'a.jpg'),
+                                                        'pageSize': page_size, 'margin': margin})
+    assert resp.status_code == 400
+    assert 'margin must be' in resp.get_json()['error']
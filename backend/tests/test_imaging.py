@@ -0,0 +1,77 @@
+import io
+
+import pytest
+from PIL import Image
+
+import imaging
+from benchmarks.fixtures import make_image
+from tools.images import _compress_options
+
+
+@pytest.fixture(scope='module')
+def photo(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('images') / 'photo.jpg')
+    make_image(path, 'jpg', 'small')
+    return path
+
+
+def test_output_format():
+    assert imaging.output_format('png', 'original') == ('png', 'PNG')
+    assert imaging.output_format('png', 'webp') == ('webp', 'WEBP')
+    assert imaging.output_format('bmp', 'original') == ('jpg', 'JPEG')
+
+
+def test_search_quality_fits_budget(photo):
+    img = Image.open(photo)
+    img.load()
+    full = imaging._encode(img, 'JPEG', 95)
+    data, quality = imaging.search_quality(img, 'JPEG', 95, target_bytes=len(full) // 3)
+    assert len(data) <= len(full) // 3
+    assert imaging.MIN_QUALITY <= quality < 95
+    assert Image.open(io.BytesIO(data)).size == img.size
+
+
+def test_search_quality_floor_wins(photo):
+    img = Image.open(photo)
+    img.load()
+    _, quality = imaging.search_quality(img, 'JPEG', 95, target_bytes=1, min_ssim=0.9)
+    assert quality > imaging.MIN_QUALITY
+    assert imaging._ssim(img, imaging._encode(img, 'JPEG', quality)) >= 0.85
+
+
+def test_target_with_png_output_is_refused(photo):
+    options = _compress_options({'format': 'png', 'targetBytes': '10000'})
+    with pytest.raises(ValueError):
+        imaging.compress_image(photo, 'jpg', options)
+    name, data, row = imaging.compress_batch_item(photo, 'photo.jpg', options)
+    assert data is None and 'targetBytes' in row['error']
+
+
+def test_compressor_rejects_png_target(client, photo):
+    with open(photo, 'rb') as f:
+        resp = client.post('/api/process/image-compressor',
+                           data={'file': (f, 'photo.jpg'), 'format': 'png', 'targetBytes': '10000'})
+    assert resp.status_code == 400
+    assert 'JPEG or WebP' in resp.get_json()['error']
+
+
+@pytest.mark.parametrize('field, value', [
+    ('targetQuality', '90'), ('targetQuality', '-0.1'), ('targetQuality', 'high'), ('targetQuality', 'nan'),
+    ('targetBytes', '-1'), ('targetBytes', '1.5'), ('targetBytes', 'big'),
+])
+def test_invalid_targets_are_refused(client, photo, field, value):
+    with pytest.raises(ValueError, match=field):
+        _compress_options({field: value})
+    with open(photo, 'rb') as f:
+        resp = client.post('/api/process/image-compressor', data={'file': (f, 'photo.jpg'), field: value})
+    assert resp.status_code == 400
+    assert field in resp.get_json()['error']
+    with open(photo, 'rb') as f:
+        resp = client.post('/api/process/image-compressor-batch',
+                           data={'files': (f, 'photo.jpg'), 'settings': f'{{"{field}": "{value}"}}'})
+    assert resp.status_code == 400
+
+
+def test_target_bounds_are_accepted():
+    options = _compress_options({'targetQuality': '1', 'targetBytes': '0'})
+    assert (options['targetQuality'], options['targetBytes']) == (1, 0)
@@ -0,0 +1,100 @@
+import io
+
+import fitz
+import pytest
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+import ingest
+import tools
+
+
+def _pdf(pages):
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page()
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_check_format_messages():
+    ingest.check_format(b'%PDF-1.7', ('pdf',))
+    with pytest.raises(UnsupportedMediaType) as e:
+        ingest.check_format(b'%PDF-1.7', ('image',))
+    assert e.value.description == 'Expected an image file'
+    with pytest.raises(UnsupportedMediaType) as e:
+        ingest.check_format(b'hello', ('pdf', 'office'))
+    assert e.value.description == 'Expected a PDF file or an Office document (DOCX, XLSX or PPTX)'
+
+
+
+def test_ingest_file_spills_and_hashes(tmp_path, monkeypatch):
+    import hashlib
+    monkeypatch.setattr(ingest, 'INGEST_SPOOL_BYTES', 10)
+    data = _pdf(2)
+    stream = ingest.IngestFile(('pdf',), 5, str(tmp_path))
+    stream.write(data)
+    stream.seek(0)
+    assert stream.path and stream.size == len(data)
+    assert stream.sha256 == hashlib.sha256(data).hexdigest()
+
+
+def test_ingest_file_page_limit(tmp_path):
+    stream = ingest.IngestFile(('pdf',), 2, str(tmp_path))
+    stream.write(_pdf(3))
+    with pytest.raises(RequestEntityTooLarge):
+        stream.seek(0)
+
+
+def test_check_stored(tmp_path):
+    path = tmp_path / 'doc.pdf'
+    path.write_bytes(_pdf(3))
+    ingest.check_stored(str(path), tools.get('pdf-rotate'))
+    with pytest.raises(UnsupportedMediaType):
+        ingest.check_stored(str(path), tools.get('image-compressor'))
+    with pytest.raises(RequestEntityTooLarge):
+        ingest.check_stored(str(path), tools.Tool('t', 'pdf', accepts=('pdf',), max_pages=2))
+    with pytest.raises(RequestEntityTooLarge):
+        ingest.check_stored(str(path), tools.Tool('t', 'pdf', max_input_bytes=10))
+
+
+def test_upload_of_wrong_type(client):
+    resp = client.post('/api/process/image-compressor', data={'file': (io.BytesIO(_pdf(1)), 'a.jpg')})
+    assert resp.status_code == 415
+    assert resp.get_json() == {'error': 'Expected an image file'}
+
+
+def test_stored_document_is_checked(client):
+    resp = client.post('/api/documents', data={'file': (io.BytesIO(_pdf(1)), 'a.pdf')})
+    file_id = resp.get_json()['fileId']
+    resp = client.post('/api/process/image-compressor', data={'fileId': file_id})
+    assert resp.status_code == 415
+    assert resp.get_json() == {'error': 'Expected an image file'}
+    resp = client.post('/api/process/pdf-rotate', data={'fileId': file_id, 'angle': '90'})
+    assert resp.status_code == 200
+
+
+def test_stored_document_over_page_limit(client, monkeypatch):
+    resp = client.post('/api/documents', data={'file': (io.BytesIO(_pdf(3)), 'a.pdf')})
+    file_id = resp.get_json()['fileId']
+    monkeypatch.setattr(tools.get('pdf-rotate'), 'max_pages', 2)
+    resp = client.post('/api/process/pdf-rotate', data={'fileId': file_id, 'angle': '90'})
+    assert resp.status_code == 413
+    assert resp.get_json() == {'error': 'PDF has 3 pages; the limit is 2'}
+
+
+def test_batch_reports_non_images_per_file(client):
+    import json
+    import zipfile
+    from PIL import Image
+    image = io.BytesIO()
+    Image.new('RGB', (32, 32), 'red').save(image, 'PNG')
+    image.seek(0)
+    resp = client.post('/api/process/image-compressor-batch', data={
+        'files': [(image, 'red.png'), (io.BytesIO(_pdf(1)), 'doc.pdf')],
+    }, headers={'Cache-Control': 'no-cache'})
+    assert resp.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(resp.get_data())) as z:
+        manifest = {row['name']: row for row in json.loads(z.read('manifest.json'))}
+    assert 'output' in manifest['red.png']
+    assert 'error' in manifest['doc.pdf']
@@ -0,0 +1,113 @@
+import io
+import os
+import threading
+import time
+
+import fitz
+import pytest
+
+from jobs import JobQueue, QueueFull, report_progress
+
+
+def _wait(queue, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job.status not in ('queued', 'running'):
+            return job
+        time.sleep(0.02)
+    raise AssertionError('job did not finish')
+
+
+def test_job_runs_and_reports_progress(tmp_path):
+    queue = JobQueue(str(tmp_path))
+
+    def work(result_path):
+        report_progress(1, 2)
+        with open(result_path, 'wb') as f:
+            f.write(b'done')
+        return 200, 'text/plain', {'X-Test': '1'}
+
+    job = queue.submit(queue.create('tool'), work)
+    job = _wait(queue, job.id)
+    assert (job.status, job.progress, job.headers) == ('done', 100, {'X-Test': '1'})
+    with open(queue.result_path(job.id), 'rb') as f:
+        assert f.read() == b'done'
+    # Another worker process sees the same state through job.json
+    other = JobQueue(str(tmp_path))
+    assert other.get(job.id).to_dict() == job.to_dict()
+
+
+def test_failed_job(tmp_path):
+    queue = JobQueue(str(tmp_path))
+
+    def work(result_path):
+        raise RuntimeError('boom')
+
+    job = _wait(queue, queue.submit(queue.create('tool'), work).id)
+    assert (job.status, job.error) == ('failed', 'boom')
+
+
+def test_queue_limit(tmp_path):
+    queue = JobQueue(str(tmp_path), workers=1, limit=1)
+    release = threading.Event()
+    job = queue.submit(queue.create('tool'), lambda path: release.wait() and (200, None, {}))
+    with pytest.raises(QueueFull):
+        queue.create('tool')
+    release.set()
+    _wait(queue, job.id)
+    queue.create('tool')
+
+
+def test_failed_submit_gives_back_the_slot(tmp_path):
+    queue = JobQueue(str(tmp_path), limit=1)
+    job = queue.create('tool')
+    with open(os.path.join(queue.job_dir(job.id), 'input_0'), 'wb') as f:
+        f.write(b'partial')
+    queue.fail(job, 'No space left on device')
+    assert os.listdir(queue.job_dir(job.id)) == ['job.json']
+    stored = JobQueue(str(tmp_path)).get(job.id)
+    assert (stored.status, stored.error) == ('failed', 'No space left on device')
+    queue.create('tool')
+
+
+def test_unknown_job_ids(tmp_path):
+    queue = JobQueue(str(tmp_path))
+    assert queue.get('../etc') is None
+    assert queue.get('0' * 32) is None
+
+
+def test_job_api(client):
+    doc = fitz.open()
+    for _ in range(3):
+        doc.new_page()
+    resp = client.post('/api/jobs/pdf-page-numbers', data={'file': (io.BytesIO(doc.tobytes()), 'a.pdf')})
+    assert resp.status_code == 202
+    location = resp.headers['Location']
+    deadline = time.monotonic() + 30
+    while client.get(location).get_json()['status'] in ('queued', 'running'):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert client.get(location).get_json()['status'] == 'done'
+    result = client.get(location + '/result')
+    assert result.status_code == 200
+    assert result.get_data().startswith(b'%PDF-')
+
+
+def test_job_api_upload_failure(client, monkeypatch):
+    import app as app_module
+    queue = app_module.job_queue
+    pending = queue._pending
+
+    def disk_full(file, path):
+        raise OSError(28, 'No space left on device')
+
+    doc = fitz.open()
+    doc.new_page()
+    monkeypatch.setattr(app_module, 'save_upload', disk_full)
+    # The test client re-raises what would be a 500
+    with pytest.raises(OSError):
+        client.post('/api/jobs/pdf-page-numbers', data={'file': (io.BytesIO(doc.tobytes()), 'a.pdf')})
+    assert queue._pending == pending
+    failed = [job for job in queue._jobs.values() if job.error and 'No space left' in job.error]
+    assert failed and failed[0].status == 'failed'
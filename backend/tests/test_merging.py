@@ -0,0 +1,74 @@
+import fitz
+import pytest
+
+from merging import _runs, merge_pdfs
+from page_ranges import parse_page_ranges
+
+
+def _labelled_pdf(path, label, pages, toc=True):
+    doc = fitz.open()
+    for n in range(1, pages + 1):
+        doc.new_page().insert_text((72, 72), f'{label}{n}')
+    if toc:
+        doc.set_toc([[1, f'{label} start', 1], [2, f'{label} page 2', 2]])
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _labels(data_or_path):
+    doc = fitz.open(data_or_path) if isinstance(data_or_path, str) else fitz.open(stream=data_or_path)
+    try:
+        return [page.get_text().strip() for page in doc], doc.get_toc(simple=True)
+    finally:
+        doc.close()
+
+
+@pytest.mark.parametrize('spec, pages', [
+    ('', [0, 1, 2, 3, 4]),
+    ('all', [0, 1, 2, 3, 4]),
+    ('1-3,5', [0, 1, 2, 4]),
+    ('4-', [3, 4]),
+    ('-2', [0, 1]),
+    ('5,1,1,3-4', [4, 0, 2, 3]),
+    ('2-9', [1, 2, 3, 4]),
+])
+def test_parse_page_ranges(spec, pages):
+    assert parse_page_ranges(spec, 5) == pages
+
+
+@pytest.mark.parametrize('spec', ['0', '6', '3-1', 'a', '1-x', ','])
+def test_parse_page_ranges_errors(spec):
+    with pytest.raises(ValueError):
+        parse_page_ranges(spec, 5)
+
+
+def test_runs():
+    assert _runs([0, 1, 2, 5, 4, 3, 7]) == [(0, 2), (5, 3), (7, 7)]
+    assert _runs([2, 2]) == [(2, 2), (2, 2)]
+
+
+def test_merge_pdfs(tmp_path):
+    a = _labelled_pdf(str(tmp_path / 'a.pdf'), 'A', 3)
+    b = _labelled_pdf(str(tmp_path / 'b.pdf'), 'B', 4)
+    output = str(tmp_path / 'out.pdf')
+    merge_pdfs([(a, [2, 0]), (b, [1, 2, 3])], output)
+    labels, toc = _labels(output)
+    assert labels == ['A3', 'A1', 'B2', 'B3', 'B4']
+    # Outline entries follow their pages; the dropped page's entry goes away
+    assert toc == [[1, 'A start', 2], [2, 'B page 2', 3]]
+
+
+def test_merger_api_with_ranges(client, tmp_path):
+    a = _labelled_pdf(str(tmp_path / 'a.pdf'), 'A', 3, toc=False)
+    b = _labelled_pdf(str(tmp_path / 'b.pdf'), 'B', 2, toc=False)
+    with open(a, 'rb') as fa, open(b, 'rb') as fb:
+        resp = client.post('/api/process/pdf-merger', data={
+            'files': [(fa, 'a.pdf'), (fb, 'b.pdf')], 'ranges': ['3,1', ''],
+        })
+    assert resp.status_code == 200
+    assert _labels(resp.get_data())[0] == ['A3', 'A1', 'B1', 'B2']
+    with open(a, 'rb') as fa:
+        resp = client.post('/api/process/pdf-merger', data={'files': [(fa, 'a.pdf')], 'ranges': ['7']})
+    assert resp.status_code == 400
+    assert resp.get_json()['error'].startswith('File 1:')
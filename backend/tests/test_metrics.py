@@ -0,0 +1,70 @@
+import metrics
+import tools
+
+
+def _sample(name, **labels):
+    prefix = name + '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '} '
+    for line in metrics.render().splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0
+
+
+def test_server_timing(client):
+    resp = client.post('/api/process/word-counter', data={'text': 'one two three'})
+    assert resp.status_code == 200
+    timing = resp.headers['Server-Timing']
+    assert 'upload;dur=' in timing and 'total;dur=' in timing
+
+
+def test_oversized_body_is_counted(client):
+    before = _sample('toolify_requests_total', tool='word-counter', status='413')
+    errors = _sample('toolify_request_errors_total', tool='word-counter')
+    resp = client.post('/api/process/word-counter', data={'text': 'x' * (tools.TEXT_LIMIT + 1)})
+    assert resp.status_code == 413
+    assert resp.get_json() == {'error': 'Input larger than 10 MB'}
+    assert 'upload;' not in resp.headers['Server-Timing']
+    assert _sample('toolify_requests_total', tool='word-counter', status='413') == before + 1
+    assert _sample('toolify_request_errors_total', tool='word-counter') == errors + 1
+
+
+def test_histogram_and_counter_render():
+    counter = metrics.Counter('test_total', 'Test counter.', ('tool',))
+    histogram = metrics.Histogram('test_seconds', 'Test histogram.', ('tool',), (0.1, 1))
+    try:
+        counter.inc(tool='a"b')
+        histogram.observe(0.5, tool='x')
+        histogram.observe(2, tool='x')
+        text = metrics.render()
+    finally:
+        metrics._metrics.remove(counter)
+        metrics._metrics.remove(histogram)
+    assert '# TYPE test_total counter\ntest_total{tool="a\\"b"} 1' in text
+    for line in ('test_seconds_bucket{tool="x",le="0.1"} 0', 'test_seconds_bucket{tool="x",le="1"} 1',
+                 'test_seconds_bucket{tool="x",le="+Inf"} 2', 'test_seconds_sum{tool="x"} 2.5',
+                 'test_seconds_count{tool="x"} 2'):
+        assert line in text
+
+
+def test_metrics_endpoint_counts_tools(client):
+    # Stage histograms are filled when the response is closed
+    client.post('/api/process/hash-generator', data={'text': 'abc'}).close()
+    resp = client.get('/api/metrics')
+    assert resp.mimetype == 'text/plain'
+    assert _sample('toolify_requests_total', tool='hash-generator', status='200') >= 1
+    assert 'toolify_stage_seconds_count{tool="hash-generator",stage="send"}' in resp.get_data(as_text=True)
+
+
+def test_stages_in_server_timing(client):
+    import fitz
+    import io
+    doc = fitz.open()
+    doc.new_page()
+    resp = client.post('/api/process/pdf-to-jpg', data={'file': (io.BytesIO(doc.tobytes()), 'a.pdf'), 'dpi': '36'},
+                       headers={'Cache-Control': 'no-cache'})
+    assert resp.status_code == 200
+    assert 'parse;dur=' in resp.headers['Server-Timing']
+    resp.get_data()
+    resp.close()
+    text = client.get('/api/metrics').get_data(as_text=True)
+    assert 'toolify_stage_seconds_count{tool="pdf-to-jpg",stage="render"}' in text
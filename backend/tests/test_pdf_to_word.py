@@ -0,0 +1,72 @@
+import io
+
+import fitz
+import pytest
+
+pytest.importorskip('docx')
+from docx import Document  # noqa: E402
+
+import converters  # noqa: E402
+
+
+def _docx(path, texts, image=None):
+    doc = Document()
+    for text in texts:
+        doc.add_paragraph(text)
+    if image:
+        doc.add_picture(image)
+    doc.save(path)
+    return path
+
+
+def _texts(source):
+    return [p.text for p in Document(source).paragraphs if p.text]
+
+
+def test_merge_docx_keeps_order_and_images(tmp_path):
+    from PIL import Image
+    image = str(tmp_path / 'dot.png')
+    Image.new('RGB', (8, 8), 'blue').save(image)
+    parts = [_docx(str(tmp_path / 'a.docx'), ['one', 'two']),
+             _docx(str(tmp_path / 'b.docx'), ['three'], image=image),
+             _docx(str(tmp_path / 'c.docx'), ['four'])]
+    output = str(tmp_path / 'merged.docx')
+    converters.merge_docx(parts, output)
+    merged = Document(output)
+    assert _texts(output) == ['one', 'two', 'three', 'four']
+    blips = merged.element.body.xpath('.//a:blip/@r:embed')
+    assert len(blips) == 1
+    assert merged.part.related_parts[blips[0]].blob.startswith(b'\x89PNG')
+
+
+def test_select_pages(tmp_path):
+    doc = fitz.open()
+    for n in range(1, 5):
+        doc.new_page().insert_text((72, 72), f'P{n}')
+    doc.save(str(tmp_path / 'in.pdf'))
+    converters.select_pages(str(tmp_path / 'in.pdf'), str(tmp_path / 'out.pdf'), [3, 0])
+    with fitz.open(str(tmp_path / 'out.pdf')) as out:
+        assert [p.get_text().strip() for p in out] == ['P4', 'P1']
+
+
+def test_pdf_to_word_in_chunks(client, monkeypatch):
+    pytest.importorskip('pdf2docx')
+    monkeypatch.delenv('ADOBE_CLIENT_ID', raising=False)
+    import executor
+    # Three chunks of two, two and one pages
+    monkeypatch.setattr(converters, 'MIN_CHUNK_PAGES', 2)
+    monkeypatch.setattr(executor, 'CPU_WORKERS', 4)
+    chunks = []
+    map_unordered = executor.map_unordered
+    monkeypatch.setattr(executor, 'map_unordered',
+                        lambda tool, fn, args: chunks.append(args) or map_unordered(tool, fn, args))
+    doc = fitz.open()
+    for n in range(1, 6):
+        doc.new_page().insert_text((72, 72), f'Page {n} text')
+    resp = client.post('/api/process/pdf-to-word', data={'file': (io.BytesIO(doc.tobytes()), 'a.pdf'),
+                                                          'pages': '1-5'},
+                       headers={'Cache-Control': 'no-cache'})
+    assert resp.status_code == 200
+    texts = _texts(io.BytesIO(resp.get_data()))
+    assert [t for t in texts if t.startswith('Page')] == [f'Page {n} text' for n in range(1, 6)]
+    assert [(start, end) for _, _, start, end in chunks[0]] == [(0, 2), (2, 4), (4, 5)]
@@ -0,0 +1,55 @@
+import io
+import zipfile
+
+import pytest
+from PIL import Image
+
+import rendering
+from benchmarks.fixtures import make_pdf
+from zipstream import iter_zip
+
+
+@pytest.fixture(scope='module')
+def pdf(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('pdf') / 'doc.pdf')
+    make_pdf(path, pages=5)
+    return path
+
+
+def test_iter_zip_streams_stored_entries():
+    chunks = list(iter_zip(iter([('a.txt', b'alpha'), ('b/c.txt', 'gamma')])))
+    assert len(chunks) == 3 and chunks[0]
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as z:
+        assert z.testzip() is None
+        assert z.read('a.txt') == b'alpha' and z.read('b/c.txt') == b'gamma'
+        assert {i.compress_type for i in z.infolist()} == {zipfile.ZIP_STORED}
+
+
+@pytest.mark.parametrize('fmt, kind', [('jpg', 'JPEG'), ('png', 'PNG'), ('webp', 'WEBP')])
+def test_render_pages(pdf, fmt, kind):
+    rendered, _, _ = rendering.render_pages(pdf, [0, 2], 36, fmt, 80)
+    assert [name for name, _ in rendered] == [f'page_1.{fmt}', f'page_3.{fmt}']
+    img = Image.open(io.BytesIO(rendered[0][1]))
+    assert img.format == kind
+    assert img.width == 298  # A4 (595pt) at 36 dpi
+
+
+def test_iter_rendered_pages_yields_every_page(pdf):
+    names = sorted(name for name, _ in rendering.iter_rendered_pages('pdf-to-jpg', pdf, list(range(5)), dpi=36))
+    assert names == [f'page_{n}.jpg' for n in range(1, 6)]
+
+
+def test_pdf_to_jpg_api(client, pdf):
+    with open(pdf, 'rb') as f:
+        resp = client.post('/api/process/pdf-to-jpg', data={'file': (f, 'doc.pdf'), 'dpi': '36', 'pages': '2-3',
+                                                             'format': 'png'})
+    assert resp.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(resp.get_data())) as z:
+        assert sorted(z.namelist()) == ['page_2.png', 'page_3.png']
+
+
+@pytest.mark.parametrize('form', [{'dpi': '1000'}, {'format': 'gif'}, {'pages': '9'}])
+def test_pdf_to_jpg_bad_options(client, pdf, form):
+    with open(pdf, 'rb') as f:
+        resp = client.post('/api/process/pdf-to-jpg', data=dict(form, file=(f, 'doc.pdf')))
+    assert resp.status_code == 400
@@ -0,0 +1,79 @@
+import io
+import os
+
+from flask import Flask, Response
+
+from result_cache import ResultCache
+
+
+def test_key_depends_on_tool_params_and_bytes(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    path = tmp_path / 'input.pdf'
+    path.write_bytes(b'%PDF-1.7 one')
+    base = cache.key('pdf-rotate', [('angle', '90')], [('file', str(path))])
+    # The same bytes from a file object or a path share a key
+    assert cache.key('pdf-rotate', [('angle', '90')], [('file', io.BytesIO(b'%PDF-1.7 one'))]) == base
+    assert cache.key('pdf-rotate', [('angle', '180')], [('file', str(path))]) != base
+    assert cache.key('pdf-compress', [('angle', '90')], [('file', str(path))]) != base
+    assert cache.key('pdf-rotate', [('angle', '90')], [('file', io.BytesIO(b'%PDF-1.7 two'))]) != base
+
+
+def _store(app, cache, key, body):
+    with app.test_request_context():
+        resp = cache.store(key, Response([body], mimetype='application/pdf',
+                                         headers={'Content-Disposition': 'attachment; filename=a.pdf'}))
+        return b''.join(resp.response)
+
+
+def test_store_and_hit(tmp_path):
+    app = Flask(__name__)
+    cache = ResultCache(str(tmp_path))
+    assert _store(app, cache, 'k1', b'result') == b'result'
+    with app.test_request_context():
+        resp = cache.response('k1')
+        resp.direct_passthrough = False
+        assert resp.get_data() == b'result'
+        assert resp.headers['Content-Disposition'] == 'attachment; filename=a.pdf'
+        assert cache.response('k2') is None
+
+
+def test_truncated_body_is_not_cached(tmp_path):
+    app = Flask(__name__)
+    cache = ResultCache(str(tmp_path))
+    with app.test_request_context():
+        resp = cache.store('k1', Response([b'part', b'rest']))
+        body = iter(resp.response)
+        next(body)
+        body.close()
+        assert cache.response('k1') is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_evicts_least_recently_used(tmp_path):
+    app = Flask(__name__)
+    cache = ResultCache(str(tmp_path), max_bytes=10)
+    _store(app, cache, 'old', b'123456')
+    os.utime(tmp_path / 'old', (1, 1))
+    _store(app, cache, 'new', b'123456')
+    assert sorted(os.listdir(tmp_path)) == ['new', 'new.json']
+
+
+def test_tool_results_are_cached(client):
+    form = {'file': (io.BytesIO(_pdf()), 'a.pdf'), 'angle': '90'}
+    first = client.post('/api/process/pdf-rotate', data=form)
+    assert first.headers['X-Cache'] == 'MISS'
+    first.get_data()
+    second = client.post('/api/process/pdf-rotate', data={'file': (io.BytesIO(_pdf()), 'a.pdf'), 'angle': '90'})
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_data() == first.get_data()
+    bypass = client.post('/api/process/pdf-rotate', data={'file': (io.BytesIO(_pdf()), 'a.pdf'), 'angle': '90'},
+                         headers={'Cache-Control': 'no-cache'})
+    assert bypass.headers['X-Cache'] == 'BYPASS'
+
+
+def _pdf():
+    import fitz
+    doc = fitz.open()
+    doc.new_page()
+    # A fixed ID so every call returns the same bytes
+    return doc.tobytes(no_new_id=True)
@@ -0,0 +1,89 @@
+import os
+
+from flask import Flask
+
+import scratch
+
+
+def _app(tmp_path):
+    app = Flask(__name__)
+    scratch.init_app(app, str(tmp_path / 'scratch'))
+    return app
+
+
+def test_scratch_dir_is_per_request_and_removed(tmp_path):
+    app = _app(tmp_path)
+    seen = []
+
+    @app.route('/')
+    def view():
+        path = scratch.scratch_path('input.pdf')
+        with open(path, 'wb') as f:
+            f.write(b'x')
+        seen.append(os.path.dirname(path))
+        return scratch.send_output(path, 'out.pdf')
+
+    client = app.test_client()
+    for _ in range(2):
+        resp = client.get('/')
+        assert resp.get_data() == b'x'
+        resp.close()
+    assert seen[0] != seen[1]
+    assert os.listdir(app.config['SCRATCH_FOLDER']) == []
+
+
+def test_send_output_spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(scratch, 'OUTPUT_SPOOL_BYTES', 4)
+    app = _app(tmp_path)
+
+    @app.route('/<int:size>')
+    def view(size):
+        output = scratch.output_buffer()
+        output.write(b'y' * size)
+        return scratch.send_output(output, 'out.bin')
+
+    client = app.test_client()
+    assert client.get('/3').get_data() == b'yyy'
+    resp = client.get('/10')
+    assert resp.get_data() == b'y' * 10
+    assert resp.headers['Content-Disposition'] == 'attachment; filename=out.bin'
+
+
+def test_send_stream_keeps_scratch_until_sent(tmp_path):
+    app = _app(tmp_path)
+
+    @app.route('/')
+    def view():
+        path = scratch.scratch_path('part')
+        with open(path, 'wb') as f:
+            f.write(b'z')
+
+        def chunks():
+            for _ in range(3):
+                with open(path, 'rb') as f:
+                    yield f.read()
+
+        return scratch.send_stream(chunks(), 'out.zip', 'application/zip')
+
+    resp = app.test_client().get('/')
+    assert resp.get_data() == b'zzz'
+    resp.close()
+    assert os.listdir(app.config['SCRATCH_FOLDER']) == []
+
+
+def test_send_stream_quotes_download_names(tmp_path):
+    app = _app(tmp_path)
+
+    @app.route('/<name>')
+    def view(name):
+        return scratch.send_stream(iter([b'z']), name, 'application/zip')
+
+    client = app.test_client()
+    assert client.get('/plain.zip').headers['Content-Disposition'] == 'attachment; filename=plain.zip'
+    assert client.get('/my file; 1.zip').headers['Content-Disposition'] == 'attachment; filename="my file; 1.zip"'
+    header = client.get('/résumé.zip').headers['Content-Disposition']
+    assert header == "attachment; filename=resume.zip; filename*=UTF-8''r%C3%A9sum%C3%A9.zip"
+    # The same header send_file builds
+    with app.test_request_context():
+        sent = scratch.send_output(b'z', 'résumé.zip')
+    assert sent.headers['Content-Disposition'] == header
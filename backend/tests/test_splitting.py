@@ -0,0 +1,74 @@
+import io
+import zipfile
+
+import fitz
+import pytest
+
+import splitting
+
+
+def _pdf(pages):
+    doc = fitz.open()
+    for n in range(1, pages + 1):
+        doc.new_page().insert_text((72, 72), f'P{n}')
+    return doc.tobytes()
+
+
+def test_plan_all_and_every_n():
+    assert splitting.plan_parts('all', 3) == [('page_1.pdf', [0]), ('page_2.pdf', [1]), ('page_3.pdf', [2])]
+    assert splitting.plan_parts('every-n', 5, every=2) == [
+        ('pages_1-2.pdf', [0, 1]), ('pages_3-4.pdf', [2, 3]), ('page_5.pdf', [4])]
+    assert splitting.plan_parts('all', 0) == []
+
+
+def test_plan_ranges():
+    assert splitting.plan_parts('ranges', 12, ranges='1-3, 7,10-') == [
+        ('pages_1-3.pdf', [0, 1, 2]), ('page_7.pdf', [6]), ('pages_10-12.pdf', [9, 10, 11])]
+    # Repeated ranges get distinct names
+    assert [name for name, _ in splitting.plan_parts('ranges', 5, ranges='2,2,2')] == [
+        'page_2.pdf', 'page_2-2.pdf', 'page_2-3.pdf']
+
+
+def test_part_name_gaps():
+    assert splitting._part_name([0, 2, 4]) == 'pages_1-5_3.pdf'
+
+
+@pytest.mark.parametrize('mode, options', [
+    ('every-n', {'every': 0}),
+    ('ranges', {'ranges': ' , '}),
+    ('ranges', {'ranges': '4-9'}),
+    ('odd', {}),
+])
+def test_plan_errors(mode, options):
+    with pytest.raises(ValueError):
+        splitting.plan_parts(mode, 3, **options)
+
+
+def test_write_parts(tmp_path):
+    path = tmp_path / 'in.pdf'
+    path.write_bytes(_pdf(5))
+    written = splitting.write_parts(str(path), [('a.pdf', [3, 4]), ('b.pdf', [4, 0])])
+    assert [name for name, _ in written] == ['a.pdf', 'b.pdf']
+    with fitz.open('pdf', written[1][1]) as doc:
+        assert [page.get_text().strip() for page in doc] == ['P5', 'P1']
+
+
+def test_split_zip_api(client, monkeypatch):
+    # Several chunks, so parts arrive from more than one task
+    monkeypatch.setattr(splitting, 'MAX_CHUNK_PAGES', 2)
+    resp = client.post('/api/process/pdf-splitter', data={
+        'file': (io.BytesIO(_pdf(7)), 'in.pdf'), 'mode': 'every-n', 'n': '3'})
+    assert resp.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(resp.data)) as archive:
+        assert sorted(archive.namelist()) == ['page_7.pdf', 'pages_1-3.pdf', 'pages_4-6.pdf']
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist())
+        with fitz.open('pdf', archive.read('pages_4-6.pdf')) as doc:
+            assert [page.get_text().strip() for page in doc] == ['P4', 'P5', 'P6']
+
+
+def test_split_api_errors(client):
+    resp = client.post('/api/process/pdf-splitter', data={
+        'file': (io.BytesIO(_pdf(3)), 'in.pdf'), 'mode': 'ranges', 'ranges': '5'})
+    assert resp.status_code == 400
+    resp = client.post('/api/process/pdf-splitter', data={'file': (io.BytesIO(_pdf(3)), 'in.pdf'), 'mode': 'count'})
+    assert resp.json == {'pages': 3}
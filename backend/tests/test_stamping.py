@@ -0,0 +1,61 @@
+import fitz
+import pytest
+
+import stamping
+
+
+@pytest.fixture
+def a4(tmp_path):
+    path = str(tmp_path / 'a4.pdf')
+    doc = fitz.open()
+    doc.new_page(width=595, height=842)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _text_box(path):
+    doc = fitz.open(path)
+    try:
+        page = doc[0]
+        box = fitz.Rect()
+        for block in page.get_text('dict')['blocks']:
+            box |= fitz.Rect(block['bbox'])
+        return page.rect, box
+    finally:
+        doc.close()
+
+
+@pytest.mark.parametrize('position', stamping.POSITIONS)
+@pytest.mark.parametrize('rotation', [0, 45, 90, -30])
+def test_watermark_stays_on_page(a4, tmp_path, position, rotation):
+    output = str(tmp_path / 'out.pdf')
+    stamping.watermark_pdf(a4, output, 'CONFIDENTIAL', {'position': position, 'rotation': rotation})
+    page, box = _text_box(output)
+    assert not box.is_empty
+    assert page.contains(box)
+
+
+def test_anchor_uses_rotated_box():
+    rect = fitz.Rect(0, 0, 595, 842)
+    flat = stamping._anchor(rect, 'top-left', 200, 50, 36)
+    assert (flat.x, flat.y) == (136, 61)
+    upright = stamping._anchor(rect, 'top-left', 200, 50, 36, rotation=90)
+    assert upright.x == pytest.approx(61)
+    assert upright.y == pytest.approx(136)
+
+
+def test_page_numbers(a4, tmp_path):
+    output = str(tmp_path / 'out.pdf')
+    stamping.number_pages(a4, output, 'bottom-center', 3, 12, 'Page {n}', '#000')
+    doc = fitz.open(output)
+    try:
+        assert doc[0].get_text().strip() == 'Page 3'
+    finally:
+        doc.close()
+
+
+def test_hex_to_rgb():
+    assert stamping.hex_to_rgb('#fff') == (1, 1, 1)
+    with pytest.raises(ValueError):
+        stamping.hex_to_rgb('#12345')
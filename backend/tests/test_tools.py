@@ -0,0 +1,30 @@
+import tools
+
+
+def test_every_tool_resolves_to_its_function():
+    for name, tool in tools.TOOLS.items():
+        fn = tool.load()
+        assert fn.__name__ == name.replace('-', '_')
+        assert fn.__module__ == f'tools.{tool.module}'
+
+
+def test_tool_metadata(client):
+    listed = {t['name']: t for t in client.get('/api/tools').get_json()}
+    assert set(listed) == set(tools.TOOLS)
+    assert listed['word-counter']['maxInputBytes'] == tools.TEXT_LIMIT
+    assert listed['word-counter']['cacheable'] is False
+    assert listed['pdf-to-word']['async'] is True
+    assert listed['image-compressor']['accepts'] == ['image']
+
+
+def test_unknown_tool(client):
+    resp = client.post('/api/process/no-such-tool', data={})
+    assert resp.status_code == 400
+    assert resp.get_json() == {'error': 'Tool not implemented'}
+
+
+def test_text_tools(client):
+    resp = client.post('/api/process/word-counter', data={'text': 'one two  three'})
+    assert resp.get_json()['words'] == 3
+    resp = client.post('/api/process/case-converter', data={'text': 'hello world', 'type': 'upper'})
+    assert resp.get_json()['result'] == 'HELLO WORLD'
@@ -0,0 +1,113 @@
+import hashlib
+import io
+import os
+import sys
+
+import pytest
+
+from documents import DocumentStore
+from uploads import UploadIncomplete, UploadNotFound, UploadStore
+
+DATA = bytes(range(256)) * 4 + b'tail'  # 1028 bytes: four full chunks and a short one
+
+
+def _sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path / 'uploads'), DocumentStore(str(tmp_path / 'docs')), 2048, chunk_size=256)
+
+
+def _chunk(n):
+    return DATA[n * 256:(n + 1) * 256]
+
+
+def test_chunks_in_any_order(store):
+    info = store.create('big.pdf', len(DATA), _sha(DATA))
+    upload_id = info['uploadId']
+    assert (info['chunks'], info['missing'], info['offset']) == (5, [0, 1, 2, 3, 4], 0)
+    for n in (0, 1, 4):
+        assert store.write_chunk(upload_id, n, io.BytesIO(_chunk(n)), _sha(_chunk(n)))['sha256'] == _sha(_chunk(n))
+    status = store.status(upload_id)
+    assert status['received'] == [0, 1, 4]
+    # The resume offset stops at the first gap
+    assert status['offset'] == 512
+    with pytest.raises(UploadIncomplete) as e:
+        store.complete(upload_id)
+    assert e.value.missing == [2, 3]
+    for n in (3, 2):
+        store.write_chunk(upload_id, n, io.BytesIO(_chunk(n)))
+    assert store.status(upload_id)['offset'] == len(DATA)
+    file_id = store.complete(upload_id)
+    assert file_id.endswith('.pdf')
+    with open(store.documents.path(file_id), 'rb') as f:
+        assert f.read() == DATA
+    # The upload is gone once it became a document
+    with pytest.raises(UploadNotFound):
+        store.status(upload_id)
+
+
+def test_bad_chunks(store):
+    upload_id = store.create('a.bin', len(DATA))['uploadId']
+    with pytest.raises(ValueError, match='must be 256 bytes'):
+        store.write_chunk(upload_id, 0, io.BytesIO(_chunk(0)[:-1]))
+    with pytest.raises(ValueError, match='must be 4 bytes'):
+        store.write_chunk(upload_id, 4, io.BytesIO(b'tail!'))
+    with pytest.raises(ValueError, match='between 0 and 4'):
+        store.write_chunk(upload_id, 5, io.BytesIO(b''))
+    store.write_chunk(upload_id, 1, io.BytesIO(_chunk(1)))
+    # A resent chunk that fails its checksum no longer counts
+    with pytest.raises(ValueError, match='checksum mismatch'):
+        store.write_chunk(upload_id, 1, io.BytesIO(_chunk(1)), _sha(b'other'))
+    assert store.status(upload_id)['received'] == []
+    with pytest.raises(ValueError, match='hex SHA-256'):
+        store.write_chunk(upload_id, 1, io.BytesIO(_chunk(1)), 'abc')
+
+
+def test_file_checksum_and_limits(store):
+    upload_id = store.create('a.bin', 4, _sha(b'good'))['uploadId']
+    store.write_chunk(upload_id, 0, io.BytesIO(b'evil'))
+    with pytest.raises(ValueError, match='File checksum mismatch'):
+        store.complete(upload_id)
+    with pytest.raises(ValueError):
+        store.create('a.bin', 4096)
+    with pytest.raises(ValueError):
+        store.create('a.bin', -1)
+    assert store.create('empty.txt', 0)['chunks'] == 0
+
+
+def test_abort_and_unknown_ids(store):
+    upload_id = store.create('a.bin', 10)['uploadId']
+    store.abort(upload_id)
+    assert not os.path.exists(os.path.join(store.folder, upload_id))
+    for bad in (upload_id, '../docs', ''):
+        with pytest.raises(UploadNotFound):
+            store.status(bad)
+
+
+def test_upload_api(client, monkeypatch):
+    monkeypatch.setattr(sys.modules['app'].uploads, 'chunk_size', 256)
+    resp = client.post('/api/uploads', data={'filename': 'big.pdf', 'size': str(len(DATA)), 'sha256': _sha(DATA)})
+    assert resp.status_code == 201
+    upload_id = resp.json['uploadId']
+    assert resp.headers['Location'] == f'/api/uploads/{upload_id}'
+    url = f'/api/uploads/{upload_id}'
+    for n in range(4):
+        assert client.put(f'{url}/chunks/{n}', data=_chunk(n)).status_code == 200
+    resp = client.post(f'{url}/complete')
+    assert resp.status_code == 409 and resp.json['missing'] == [4]
+    resp = client.put(f'{url}/chunks/4', data=b'tail', headers={'X-Chunk-SHA256': _sha(b'nope')})
+    assert resp.status_code == 400
+    assert client.get(url).json['offset'] == 1024
+    assert client.put(f'{url}/chunks/4', data=b'tail', headers={'X-Chunk-SHA256': _sha(b'tail')}).status_code == 200
+    resp = client.post(f'{url}/complete')
+    assert resp.status_code == 201
+    assert resp.json['size'] == len(DATA)
+    assert client.get(url).status_code == 404
+
+    assert client.post('/api/uploads', data={'size': 'lots'}).status_code == 400
+    upload_id = client.post('/api/uploads', data={'filename': 'a', 'size': '5'}).json['uploadId']
+    assert client.delete(f'/api/uploads/{upload_id}').status_code == 204
+    assert client.put(f'/api/uploads/{upload_id}/chunks/0', data=b'12345').status_code == 404
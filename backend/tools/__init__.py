@@ -0,0 +1,117 @@
+"""Registry of the tools served by ``/api/process/<tool>``.
+
+Each tool is a function ``fn(tool)`` in one of the modules of this
+package, named after the tool with dashes turned into underscores. The
+modules, and the heavy libraries they use, are imported on first use, or
+up front by :func:`preload` so forked gunicorn workers start warm.
+"""
+import importlib
+import os
+
+MiB = 1024 * 1024
+
+TEXT_LIMIT = 10 * MiB
+IMAGE_LIMIT = 100 * MiB
+DOCUMENT_LIMIT = 500 * MiB
+PAGE_LIMIT = int(os.getenv('MAX_PDF_PAGES', '10000'))
+
+
+class Tool:
+    def __init__(self, name, module, async_job=False, cacheable=True,
+                 max_input_bytes=DOCUMENT_LIMIT, accepts=None, max_pages=PAGE_LIMIT, imports=()):
+        self.name = name
+        self.module = module
+        self.async_job = async_job
+        self.cacheable = cacheable
+        self.max_input_bytes = max_input_bytes
+        # Upload formats (keys of ingest.FORMATS) checked on the first bytes; None for any
+        self.accepts = accepts
+        self.max_pages = max_pages
+        self.imports = imports
+        self._fn = None
+
+    def load(self):
+        if self._fn is None:
+            module = importlib.import_module(f'tools.{self.module}')
+            self._fn = getattr(module, self.name.replace('-', '_'))
+        return self._fn
+
+    def __call__(self):
+        return self.load()(self.name)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'async': self.async_job,
+            'cacheable': self.cacheable,
+            'maxInputBytes': self.max_input_bytes,
+            'accepts': self.accepts,
+            'maxPages': self.max_pages,
+        }
+
+
+TOOLS = {}
+
+
+def register(name, module, **options):
+    TOOLS[name] = Tool(name, module, **options)
+
+
+def get(name):
+    return TOOLS.get(name)
+
+
+# Generators must never be cached; the other text tools are not worth the disk space
+for _name in ('word-counter', 'json-formatter', 'base64-encoder', 'uuid-generator',
+              'password-generator', 'hash-generator', 'case-converter'):
+    register(_name, 'text', cacheable=False, max_input_bytes=TEXT_LIMIT, accepts=('text',))
+
+register('pdf-splitter', 'pages', accepts=('pdf',),
+         imports=('pypdf', 'splitting', 'zipstream'))
+for _name in ('pdf-rotate', 'pdf-unlock', 'pdf-protect', 'pdf-organize',
+              'pdf-extract-pages', 'pdf-delete-pages', 'pdf-repair', 'pdf-to-pdfa', 'pdf-sign',
+              'pdf-validate'):
+    register(_name, 'pages', accepts=('pdf',), imports=('pypdf',))
+
+register('pdf-merger', 'pdf', async_job=True, accepts=('pdf',), imports=('merging',))
+register('pdf-compress', 'pdf', async_job=True, accepts=('pdf',), imports=('compression',))
+register('pdf-watermark', 'pdf', async_job=True, accepts=('pdf',), imports=('stamping',))
+register('pdf-page-numbers', 'pdf', async_job=True, accepts=('pdf',), imports=('stamping',))
+register('pdf-to-jpg', 'pdf', async_job=True, accepts=('pdf',),
+         imports=('rendering', 'zipstream'))
+
+register('image-compressor', 'images', max_input_bytes=IMAGE_LIMIT, accepts=('image',),
+         imports=('imaging',))
+# No format check: a file that is not an image fails in its manifest row, not the batch
+register('image-compressor-batch', 'images', async_job=True, imports=('imaging', 'zipstream'))
+register('jpg-to-pdf', 'images', max_input_bytes=IMAGE_LIMIT, accepts=('image',), imports=('imagepdf',))
+
+register('html-to-pdf', 'convert', async_job=True, max_input_bytes=TEXT_LIMIT,
+         imports=('weasyprint',))
+register('pdf-ocr', 'convert', async_job=True, accepts=('pdf',))
+register('pdf-to-word', 'convert', async_job=True, accepts=('pdf',), imports=('converters',))
+register('word-to-pdf', 'convert', async_job=True, accepts=('office',),
+         imports=('mammoth', 'weasyprint'))
+register('pdf-to-excel', 'convert', async_job=True, accepts=('pdf',), imports=('converters',))
+register('excel-to-pdf', 'convert', async_job=True, accepts=('office',),
+         imports=('converters', 'numpy', 'reportlab.pdfgen.canvas'))
+register('pdf-to-powerpoint', 'convert', async_job=True, accepts=('pdf',),
+         imports=('fitz', 'pptx'))
+register('powerpoint-to-pdf', 'convert', async_job=True, accepts=('office',),
+         imports=('pptx', 'reportlab.pdfgen.canvas'))
+
+
+def preload(names=None):
+    """Import the modules of ``names`` (default: every tool) and the
+    libraries they use. Libraries that fail to import are reported and
+    left to fail again on first use."""
+    modules = []
+    for tool in TOOLS.values():
+        if names is None or tool.name in names:
+            modules.extend(tool.imports)
+            tool.load()
+    for module in dict.fromkeys(modules):
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            print(f'Preload of {module} failed: {e}')
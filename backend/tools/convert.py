@@ -0,0 +1,316 @@
+"""Format conversions and OCR. Office conversions try Adobe PDF Services
+first when credentials are set and fall back to local converters."""
+import functools
+import math
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from flask import current_app, request, jsonify
+
+import adobe
+import breaker
+import executor
+import upstream
+from ingest import mapped
+from inputs import has_input, input_path
+from jobs import report_progress
+from metrics import stage
+from page_ranges import parse_page_ranges
+from scratch import output_buffer, scratch_path, send_output
+
+OCR_URL = os.getenv('OCR_URL', 'https://api.ocr.space/parse/image')
+OCR_API_KEY = 'K83701879288957'
+
+_race_pool = ThreadPoolExecutor(max_workers=adobe.ADOBE_CONCURRENCY * 2, thread_name_prefix='race')
+
+
+def _tracked(name, fn, *args):
+    """Call ``fn(*args)`` and record the outcome on ``name``'s breaker."""
+    circuit = breaker.get(name)
+    started = time.monotonic()
+    try:
+        result = fn(*args)
+    except adobe.AdobeBusy:
+        circuit.release()
+        raise
+    except Exception as e:
+        circuit.record_failure(e, time.monotonic() - started)
+        raise
+    circuit.record_success(time.monotonic() - started)
+    return result
+
+
+def _race(tool, temp_input, output, runners):
+    """Run every ``(name, fn)`` of ``runners`` as ``fn(input_path,
+    output_path)`` at once and keep the output of the first one to
+    succeed. Each runs on its own link to ``temp_input`` in a private
+    folder, as the request's scratch space goes away with the winner. The
+    others run to completion in the background so their breakers still
+    learn from them; runners that never started are cancelled."""
+    folder = current_app.config['SCRATCH_FOLDER']
+    futures = {}
+    for name, fn in runners:
+        private = tempfile.mkdtemp(prefix='race-', dir=folder)
+        held = os.path.join(private, 'input' + os.path.splitext(temp_input)[1])
+        try:
+            os.link(temp_input, held)
+        except OSError:
+            shutil.copyfile(temp_input, held)
+        future = _race_pool.submit(_tracked, name, fn, held, os.path.join(private, os.path.basename(output)))
+        futures[future] = (name, private)
+    pending = set(futures)
+    error = None
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, private = futures[future]
+                if future.exception() is None:
+                    os.replace(os.path.join(private, os.path.basename(output)), output)
+                    return name
+                error = future.exception()
+                print(f'{name} {tool} failed: {error}')
+        raise error
+    finally:
+        for future, (name, private) in futures.items():
+            if future.cancel():
+                # Never reached its backend, so the breaker learns nothing
+                breaker.get(name).release()
+            future.add_done_callback(lambda f, private=private: shutil.rmtree(private, ignore_errors=True))
+
+
+def _convert(tool, temp_input, output_name, local, method, operation, source, **params):
+    """Convert ``temp_input`` with Adobe ``operation`` or with ``local``,
+    called as ``local(tool, input_path, output_path)``, and send the
+    result. Adobe is skipped while its circuit is open; with
+    ``ADOBE_RACE`` both run at once and the first result wins."""
+    output = scratch_path(output_name)
+    client = adobe.get_client()
+    done = upstream.result('adobe')
+    if isinstance(done, str):
+        # Converted by the ASGI server while this request was deferred
+        os.replace(done, output)
+        return _send(output, output_name, 'adobe')
+    if done is not None:
+        print(f'Adobe {tool} failed: {done}, falling back to {method}')
+    elif client and breaker.get('adobe').allow():
+        if upstream.deferrable() and not adobe.ADOBE_RACE:
+            return upstream.defer('adobe', temp_input, operation=operation, source=source, params=params)
+        adobe_call = lambda source_path, path: client.convert(source_path, path, operation, source, **params)
+        local_call = lambda source_path, path: local(tool, source_path, path)
+        if adobe.ADOBE_RACE:
+            with stage('race'):
+                method = _race(tool, temp_input, output, [('adobe', adobe_call), (method, local_call)])
+            return _send(output, output_name, method)
+        try:
+            with stage('adobe'):
+                _tracked('adobe', adobe_call, temp_input, output)
+            return _send(output, output_name, 'adobe')
+        except Exception as e:
+            print(f'Adobe {tool} failed: {e}, falling back to {method}')
+    with stage('convert'):
+        _tracked(method, local, tool, temp_input, output)
+    return _send(output, output_name, method)
+
+
+def _send(output, output_name, method):
+    resp = send_output(output, output_name)
+    resp.headers['X-Conversion-Method'] = method
+    return resp
+
+
+def html_to_pdf(tool):
+    from weasyprint import HTML
+    html_content = request.form.get('html', '')
+    output = output_buffer()
+    HTML(string=html_content).write_pdf(output)
+    return send_output(output, 'html-to-pdf.pdf')
+
+
+def ocr_payload(path):
+    """Form fields of an OCR.space request for the PDF at ``path``."""
+    import base64
+    with mapped(path) as data:
+        pdf_base64 = base64.b64encode(data).decode()
+    return {
+        'apikey': OCR_API_KEY,
+        'base64Image': f'data:application/pdf;base64,{pdf_base64}',
+        'language': 'eng',
+        'isOverlayRequired': False
+    }
+
+
+def pdf_ocr(tool):
+    if not has_input():
+        return jsonify({'error': 'No file provided'}), 400
+
+    try:
+        result = upstream.result('ocr')
+        if result is None:
+            path = input_path('input.pdf')
+            if upstream.deferrable():
+                return upstream.defer('ocr', path)
+            with stage('ocr'):
+                result = requests.post(OCR_URL, data=ocr_payload(path)).json()
+        elif isinstance(result, Exception):
+            raise result
+
+        if result.get('ParsedResults'):
+            text = '\n\n'.join([page['ParsedText'] for page in result['ParsedResults']])
+            return jsonify({'text': text})
+        else:
+            return jsonify({'error': result.get('ErrorMessage', 'OCR failed')}), 500
+    except Exception as e:
+        return jsonify({'error': f'OCR failed: {str(e)}'}), 500
+
+
+def _pdf_to_word(tool, temp_input, output):
+    import fitz
+    from converters import MIN_CHUNK_PAGES, merge_docx, pdf_to_docx
+    with fitz.open(temp_input) as doc:
+        page_count = len(doc)
+    # Consecutive page ranges convert in parallel and are joined in order
+    per_chunk = max(MIN_CHUNK_PAGES, math.ceil(page_count / executor.CPU_WORKERS))
+    if page_count <= per_chunk:
+        executor.run(tool, pdf_to_docx, temp_input, output)
+        return
+    chunks = [(temp_input, f'{output}.{start}.docx', start, min(start + per_chunk, page_count))
+              for start in range(0, page_count, per_chunk)]
+    done = 0
+    for _ in executor.map_unordered(tool, pdf_to_docx, chunks):
+        done += 1
+        report_progress(done, len(chunks) + 1)
+    parts = [chunk[1] for chunk in chunks]
+    try:
+        executor.run(tool, merge_docx, parts, output)
+    finally:
+        for part in parts:
+            os.remove(part)
+
+
+def pdf_to_word(tool):
+    import fitz
+    from converters import select_pages
+    temp_input = input_path('input.pdf')
+    spec = request.form.get('pages', '')
+    if spec.strip():
+        with stage('parse'), fitz.open(temp_input) as doc:
+            page_count = len(doc)
+        try:
+            pages = parse_page_ranges(spec, page_count)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if pages != list(range(page_count)):
+            selected = scratch_path('selected.pdf')
+            with stage('parse'):
+                executor.run(tool, select_pages, temp_input, selected, pages)
+            temp_input = selected
+    return _convert(tool, temp_input, 'converted.docx', _pdf_to_word, 'pdf2docx',
+                    'exportpdf', 'pdf', targetFormat='docx')
+
+
+def _word_to_pdf(tool, temp_input, output):
+    import mammoth
+    from weasyprint import HTML
+
+    with open(temp_input, 'rb') as f:
+        result = mammoth.convert_to_html(f)
+        html = result.value
+
+    HTML(string=html).write_pdf(output)
+
+
+def word_to_pdf(tool):
+    return _convert(tool, input_path('input.docx'), 'converted.pdf', _word_to_pdf, 'mammoth+weasyprint',
+                    'createpdf', 'docx')
+
+
+def _pdf_to_excel(tool, temp_input, output, sheets='page'):
+    import fitz
+    from converters import MAX_TABLE_CHUNK_PAGES, extract_tables, write_workbook
+    with fitz.open(temp_input) as doc:
+        page_count = len(doc)
+    per_chunk = max(1, min(MAX_TABLE_CHUNK_PAGES, math.ceil(page_count / (executor.CPU_WORKERS * 2))))
+    chunks = [(temp_input, start, min(start + per_chunk, page_count))
+              for start in range(0, page_count, per_chunk)]
+    pages = []
+    for results in executor.map_unordered(tool, extract_tables, chunks):
+        pages.extend(results)
+        report_progress(len(pages), page_count + 1)
+    pages.sort(key=lambda page: page[0])
+    executor.run(tool, write_workbook, pages, output, sheets)
+
+
+def pdf_to_excel(tool):
+    sheets = request.form.get('sheets', 'page')
+    if sheets not in ('page', 'table'):
+        return jsonify({'error': 'sheets must be page or table'}), 400
+    return _convert(tool, input_path('input.pdf'), 'converted.xlsx',
+                    functools.partial(_pdf_to_excel, sheets=sheets), 'fitz+openpyxl',
+                    'exportpdf', 'pdf', targetFormat='xlsx')
+
+
+def _excel_to_pdf(tool, temp_input, output):
+    from converters import render_workbook
+    executor.run(tool, render_workbook, temp_input, output)
+
+
+def excel_to_pdf(tool):
+    return _convert(tool, input_path('input.xlsx'), 'converted.pdf', _excel_to_pdf, 'openpyxl+reportlab',
+                    'createpdf', 'xlsx')
+
+
+def _pdf_to_powerpoint(tool, temp_input, output):
+    import fitz
+    from pptx import Presentation
+    # Create PPTX with page text
+    doc = fitz.open(temp_input)
+    prs = Presentation()
+    for page_num in range(len(doc)):
+        page = doc[page_num]
+        text = page.get_text()
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        title = slide.shapes.title
+        content = slide.placeholders[1]
+        title.text = f'Page {page_num + 1}'
+        content.text = text[:500]
+    doc.close()
+    prs.save(output)
+
+
+def pdf_to_powerpoint(tool):
+    return _convert(tool, input_path('input.pdf'), 'converted.pptx', _pdf_to_powerpoint, 'fitz+pptx',
+                    'exportpdf', 'pdf', targetFormat='pptx')
+
+
+def _powerpoint_to_pdf(tool, temp_input, output):
+    from pptx import Presentation
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    # Simple text render from PPTX to PDF
+    prs = Presentation(temp_input)
+    c = canvas.Canvas(output, pagesize=letter)
+    width, height = letter
+    for slide_num, slide in enumerate(prs.slides):
+        if slide_num > 0:
+            c.showPage()
+        y = height - 50
+        c.drawString(50, y, f'Slide {slide_num + 1}')
+        y -= 30
+        for shape in slide.shapes:
+            if hasattr(shape, 'text') and shape.text:
+                if y < 50:
+                    c.showPage()
+                    y = height - 50
+                c.drawString(50, y, shape.text[:80])
+                y -= 20
+    c.save()
+
+
+def powerpoint_to_pdf(tool):
+    return _convert(tool, input_path('input.pptx'), 'converted.pdf', _powerpoint_to_pdf, 'pptx+reportlab',
+                    'createpdf', 'pptx')
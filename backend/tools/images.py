@@ -0,0 +1,176 @@
+"""Image tools: compression and images to PDF."""
+import json
+import os
+
+from flask import request, jsonify
+
+import executor
+from documents import DocumentNotFound
+from ingest import save_upload
+from inputs import documents, input_name, input_path
+from metrics import stage
+from scratch import output_buffer, scratch_path, send_output, send_stream
+
+
+def _target_options(fields):
+    """``(targetBytes, targetQuality)`` of ``fields``. Raises
+    ``ValueError`` for values the quality search cannot use."""
+    bytes_error = 'targetBytes must be a whole number of bytes'
+    quality_error = 'targetQuality must be an SSIM between 0 and 1'
+    try:
+        target_bytes = int(fields.get('targetBytes', 0))
+    except ValueError:
+        raise ValueError(bytes_error)
+    try:
+        target_quality = float(fields.get('targetQuality', 0))
+    except ValueError:
+        raise ValueError(quality_error)
+    if target_bytes < 0:
+        raise ValueError(bytes_error)
+    # An SSIM floor: 90 meant as 0.9 could never be met
+    if not 0 <= target_quality <= 1:
+        raise ValueError(quality_error)
+    return target_bytes, target_quality
+
+
+def _compress_options(fields):
+    target_bytes, target_quality = _target_options(fields)
+    return {
+        'quality': int(fields.get('quality', 80)),
+        'format': fields.get('format', 'original'),
+        'maxWidth': int(fields.get('maxWidth', 0)),
+        'maxHeight': int(fields.get('maxHeight', 0)),
+        'maintainAspect': fields.get('maintainAspect', 'true') == 'true',
+        'rotation': int(fields.get('rotation', 0)),
+        'flipH': fields.get('flipH', 'false') == 'true',
+        'flipV': fields.get('flipV', 'false') == 'true',
+        'brightness': float(fields.get('brightness', 100)) / 100,
+        'contrast': float(fields.get('contrast', 100)) / 100,
+        'targetBytes': target_bytes,
+        'targetQuality': target_quality,
+    }
+
+
+def image_compressor(tool):
+    from imaging import check_target, compress_image
+    file_ext = input_name().rsplit('.', 1)[-1].lower()
+    try:
+        options = _compress_options(request.form)
+        check_target(file_ext, options)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    temp_input = input_path(f'input.{file_ext}')
+    with stage('encode'):
+        compressed_data, output_ext = executor.run(tool, compress_image, temp_input, file_ext, options)
+    return send_output(compressed_data, f'compressed.{output_ext}')
+
+
+def image_compressor_batch(tool):
+    from werkzeug.utils import secure_filename
+    from imaging import compress_batch_item
+    from jobs import report_progress
+    from zipstream import iter_zip
+    # The same fields as image-compressor, or all of them as one JSON `settings` object
+    fields = request.form.to_dict()
+    try:
+        settings = json.loads(request.form.get('settings') or '{}')
+    except ValueError:
+        settings = None
+    if not isinstance(settings, dict):
+        return jsonify({'error': 'settings must be a JSON object'}), 400
+    fields.update((k, str(v).lower() if isinstance(v, bool) else str(v)) for k, v in settings.items())
+    try:
+        options = _compress_options(fields)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    items = []
+    try:
+        items.extend((documents.path(fid), fid) for fid in request.form.getlist('fileIds'))
+    except DocumentNotFound as e:
+        return jsonify({'error': str(e)}), 400
+    with stage('upload'):
+        for n, file in enumerate(request.files.getlist('files')):
+            name = secure_filename(file.filename or '') or f'image-{n + 1}'
+            path = scratch_path(f'{n}-{name}')
+            save_upload(file, path)
+            items.append((path, name))
+    if not items:
+        return jsonify({'error': 'No images provided'}), 400
+
+    def entries():
+        manifest = []
+        used = set()
+        results = executor.map_unordered(tool, compress_batch_item,
+                                         [(path, name, options) for path, name in items])
+        for entry_name, data, row in results:
+            if data is not None:
+                # Two inputs may compress to the same name (a.png and a.jpg as jpg)
+                stem, ext = os.path.splitext(entry_name)
+                n = 1
+                while entry_name in used:
+                    n += 1
+                    entry_name = f'{stem}-{n}{ext}'
+                used.add(entry_name)
+                row['output'] = entry_name
+                yield entry_name, data
+            manifest.append(row)
+            report_progress(len(manifest), len(items))
+        yield 'manifest.json', json.dumps(manifest, indent=2)
+
+    return send_stream(iter_zip(entries()), 'compressed-images.zip', 'application/zip')
+
+
+def jpg_to_pdf(tool):
+    from PIL import UnidentifiedImageError
+    from imagepdf import FIT_MODES, PAGE_SIZES, check_margin, images_to_pdf
+    # Support three modes for jpg->pdf:
+    # 1) Temporary single-file upload (X-Temp-Upload header) -> save file and return a fileId
+    # 2) Assemble from previously uploaded fileIds (form field 'fileIds') -> build PDF from saved files
+    # 3) Direct combined upload (files field) -> immediate assemble (legacy behavior)
+
+    # Mode 1: temporary upload (used by client to upload individual files with progress)
+    if request.headers.get('X-Temp-Upload') or request.form.get('tempUpload'):
+        file = request.files.get('file')
+        if not file:
+            return jsonify({'error': 'No file uploaded'}), 400
+        return jsonify({'fileId': documents.save(file, temporary=True)})
+
+    page_size = request.form.get('pageSize', 'auto')
+    fit = request.form.get('fit', 'contain')
+    if page_size != 'auto' and page_size not in PAGE_SIZES:
+        return jsonify({'error': f'pageSize must be auto or one of {", ".join(PAGE_SIZES)}'}), 400
+    if fit not in FIT_MODES:
+        return jsonify({'error': f'fit must be one of {", ".join(FIT_MODES)}'}), 400
+    try:
+        margin = max(0.0, float(request.form.get('margin', 0)))
+    except ValueError:
+        return jsonify({'error': 'margin must be a number of points'}), 400
+    try:
+        check_margin(page_size, margin)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Mode 2: assemble from fileIds
+    file_ids = request.form.getlist('fileIds')
+    if file_ids:
+        try:
+            sources = [documents.path(fid) for fid in file_ids]
+        except DocumentNotFound as e:
+            return jsonify({'error': str(e)}), 400
+    else:
+        # Mode 3: legacy direct upload with multiple files
+        sources = [f.stream for f in request.files.getlist('files')]
+    if not sources:
+        return jsonify({'error': 'No images provided'}), 400
+
+    output = output_buffer()
+    try:
+        with stage('assemble'):
+            images_to_pdf(sources, output, page_size, fit, margin)
+    except UnidentifiedImageError:
+        return jsonify({'error': 'Unsupported image file'}), 400
+    # The temporary uploads of mode 1 are only needed for this assembly;
+    # documents stored through /api/documents are left alone
+    if request.form.get('keepFiles', 'false') != 'true':
+        documents.delete_temporary(file_ids)
+    return send_output(output, 'images-to-pdf.pdf')
@@ -0,0 +1,179 @@
+"""Page-level PDF tools built on pypdf: split, rotate, reorder, encrypt, ..."""
+from flask import request, jsonify
+
+from inputs import documents, input_path, pdf_reader
+from metrics import stage
+from scratch import output_buffer, send_output, send_stream
+
+
+def pdf_splitter(tool):
+    from pypdf import PdfWriter
+    mode = request.form.get('mode', 'all')
+    if mode not in ('count', 'range'):
+        return _split_to_zip(tool, mode)
+    with pdf_reader() as reader:
+        total_pages = len(reader.pages)
+        # Quick page count endpoint: return only the number of pages when requested
+        if mode == 'count':
+            return jsonify({'pages': total_pages})
+        if mode == 'range':
+            try:
+                start = int(request.form.get('start', 1))
+                end = int(request.form.get('end', total_pages))
+            except Exception:
+                return jsonify({'error': 'Invalid start or end values'}), 400
+
+            # Validate ranges
+            if start < 1 or end < 1 or start > end:
+                return jsonify({'error': 'Invalid page range: ensure 1 <= start <= end'}), 400
+            if start > total_pages:
+                return jsonify({'error': 'Start page is greater than total pages'}), 400
+            # cap the end to total_pages
+            end = min(end, total_pages)
+
+            writer = PdfWriter()
+            for i in range(start - 1, end):
+                writer.add_page(reader.pages[i])
+            output = output_buffer()
+            writer.write(output)
+            return send_output(output, 'split-range.pdf')
+
+
+def _split_to_zip(tool, mode):
+    import fitz
+    from splitting import iter_split, plan_parts
+    from zipstream import iter_zip
+    temp_input = input_path('input.pdf')
+    with stage('parse'), fitz.open(temp_input) as doc:
+        page_count = len(doc)
+    try:
+        parts = plan_parts(mode, page_count, int(request.form.get('n', 1)), request.form.get('ranges', ''))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return send_stream(iter_zip(iter_split(tool, temp_input, parts)), 'split-pages.zip', 'application/zip')
+
+
+def pdf_rotate(tool):
+    from pypdf import PdfWriter
+    angle = int(request.form.get('angle', 90))
+    writer = PdfWriter()
+    with pdf_reader() as reader:
+        for page in reader.pages:
+            writer.add_page(page).rotate(angle)
+        output = output_buffer()
+        writer.write(output)
+    return send_output(output, 'rotated.pdf')
+
+
+def pdf_unlock(tool):
+    from pypdf import PdfReader, PdfWriter
+    password = request.form.get('password', '')
+    # decrypt() changes the reader, so this one is never shared
+    reader = PdfReader(input_path('input.pdf'))
+    if reader.is_encrypted:
+        reader.decrypt(password)
+    writer = PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    output = output_buffer()
+    writer.write(output)
+    return send_output(output, 'unlocked.pdf')
+
+
+def pdf_protect(tool):
+    from pypdf import PdfWriter
+    password = request.form.get('password', '')
+    writer = PdfWriter()
+    with pdf_reader() as reader:
+        for page in reader.pages:
+            writer.add_page(page)
+        writer.encrypt(password)
+        output = output_buffer()
+        writer.write(output)
+    return send_output(output, 'protected.pdf')
+
+
+def pdf_organize(tool):
+    from pypdf import PdfWriter
+    order = request.form.get('order', '')
+    writer = PdfWriter()
+    page_order = [int(x)-1 for x in order.split(',')]
+    with pdf_reader() as reader:
+        for i in page_order:
+            if 0 <= i < len(reader.pages):
+                writer.add_page(reader.pages[i])
+        output = output_buffer()
+        writer.write(output)
+    return send_output(output, 'organized.pdf')
+
+
+def pdf_extract_pages(tool):
+    from pypdf import PdfWriter
+    pages = request.form.get('pages', '')
+    writer = PdfWriter()
+    page_list = [int(x)-1 for x in pages.split(',')]
+    with pdf_reader() as reader:
+        for i in page_list:
+            if 0 <= i < len(reader.pages):
+                writer.add_page(reader.pages[i])
+        output = output_buffer()
+        writer.write(output)
+    return send_output(output, 'extracted.pdf')
+
+
+def pdf_delete_pages(tool):
+    from pypdf import PdfWriter
+    pages = request.form.get('pages', '')
+    writer = PdfWriter()
+    delete_list = [int(x)-1 for x in pages.split(',')]
+    with pdf_reader() as reader:
+        for i, page in enumerate(reader.pages):
+            if i not in delete_list:
+                writer.add_page(page)
+        output = output_buffer()
+        writer.write(output)
+    return send_output(output, 'deleted-pages.pdf')
+
+
+def pdf_repair(tool):
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    with pdf_reader() as reader:
+        for page in reader.pages:
+            writer.add_page(page)
+        output = output_buffer()
+        writer.write(output)
+    return send_output(output, 'repaired.pdf')
+
+
+def pdf_to_pdfa(tool):
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    with pdf_reader() as reader:
+        for page in reader.pages:
+            writer.add_page(page)
+        writer.add_metadata({'/Title': 'PDF/A Document'})
+        output = output_buffer()
+        writer.write(output)
+    return send_output(output, 'pdfa.pdf')
+
+
+def pdf_sign(tool):
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    with pdf_reader() as reader:
+        for page in reader.pages:
+            writer.add_page(page)
+        output = output_buffer()
+        writer.write(output)
+    return send_output(output, 'signed.pdf')
+
+
+def pdf_validate(tool):
+    if request.form.get('fileId'):
+        documents.path(request.form['fileId'])
+    try:
+        with pdf_reader() as reader:
+            return jsonify({'valid': True, 'pages': len(reader.pages)})
+    except:
+        return jsonify({'valid': False})
@@ -0,0 +1,131 @@
+"""PDF tools backed by the PyMuPDF engines: merge, compress, stamp and render."""
+import os
+
+from flask import request, jsonify
+
+import executor
+from documents import DocumentNotFound
+from executor import ToolTimeout
+from ingest import save_upload
+from inputs import documents, has_input, input_path
+from metrics import stage
+from scratch import scratch_path, send_output, send_stream
+
+
+def pdf_merger(tool):
+    import fitz
+    from merging import merge_pdfs
+    from page_ranges import parse_page_ranges
+    paths = [documents.path(fid) for fid in request.form.getlist('fileIds')]
+    for i, f in enumerate(request.files.getlist('files')):
+        paths.append(scratch_path(f'input_{i}.pdf'))
+        save_upload(f, paths[-1])
+    if not paths:
+        return jsonify({'error': 'No files uploaded'}), 400
+    # Optional page selection per input, in upload order (e.g. "1-3,5")
+    specs = request.form.getlist('ranges')
+    inputs = []
+    for i, path in enumerate(paths):
+        with fitz.open(path) as doc:
+            page_count = len(doc)
+        try:
+            pages = parse_page_ranges(specs[i] if i < len(specs) else '', page_count)
+        except ValueError as e:
+            return jsonify({'error': f'File {i + 1}: {e}'}), 400
+        inputs.append((path, pages))
+    output = scratch_path('merged.pdf')
+    with stage('merge'):
+        executor.run(tool, merge_pdfs, inputs, output)
+    return send_output(output, 'merged.pdf')
+
+
+def pdf_compress(tool):
+    import time
+    from compression import PRESETS, compress_pdf
+    preset = request.form.get('preset', 'ebook')
+    if preset not in PRESETS:
+        return jsonify({'error': f'Unsupported preset: {preset}'}), 400
+    started = time.time()
+    temp_input = input_path('input.pdf')
+    output = scratch_path('compressed.pdf')
+    images = compress_pdf(tool, temp_input, output, preset)
+    original_size = os.path.getsize(temp_input)
+    # Never hand back a bigger file than we were given
+    if os.path.getsize(output) >= original_size:
+        output = temp_input
+    resp = send_output(output, 'compressed.pdf')
+    resp.headers['X-Original-Size'] = str(original_size)
+    resp.headers['X-Compressed-Size'] = str(os.path.getsize(output))
+    resp.headers['X-Images-Recompressed'] = str(images)
+    resp.headers['X-Compression-Time'] = f'{time.time() - started:.3f}'
+    return resp
+
+
+def pdf_watermark(tool):
+    from stamping import FONTS, POSITIONS, watermark_pdf
+    text = request.form.get('text', 'WATERMARK')
+    options = {
+        'position': request.form.get('position', 'center'),
+        'opacity': float(request.form.get('opacity', 0.3)),
+        'rotation': float(request.form.get('rotation', 45)),
+        'font': request.form.get('font', 'helvetica').lower(),
+        'fontSize': float(request.form.get('fontSize', 50)),
+        'color': request.form.get('color', '#808080'),
+    }
+    if options['position'] not in POSITIONS or options['font'] not in FONTS:
+        return jsonify({'error': 'Unsupported position or font'}), 400
+    if not 0 <= options['opacity'] <= 1:
+        return jsonify({'error': 'opacity must be between 0 and 1'}), 400
+    temp_input = input_path('input.pdf')
+    output = scratch_path('watermarked.pdf')
+    with stage('render'):
+        executor.run(tool, watermark_pdf, temp_input, output, text, options)
+    return send_output(output, 'watermarked.pdf')
+
+
+def pdf_page_numbers(tool):
+    from stamping import FONTS, number_pages
+    if not has_input():
+        return jsonify({'error': 'No file provided'}), 400
+    try:
+        position = request.form.get('position', 'bottom-center')
+        start_num = int(request.form.get('startNumber', 1))
+        font_size = int(request.form.get('fontSize', 12))
+        format_str = request.form.get('format', 'Page {n}')
+        color_hex = request.form.get('color', '#000000')
+        font = request.form.get('font', 'helvetica').lower()
+        if font not in FONTS:
+            return jsonify({'error': f'Unsupported font: {font}'}), 400
+        temp_input = input_path('input.pdf')
+        output = scratch_path('numbered.pdf')
+        with stage('render'):
+            executor.run(tool, number_pages, temp_input, output,
+                         position, start_num, font_size, format_str, color_hex, font)
+        return send_output(output, 'numbered.pdf')
+    except (ToolTimeout, DocumentNotFound):
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def pdf_to_jpg(tool):
+    import fitz
+    from page_ranges import parse_page_ranges
+    from rendering import IMAGE_FORMATS, iter_rendered_pages
+    from zipstream import iter_zip
+    dpi = int(request.form.get('dpi', 200))
+    fmt = request.form.get('format', 'jpg').lower().replace('jpeg', 'jpg')
+    quality = int(request.form.get('quality', 95))
+    if fmt not in IMAGE_FORMATS:
+        return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+    if not 36 <= dpi <= 600 or not 1 <= quality <= 100:
+        return jsonify({'error': 'dpi must be 36-600 and quality 1-100'}), 400
+    temp_input = input_path('input.pdf')
+    with stage('parse'), fitz.open(temp_input) as doc:
+        page_count = len(doc)
+    try:
+        pages = parse_page_ranges(request.form.get('pages', ''), page_count)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    entries = iter_rendered_pages(tool, temp_input, pages, dpi, fmt, quality)
+    return send_stream(iter_zip(entries), 'pdf-images.zip', 'application/zip')
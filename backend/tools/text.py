@@ -0,0 +1,67 @@
+"""Text utilities: counters, formatters and generators."""
+from flask import request, jsonify
+
+from ingest import mapped
+
+
+def _text():
+    file = request.files.get('file')
+    if not file:
+        return request.form.get('text', '')
+    with mapped(file) as data:
+        return str(data, 'utf-8')
+
+
+def word_counter(tool):
+    text = _text()
+    words = len(text.split())
+    chars = len(text)
+    lines = len(text.splitlines())
+    return jsonify({'words': words, 'characters': chars, 'lines': lines})
+
+
+def json_formatter(tool):
+    text = _text()
+    import json
+    formatted = json.dumps(json.loads(text), indent=2)
+    return jsonify({'formatted': formatted})
+
+
+def base64_encoder(tool):
+    import base64
+    text = request.form.get('text', '')
+    action = request.form.get('action', 'encode')
+    if action == 'encode':
+        result = base64.b64encode(text.encode()).decode()
+    else:
+        result = base64.b64decode(text.encode()).decode()
+    return jsonify({'result': result})
+
+
+def uuid_generator(tool):
+    import uuid
+    return jsonify({'uuid': str(uuid.uuid4())})
+
+
+def password_generator(tool):
+    import random, string
+    length = int(request.form.get('length', 16))
+    chars = string.ascii_letters + string.digits + string.punctuation
+    password = ''.join(random.choice(chars) for _ in range(length))
+    return jsonify({'password': password})
+
+
+def hash_generator(tool):
+    import hashlib
+    text = request.form.get('text', '')
+    return jsonify({
+        'md5': hashlib.md5(text.encode()).hexdigest(),
+        'sha256': hashlib.sha256(text.encode()).hexdigest()
+    })
+
+
+def case_converter(tool):
+    text = request.form.get('text', '')
+    case_type = request.form.get('type', 'upper')
+    result = text.upper() if case_type == 'upper' else text.lower() if case_type == 'lower' else text.title()
+    return jsonify({'result': result})
@@ -0,0 +1,185 @@
+"""Resumable chunked uploads into the document store.
+
+Large files are sent as numbered chunks so a dropped connection only costs
+the chunk in flight:
+
+1. ``POST /api/uploads`` with ``filename``, ``size`` and optionally the
+   file's ``sha256`` preallocates the file and returns an ``uploadId`` and
+   the ``chunkSize``.
+2. ``PUT /api/uploads/<uploadId>/chunks/<n>`` writes chunk ``n`` (0-based)
+   at its offset. An ``X-Chunk-SHA256`` header is checked before the chunk
+   counts as received; chunks may be sent in any order, in parallel and
+   again.
+3. ``GET /api/uploads/<uploadId>`` lists the chunks received so far, for
+   a client resuming after a failure.
+4. ``POST /api/uploads/<uploadId>/complete`` checks the whole file and
+   turns it into a document ``fileId`` usable by every tool.
+
+State is kept on disk next to the data (``upload.json`` and a map with one
+byte per chunk, set by positional writes), so any gunicorn worker can take
+any chunk without locking. Uploads left unfinished for ``UPLOAD_TTL``
+are removed by the storage sweeper (see :mod:`storage`).
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import uuid
+
+from ingest import mapped
+
+UPLOAD_CHUNK_BYTES = int(os.getenv('UPLOAD_CHUNK_BYTES', str(8 * 1024 * 1024)))
+# Idle time after which an unfinished upload is swept away
+UPLOAD_TTL = int(os.getenv('UPLOAD_TTL', str(24 * 3600)))
+
+_READ_BYTES = 1024 * 1024
+_SHA256 = re.compile(r'[0-9a-f]{64}')
+
+
+class UploadNotFound(Exception):
+    def __init__(self, upload_id):
+        super().__init__(f'Upload not found: {upload_id}')
+        self.upload_id = upload_id
+
+
+class UploadIncomplete(Exception):
+    def __init__(self, missing):
+        super().__init__(f'{len(missing)} chunks missing')
+        self.missing = missing
+
+
+def _checksum(value, what):
+    value = (value or '').strip().lower()
+    if value and not _SHA256.fullmatch(value):
+        raise ValueError(f'{what} must be a hex SHA-256 digest')
+    return value or None
+
+
+class UploadStore:
+    def __init__(self, folder, documents, max_bytes, chunk_size=UPLOAD_CHUNK_BYTES):
+        self.folder = os.path.abspath(folder)
+        self.documents = documents
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        os.makedirs(self.folder, exist_ok=True)
+
+    def _dir(self, upload_id):
+        if not upload_id or not re.fullmatch(r'[0-9a-f]{32}', upload_id):
+            raise UploadNotFound(upload_id)
+        return os.path.join(self.folder, upload_id)
+
+    def _meta(self, upload_id):
+        try:
+            with open(os.path.join(self._dir(upload_id), 'upload.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise UploadNotFound(upload_id)
+
+    def create(self, filename, size, sha256=None):
+        """Start an upload of ``size`` bytes and return its status."""
+        if size < 0 or size > self.max_bytes:
+            raise ValueError(f'size must be between 0 and {self.max_bytes // (1024 * 1024)} MB')
+        meta = {
+            'uploadId': uuid.uuid4().hex,
+            'filename': filename or '',
+            'size': size,
+            'chunkSize': self.chunk_size,
+            'chunks': -(-size // self.chunk_size),
+            'sha256': _checksum(sha256, 'sha256'),
+        }
+        folder = os.path.join(self.folder, meta['uploadId'])
+        os.makedirs(folder)
+        fd = os.open(os.path.join(folder, 'data'), os.O_WRONLY | os.O_CREAT, 0o600)
+        try:
+            # Reserve the space up front so a full disk fails here, not mid-upload
+            try:
+                os.posix_fallocate(fd, 0, size)
+            except (AttributeError, OSError):
+                os.ftruncate(fd, size)
+        finally:
+            os.close(fd)
+        with open(os.path.join(folder, 'chunks'), 'wb') as f:
+            f.write(bytes(meta['chunks']))
+        with open(os.path.join(folder, 'upload.json'), 'w') as f:
+            json.dump(meta, f)
+        return self.status(meta['uploadId'])
+
+    def write_chunk(self, upload_id, index, stream, sha256=None):
+        """Write chunk ``index`` read from the binary file ``stream``.
+        Raises ``ValueError`` if its length or checksum is wrong."""
+        meta = self._meta(upload_id)
+        sha256 = _checksum(sha256, 'X-Chunk-SHA256')
+        if not 0 <= index < meta['chunks']:
+            raise ValueError(f'Chunk index must be between 0 and {meta["chunks"] - 1}')
+        offset = index * meta['chunkSize']
+        expected = min(meta['chunkSize'], meta['size'] - offset)
+        folder = self._dir(upload_id)
+        # A resent chunk no longer counts as received until it checks out
+        self._mark(folder, index, b'\0')
+        digest = hashlib.sha256()
+        received = 0
+        fd = os.open(os.path.join(folder, 'data'), os.O_WRONLY)
+        try:
+            while received <= expected:
+                data = stream.read(min(_READ_BYTES, expected + 1 - received))
+                if not data:
+                    break
+                if received + len(data) <= expected:
+                    os.pwrite(fd, data, offset + received)
+                    digest.update(data)
+                received += len(data)
+        finally:
+            os.close(fd)
+        if received != expected:
+            raise ValueError(f'Chunk {index} must be {expected} bytes')
+        if sha256 and digest.hexdigest() != sha256:
+            raise ValueError(f'Chunk {index} checksum mismatch')
+        self._mark(folder, index, b'\1')
+        return {'uploadId': upload_id, 'chunk': index, 'sha256': digest.hexdigest()}
+
+    def _mark(self, folder, index, value):
+        fd = os.open(os.path.join(folder, 'chunks'), os.O_WRONLY)
+        try:
+            os.pwrite(fd, value, index)
+        finally:
+            os.close(fd)
+
+    def status(self, upload_id):
+        meta = self._meta(upload_id)
+        with open(os.path.join(self._dir(upload_id), 'chunks'), 'rb') as f:
+            chunks = f.read()
+        missing = [i for i, done in enumerate(chunks) if not done]
+        received = [i for i, done in enumerate(chunks) if done]
+        # Bytes received before the first gap, for clients sending in order
+        offset = min(missing[0] * meta['chunkSize'], meta['size']) if missing else meta['size']
+        info = {k: meta[k] for k in ('uploadId', 'filename', 'size', 'chunkSize', 'chunks')}
+        info.update({'received': received, 'missing': missing, 'offset': offset})
+        return info
+
+    def complete(self, upload_id):
+        """Move a fully received upload into the document store and return
+        its ``fileId``. Raises ``UploadIncomplete`` while chunks are missing
+        and ``ValueError`` if the file does not match its ``sha256``."""
+        meta = self._meta(upload_id)
+        missing = self.status(upload_id)['missing']
+        if missing:
+            raise UploadIncomplete(missing)
+        folder = self._dir(upload_id)
+        path = os.path.join(folder, 'data')
+        if meta['sha256']:
+            with mapped(path) as data:
+                digest = hashlib.sha256(data).hexdigest()
+            if digest != meta['sha256']:
+                raise ValueError('File checksum mismatch')
+        try:
+            file_id = self.documents.adopt(path, meta['filename'])
+        except FileNotFoundError:
+            # Completed by a concurrent request
+            raise UploadNotFound(upload_id)
+        shutil.rmtree(folder, ignore_errors=True)
+        return file_id
+
+    def abort(self, upload_id):
+        self._meta(upload_id)
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
@@ -0,0 +1,51 @@
+"""Upstream calls that the ASGI server awaits instead of a request thread.
+
+Under ``asgi.py`` a tool that would block on an outside service (Adobe PDF
+Services, OCR.space) returns :func:`defer` instead of making the call. The
+server answers nothing yet: it awaits the call on its event loop and then
+dispatches the same request again with the outcome, which the tool picks up
+with :func:`result`. Both passes run the normal Flask code path, so the
+result cache, fallbacks and response headers are the same as under gunicorn,
+while no thread is held during the wait. Anywhere else (gunicorn, background
+jobs) :func:`deferrable` is false and tools make the call themselves.
+"""
+import os
+import shutil
+import tempfile
+
+from flask import Response, current_app, request
+
+# WSGI environ keys shared with asgi.py
+ASYNC = 'toolify.async'
+DEFERRED = 'toolify.deferred'
+RESULT = 'toolify.upstream'
+# Start time and stages of the request across both passes, for metrics
+TIMING = 'toolify.timing'
+
+
+def deferrable():
+    return bool(request.environ.get(ASYNC))
+
+
+def result(name):
+    """Outcome of the awaited ``name`` call for this request (its return
+    value or the exception it raised), or None before it was made."""
+    done = request.environ.get(RESULT)
+    if done and done[0] == name:
+        return done[1]
+    return None
+
+
+def defer(name, input_path, **params):
+    """Ask the server to make the ``name`` call on ``input_path`` and
+    dispatch the request again. The input is kept (hard-linked) in a
+    folder of its own, as scratch space goes away with this pass."""
+    folder = tempfile.mkdtemp(prefix='upstream-', dir=current_app.config['SCRATCH_FOLDER'])
+    held = os.path.join(folder, 'input' + os.path.splitext(input_path)[1])
+    try:
+        os.link(input_path, held)
+    except OSError:
+        shutil.copyfile(input_path, held)
+    request.environ[DEFERRED] = dict(params, name=name, input=held, folder=folder)
+    return Response(status=202)
+
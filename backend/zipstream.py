@@ -0,0 +1,38 @@
+"""Incremental ZIP writer for streaming responses.
+
+``zipfile`` can write to an unseekable stream (it falls back to data
+descriptors), so entries are written into a small sink that is drained
+after each one. The response can start before the last entry exists.
+"""
+import zipfile
+
+
+class _Sink:
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries, compression=zipfile.ZIP_STORED):
+    """Yield the bytes of a ZIP holding ``(name, data)`` pairs from ``entries``.
+
+    Entries are STORED by default: PDFs and images are already compressed
+    and deflating them again only burns CPU.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression) as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+            yield sink.drain()
+    yield sink.drain()